@@ -1,26 +1,94 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import json
 import os
+import re
 import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from datetime import UTC, datetime
 from pathlib import Path
-from typing import Any
+from typing import Any, TypeVar
 
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 
 APP_ROOT = Path(__file__).resolve().parent
 STATIC_ROOT = APP_ROOT / "static"
 DEFAULT_DB_PATH = APP_ROOT.parent / "mvp_routing_database" / "mvp_routing.db"
 
+T = TypeVar("T")
+
 OPEN_STATUSES = ("OPEN", "IN_PROGRESS", "WAITING_CLIENT", "ESCALATED")
-TS_FORMATS = (
-    "%Y-%m-%d %H:%M:%S",
-    "%Y-%m-%d %H:%M:%S.%f",
-    "%Y-%m-%dT%H:%M:%S",
-    "%Y-%m-%dT%H:%M:%S.%f",
-)
+# Query threads, each holding one read-only connection; also caps concurrent DB work.
+DB_POOL_SIZE = max(int(os.getenv("DASHBOARD_DB_POOL_SIZE", "4")), 1)
+
+# Aggregates also depend on the clock (ages, "last 15 minutes"), so cached snapshots
+# are rebuilt at least this often even without writes.
+SNAPSHOT_MAX_AGE_SECONDS = float(os.getenv("DASHBOARD_SNAPSHOT_MAX_AGE_SECONDS", "30"))
+STREAM_POLL_SECONDS = float(os.getenv("DASHBOARD_STREAM_POLL_SECONDS", "1.0"))
+STREAM_KEEPALIVE_SECONDS = 15.0
+STREAM_QUEUE_MAX = 64
+SEARCH_TERM_RE = re.compile(r"\w+")
+# A lone word ending in digits ("TCK000123", "000123") may be a partial ticket ref.
+TICKET_REF_QUERY_RE = re.compile(r"[A-Za-z]*\d+")
+# Beyond this many touched tickets in one poll a client is told to reload instead.
+STREAM_MAX_TICKETS_PER_DELTA = 200
+
+TICKET_SUMMARY_COLUMNS = """
+        t.ticket_id,
+        t.ticket_ref,
+        t.status,
+        t.priority,
+        t.automatable,
+        t.requires_multi_desk,
+        t.requester_email,
+        t.subject,
+        t.created_at,
+        t.last_event_at,
+        CAST(MAX((julianday('now') - julianday(t.created_at)) * 1440.0, 0) AS INTEGER) AS created_age_min,
+        CAST(MAX((julianday('now') - julianday(t.last_event_at)) * 1440.0, 0) AS INTEGER) AS last_event_age_min,
+        c.client_name,
+        i.intent_code,
+        i.intent_name,
+        pd.desk_code AS primary_desk_code,
+        pd.desk_name AS primary_desk_name,
+        cd.desk_code AS current_desk_code,
+        cd.desk_name AS current_desk_name,
+        a.agent_code AS owner_agent_code,
+        a.full_name AS owner_agent_name
+"""
+
+TICKET_SUMMARY_FROM = """
+    FROM tickets t
+    JOIN clients c ON c.client_id = t.client_id
+    JOIN intents i ON i.intent_id = t.intent_id
+    JOIN desks pd ON pd.desk_id = t.primary_desk_id
+    LEFT JOIN desks cd ON cd.desk_id = t.current_desk_id
+    LEFT JOIN agents a ON a.agent_id = t.owner_agent_id
+"""
+
+TICKET_SUMMARY_SELECT = f"SELECT {TICKET_SUMMARY_COLUMNS} {TICKET_SUMMARY_FROM}"
+
+EVENT_SELECT = """
+    SELECT
+        em.message_id,
+        em.sent_at,
+        em.direction,
+        em.sender_email,
+        em.recipient_email,
+        em.subject,
+        em.delivery_status,
+        t.ticket_ref,
+        t.status AS ticket_status
+    FROM email_messages em
+    JOIN tickets t ON t.ticket_id = em.ticket_id
+"""
 
 
 def _db_path() -> Path:
@@ -28,40 +96,47 @@ def _db_path() -> Path:
     return Path(raw).expanduser()
 
 
-def _get_conn() -> sqlite3.Connection:
-    db = _db_path()
-    if not db.exists():
-        raise HTTPException(status_code=500, detail=f"dashboard_db_not_found: {db}")
+class ReadPool:
+    """Bounded executor whose worker threads each keep one read-only connection.
 
-    conn = sqlite3.connect(db)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON;")
-    conn.execute("PRAGMA busy_timeout = 5000;")
-    return conn
+    Connections open with `mode=ro` plus `query_only`, so the dashboard cannot write,
+    and live as long as their thread. A rebuilt DB file (new inode) is reopened on
+    the next query.
+    """
 
+    def __init__(self, size: int) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="dashboard-db")
+        self._local = threading.local()
 
-def _parse_ts(value: str | None) -> datetime | None:
-    if not value:
-        return None
+    async def run(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._call, fn)
+
+    def _call(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        return fn(self._connection())
 
-    for fmt in TS_FORMATS:
+    def _connection(self) -> sqlite3.Connection:
+        db = _db_path()
         try:
-            return datetime.strptime(value, fmt)
-        except ValueError:
-            continue
+            identity = (str(db), db.stat().st_ino)
+        except FileNotFoundError:
+            raise HTTPException(status_code=500, detail=f"dashboard_db_not_found: {db}") from None
 
-    try:
-        return datetime.fromisoformat(value.replace("Z", "+00:00")).replace(tzinfo=None)
-    except ValueError:
-        return None
+        cached = getattr(self._local, "conn", None)
+        if cached is not None:
+            if cached[0] == identity:
+                return cached[1]
+            cached[1].close()
 
+        conn = sqlite3.connect(f"{db.resolve().as_uri()}?mode=ro", uri=True)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA query_only = ON;")
+        conn.execute("PRAGMA busy_timeout = 5000;")
+        self._local.conn = (identity, conn)
+        return conn
 
-def _age_minutes(value: str | None) -> int | None:
-    ts = _parse_ts(value)
-    if ts is None:
-        return None
-    now = datetime.now(UTC).replace(tzinfo=None)
-    return max(int((now - ts).total_seconds() // 60), 0)
+
+db_reads = ReadPool(DB_POOL_SIZE)
 
 
 def _to_bool(value: Any) -> bool:
@@ -69,8 +144,6 @@ def _to_bool(value: Any) -> bool:
 
 
 def _row_to_ticket_summary(row: sqlite3.Row) -> dict[str, Any]:
-    created_at = row["created_at"]
-    last_event_at = row["last_event_at"]
     return {
         "ticket_ref": row["ticket_ref"],
         "status": row["status"],
@@ -79,10 +152,10 @@ def _row_to_ticket_summary(row: sqlite3.Row) -> dict[str, Any]:
         "requires_multi_desk": _to_bool(row["requires_multi_desk"]),
         "requester_email": row["requester_email"],
         "subject": row["subject"],
-        "created_at": created_at,
-        "created_age_min": _age_minutes(created_at),
-        "last_event_at": last_event_at,
-        "last_event_age_min": _age_minutes(last_event_at),
+        "created_at": row["created_at"],
+        "created_age_min": row["created_age_min"],
+        "last_event_at": row["last_event_at"],
+        "last_event_age_min": row["last_event_age_min"],
         "client_name": row["client_name"],
         "intent_code": row["intent_code"],
         "intent_name": row["intent_name"],
@@ -95,6 +168,253 @@ def _row_to_ticket_summary(row: sqlite3.Row) -> dict[str, Any]:
     }
 
 
+def _row_to_event(row: sqlite3.Row) -> dict[str, Any]:
+    return {
+        "message_id": row["message_id"],
+        "sent_at": row["sent_at"],
+        "direction": row["direction"],
+        "sender_email": row["sender_email"],
+        "recipient_email": row["recipient_email"],
+        "subject": row["subject"],
+        "delivery_status": row["delivery_status"],
+        "ticket_ref": row["ticket_ref"],
+        "ticket_status": row["ticket_status"],
+    }
+
+
+Cursor = tuple[int, int, int]
+
+
+def _read_cursor(conn: sqlite3.Connection) -> Cursor:
+    # MAX over an INTEGER PRIMARY KEY (or an indexed column) is a single b-tree seek.
+    row = conn.execute(
+        """
+        SELECT
+            (SELECT COALESCE(MAX(message_id), 0) FROM email_messages) AS message_id,
+            (SELECT COALESCE(MAX(trace_id), 0) FROM routing_trace) AS trace_id,
+            (SELECT COALESCE(MAX(delivery_seq), 0) FROM email_messages) AS delivery_seq;
+        """
+    ).fetchone()
+    return int(row["message_id"]), int(row["trace_id"]), int(row["delivery_seq"])
+
+
+def _cursor_payload(cursor: Cursor) -> dict[str, int]:
+    return {"message_id": cursor[0], "trace_id": cursor[1], "delivery_seq": cursor[2]}
+
+
+def _read_delta(conn: sqlite3.Connection, since: Cursor, until: Cursor) -> dict[str, Any]:
+    """Tickets and email events that changed between two (message_id, trace_id, delivery_seq) cursors.
+
+    Every ticket write in the routing service (creation, status change, escalation)
+    appends a routing_trace row, so the touched-ticket set covers status changes too.
+    Delivery updates rewrite an email row in place and stamp it with the next
+    `delivery_seq`, so those rows are picked up by that high-water mark instead.
+    """
+    since_message, since_trace, since_delivery = since
+    until_message, until_trace, until_delivery = until
+    ticket_ids = [
+        int(row["ticket_id"])
+        for row in conn.execute(
+            """
+            SELECT ticket_id FROM email_messages WHERE message_id > ? AND message_id <= ?
+            UNION
+            SELECT ticket_id FROM routing_trace WHERE trace_id > ? AND trace_id <= ?
+            UNION
+            SELECT ticket_id FROM email_messages WHERE delivery_seq > ? AND delivery_seq <= ?
+            LIMIT ?;
+            """,
+            (
+                since_message,
+                until_message,
+                since_trace,
+                until_trace,
+                since_delivery,
+                until_delivery,
+                STREAM_MAX_TICKETS_PER_DELTA + 1,
+            ),
+        ).fetchall()
+    ]
+    cursor = _cursor_payload(until)
+    if len(ticket_ids) > STREAM_MAX_TICKETS_PER_DELTA:
+        return {"cursor": cursor, "resync": True, "tickets": [], "events": []}
+
+    placeholders = ", ".join("?" for _ in ticket_ids)
+    ticket_rows = (
+        conn.execute(
+            f"{TICKET_SUMMARY_SELECT} WHERE t.ticket_id IN ({placeholders}) ORDER BY t.ticket_id DESC;",
+            ticket_ids,
+        ).fetchall()
+        if ticket_ids
+        else []
+    )
+    event_rows = conn.execute(
+        f"""
+        {EVENT_SELECT}
+        WHERE (em.message_id > ? AND em.message_id <= ?) OR (em.delivery_seq > ? AND em.delivery_seq <= ?)
+        ORDER BY em.message_id DESC
+        LIMIT 100;
+        """,
+        (since_message, until_message, since_delivery, until_delivery),
+    ).fetchall()
+    return {
+        "cursor": cursor,
+        "resync": False,
+        "tickets": [_row_to_ticket_summary(row) for row in ticket_rows],
+        "events": [_row_to_event(row) for row in event_rows],
+    }
+
+
+def _change_token(conn: sqlite3.Connection) -> str:
+    """Cheap token that moves whenever a ticket, trace or email is written or a delivery status changes.
+
+    Four MAX() index seeks. Status changes always come with a routing_trace row, and
+    in-place delivery updates bump `email_messages.delivery_seq`, so both move the
+    token too. The time bucket bounds staleness of the clock-dependent figures.
+    """
+    row = conn.execute(
+        """
+        SELECT
+            (SELECT COALESCE(MAX(ticket_id), 0) FROM tickets) AS ticket_id,
+            (SELECT COALESCE(MAX(message_id), 0) FROM email_messages) AS message_id,
+            (SELECT COALESCE(MAX(trace_id), 0) FROM routing_trace) AS trace_id,
+            (SELECT COALESCE(MAX(delivery_seq), 0) FROM email_messages) AS delivery_seq;
+        """
+    ).fetchone()
+    bucket = int(time.time() // SNAPSHOT_MAX_AGE_SECONDS) if SNAPSHOT_MAX_AGE_SECONDS > 0 else time.time_ns()
+    return f"{row['ticket_id']}.{row['message_id']}.{row['trace_id']}.{row['delivery_seq']}.{bucket}"
+
+
+class SnapshotCache:
+    """Process-wide aggregate payloads, rebuilt once per change token.
+
+    Concurrent callers that miss on the same name wait for the single rebuild
+    instead of running the aggregate query themselves.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._name_locks: dict[str, threading.Lock] = {}
+        self._entries: dict[str, tuple[str, str, dict[str, Any]]] = {}
+
+    def get(
+        self,
+        name: str,
+        token: str,
+        build: Callable[[], dict[str, Any]],
+    ) -> tuple[str, dict[str, Any]]:
+        """Return (etag, payload) for `name` at `token`, building it if needed."""
+        entry = self._entries.get(name)
+        if entry is not None and entry[0] == token:
+            return entry[1], entry[2]
+
+        with self._lock:
+            name_lock = self._name_locks.setdefault(name, threading.Lock())
+        with name_lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry[0] == token:
+                return entry[1], entry[2]
+            payload = build()
+            digest = hashlib.sha1(f"{name}:{token}".encode()).hexdigest()[:16]
+            etag = f'W/"{digest}"'
+            self._entries[name] = (token, etag, payload)
+            return etag, payload
+
+
+snapshot_cache = SnapshotCache()
+
+
+async def _snapshot_response(
+    request: Request,
+    name: str,
+    build: Callable[[sqlite3.Connection], dict[str, Any]],
+) -> Response:
+    etag, payload = await db_reads.run(
+        lambda conn: snapshot_cache.get(name, _change_token(conn), lambda: build(conn))
+    )
+
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in {tag.strip() for tag in if_none_match.split(",")}:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(payload, headers=headers)
+
+
+class ChangeFeed:
+    """One poller per process fanning out ticket/email deltas to every open stream.
+
+    The poller only runs while at least one browser is subscribed, and costs one
+    cursor read per tick when nothing changed, however many tabs are open.
+    A new subscriber gets its `hello` from the poller, with the cursor of the tick
+    it joined on, so every later delta starts exactly where that cursor ends.
+    A subscriber whose queue fills up is dropped; its EventSource reconnects and
+    the client reloads from the REST endpoints.
+    """
+
+    def __init__(self, poll_interval_s: float = STREAM_POLL_SECONDS) -> None:
+        self._poll_interval_s = max(poll_interval_s, 0.1)
+        self._subscribers: set[asyncio.Queue[tuple[str, dict[str, Any]] | None]] = set()
+        self._joining: set[asyncio.Queue[tuple[str, dict[str, Any]] | None]] = set()
+        self._cursor: Cursor | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    def subscribe(self) -> asyncio.Queue[tuple[str, dict[str, Any]] | None]:
+        """Register a stream; its first item is ("hello", cursor), then ("delta", delta) items."""
+        queue: asyncio.Queue[tuple[str, dict[str, Any]] | None] = asyncio.Queue(maxsize=STREAM_QUEUE_MAX)
+        self._subscribers.add(queue)
+        self._joining.add(queue)
+        if self._task is None or self._task.done():
+            self._cursor = None
+            self._task = asyncio.create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue[tuple[str, dict[str, Any]] | None]) -> None:
+        self._subscribers.discard(queue)
+        self._joining.discard(queue)
+
+    def _poll(self, conn: sqlite3.Connection) -> dict[str, Any] | None:
+        cursor = _read_cursor(conn)
+        previous = self._cursor
+        self._cursor = cursor
+        if previous is None or cursor == previous:
+            return None
+        return _read_delta(conn, previous, cursor)
+
+    async def _run(self) -> None:
+        while self._subscribers:
+            try:
+                delta = await db_reads.run(self._poll)
+            except Exception:  # noqa: BLE001
+                delta = None
+            # Streams that joined since the last tick start from this tick's cursor;
+            # they skip its delta, which their reload after `hello` already covers.
+            joined = set(self._joining) if self._cursor is not None else set()
+            self._joining -= joined
+            for queue in list(self._subscribers):
+                if queue in joined:
+                    item = ("hello", {"cursor": _cursor_payload(self._cursor)})
+                elif delta is not None:
+                    item = ("delta", delta)
+                else:
+                    continue
+                try:
+                    queue.put_nowait(item)
+                except asyncio.QueueFull:
+                    # Too far behind: drop the backlog and tell the stream to close.
+                    self._subscribers.discard(queue)
+                    while not queue.empty():
+                        queue.get_nowait()
+                    queue.put_nowait(None)
+            await asyncio.sleep(self._poll_interval_s)
+
+
+def _sse(event: str, data: dict[str, Any], event_id: str | None = None) -> str:
+    lines = [f"event: {event}"]
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
 app = FastAPI(title="BNP Service Management Dashboard", version="1.0.0")
 app.mount("/static", StaticFiles(directory=STATIC_ROOT), name="static")
 
@@ -114,42 +434,45 @@ def health() -> dict[str, str]:
 
 
 @app.get("/api/overview")
-def api_overview() -> dict[str, Any]:
-    with _get_conn() as conn:
-        totals = conn.execute(
-            """
-            SELECT
-                COUNT(*) AS total_tickets,
-                SUM(CASE WHEN status IN ('OPEN','IN_PROGRESS','WAITING_CLIENT','ESCALATED') THEN 1 ELSE 0 END) AS active_tickets,
-                SUM(CASE WHEN status = 'RESOLVED' THEN 1 ELSE 0 END) AS resolved_tickets,
-                SUM(CASE WHEN status = 'CLOSED' THEN 1 ELSE 0 END) AS closed_tickets,
-                SUM(CASE WHEN automatable = 1 THEN 1 ELSE 0 END) AS automatable_tickets,
-                SUM(CASE WHEN requires_multi_desk = 1 THEN 1 ELSE 0 END) AS multi_desk_tickets,
-                SUM(
-                    CASE
-                        WHEN status IN ('OPEN','IN_PROGRESS','WAITING_CLIENT','ESCALATED')
-                         AND created_at <= datetime('now','-1 day')
-                        THEN 1 ELSE 0
-                    END
-                ) AS active_over_24h,
-                AVG(
-                    CASE
-                        WHEN resolved_at IS NOT NULL
-                        THEN (julianday(resolved_at) - julianday(created_at)) * 24.0
-                    END
-                ) AS avg_resolution_hours
-            FROM tickets;
-            """
-        ).fetchone()
-
-        inbound_recent = conn.execute(
-            """
-            SELECT COUNT(*) AS inbound_last_15m
-            FROM email_messages
-            WHERE direction = 'INBOUND'
-              AND sent_at >= datetime('now','-15 minutes');
-            """
-        ).fetchone()
+async def api_overview(request: Request) -> Response:
+    return await _snapshot_response(request, "overview", _build_overview)
+
+
+def _build_overview(conn: sqlite3.Connection) -> dict[str, Any]:
+    totals = conn.execute(
+        """
+        SELECT
+            COUNT(*) AS total_tickets,
+            SUM(CASE WHEN status IN ('OPEN','IN_PROGRESS','WAITING_CLIENT','ESCALATED') THEN 1 ELSE 0 END) AS active_tickets,
+            SUM(CASE WHEN status = 'RESOLVED' THEN 1 ELSE 0 END) AS resolved_tickets,
+            SUM(CASE WHEN status = 'CLOSED' THEN 1 ELSE 0 END) AS closed_tickets,
+            SUM(CASE WHEN automatable = 1 THEN 1 ELSE 0 END) AS automatable_tickets,
+            SUM(CASE WHEN requires_multi_desk = 1 THEN 1 ELSE 0 END) AS multi_desk_tickets,
+            SUM(
+                CASE
+                    WHEN status IN ('OPEN','IN_PROGRESS','WAITING_CLIENT','ESCALATED')
+                     AND created_at <= datetime('now','-1 day')
+                    THEN 1 ELSE 0
+                END
+            ) AS active_over_24h,
+            AVG(
+                CASE
+                    WHEN resolved_at IS NOT NULL
+                    THEN (julianday(resolved_at) - julianday(created_at)) * 24.0
+                END
+            ) AS avg_resolution_hours
+        FROM tickets;
+        """
+    ).fetchone()
+
+    inbound_recent = conn.execute(
+        """
+        SELECT COUNT(*) AS inbound_last_15m
+        FROM email_messages
+        WHERE direction = 'INBOUND'
+          AND sent_at >= datetime('now','-15 minutes');
+        """
+    ).fetchone()
 
     total_tickets = int(totals["total_tickets"] or 0)
     automatable_tickets = int(totals["automatable_tickets"] or 0)
@@ -168,13 +491,28 @@ def api_overview() -> dict[str, Any]:
     }
 
 
+def _fts_query(text: str) -> str | None:
+    """Turn free text into an FTS5 query: every word must match, as a prefix."""
+    terms = SEARCH_TERM_RE.findall(text.lower())
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
 @app.get("/api/tickets")
-def api_tickets(
+async def api_tickets(
     limit: int = 200,
     status: str | None = None,
     desk: str | None = None,
     query: str | None = None,
+    cursor: str | None = None,
 ) -> dict[str, Any]:
+    """One page of tickets, newest first, optionally narrowed by a `query` search.
+
+    Paging is keyset-based on `ticket_id`: pass the returned `next_cursor` back as
+    `cursor`. Search results use the same order, so pages stay stable while new
+    tickets are indexed.
+    """
     if limit < 1 or limit > 500:
         raise HTTPException(status_code=422, detail="limit_must_be_between_1_and_500")
 
@@ -186,149 +524,113 @@ def api_tickets(
         params.append(status.strip().upper())
 
     if desk:
-        clauses.append("COALESCE(cd.desk_code, pd.desk_code) = ?")
+        clauses.append("t.current_desk_id = (SELECT desk_id FROM desks WHERE desk_code = ?)")
         params.append(desk.strip().upper())
 
-    if query:
-        q = f"%{query.strip().lower()}%"
-        clauses.append(
-            "(" 
-            "lower(t.ticket_ref) LIKE ? OR "
-            "lower(t.requester_email) LIKE ? OR "
-            "lower(c.client_name) LIKE ? OR "
-            "lower(t.subject) LIKE ? OR "
-            "lower(i.intent_code) LIKE ?"
-            ")"
-        )
-        params.extend([q, q, q, q, q])
+    if cursor:
+        try:
+            before_id = int(cursor)
+        except ValueError as exc:
+            raise HTTPException(status_code=422, detail="invalid_cursor") from exc
+        clauses.append("t.ticket_id < ?")
+        params.append(before_id)
 
     where_sql = f"WHERE {' AND '.join(clauses)}" if clauses else ""
 
-    sql = f"""
-    WITH last_hop AS (
-        SELECT h.ticket_id, h.to_desk_id
-        FROM ticket_desk_hops h
-        JOIN (
-            SELECT ticket_id, MAX(hop_seq) AS max_hop_seq
-            FROM ticket_desk_hops
-            GROUP BY ticket_id
-        ) x ON x.ticket_id = h.ticket_id AND x.max_hop_seq = h.hop_seq
-    ),
-    latest_event AS (
-        SELECT ticket_id, MAX(event_at) AS last_event_at
-        FROM (
-            SELECT ticket_id, created_at AS event_at FROM tickets
-            UNION ALL
-            SELECT ticket_id, created_at AS event_at FROM routing_trace
-            UNION ALL
-            SELECT ticket_id, sent_at AS event_at FROM email_messages
-        ) e
-        GROUP BY ticket_id
-    )
-    SELECT
-        t.ticket_ref,
-        t.status,
-        t.priority,
-        t.automatable,
-        t.requires_multi_desk,
-        t.requester_email,
-        t.subject,
-        t.created_at,
-        le.last_event_at,
-        c.client_name,
-        i.intent_code,
-        i.intent_name,
-        pd.desk_code AS primary_desk_code,
-        pd.desk_name AS primary_desk_name,
-        cd.desk_code AS current_desk_code,
-        cd.desk_name AS current_desk_name,
-        a.agent_code AS owner_agent_code,
-        a.full_name AS owner_agent_name
-    FROM tickets t
-    JOIN clients c ON c.client_id = t.client_id
-    JOIN intents i ON i.intent_id = t.intent_id
-    JOIN desks pd ON pd.desk_id = t.primary_desk_id
-    LEFT JOIN last_hop lh ON lh.ticket_id = t.ticket_id
-    LEFT JOIN desks cd ON cd.desk_id = lh.to_desk_id
-    LEFT JOIN agents a ON a.agent_id = t.owner_agent_id
-    LEFT JOIN latest_event le ON le.ticket_id = t.ticket_id
-    {where_sql}
-    ORDER BY t.ticket_id DESC
-    LIMIT ?;
-    """
+    # current_desk_id / last_event_at are kept current on tickets by triggers, so the
+    # list is one indexed pass over tickets with point lookups for the labels; search
+    # starts from the ticket_search FTS index instead of scanning tickets.
+    match = _fts_query(query) if query else None
+    if match is None:
+        sql = f"""
+        {TICKET_SUMMARY_SELECT}
+        {where_sql}
+        ORDER BY t.ticket_id DESC
+        LIMIT ?;
+        """
+    else:
+        match_params: list[Any] = [match]
+        # FTS matches whole tokens by prefix, so "000123" would miss "TCK000123".
+        ref_sql = ""
+        if TICKET_REF_QUERY_RE.fullmatch(query.strip()):
+            ref_sql = "UNION SELECT ticket_id FROM tickets WHERE ticket_ref LIKE ?"
+            match_params.append(f"%{query.strip()}%")
+        sql = f"""
+        WITH matches AS (
+            SELECT rowid AS ticket_id
+            FROM ticket_search
+            WHERE ticket_search MATCH ?
+            {ref_sql}
+        )
+        {TICKET_SUMMARY_SELECT}
+        JOIN matches m ON m.ticket_id = t.ticket_id
+        {where_sql}
+        ORDER BY t.ticket_id DESC
+        LIMIT ?;
+        """
+        params[:0] = match_params
+
+    params.append(limit + 1)
 
-    params.append(limit)
+    rows = await db_reads.run(lambda conn: conn.execute(sql, params).fetchall())
 
-    with _get_conn() as conn:
-        rows = conn.execute(sql, params).fetchall()
+    next_cursor: str | None = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = str(rows[-1]["ticket_id"])
 
     tickets = [_row_to_ticket_summary(row) for row in rows]
     return {
         "count": len(tickets),
         "tickets": tickets,
+        "next_cursor": next_cursor,
     }
 
 
 @app.get("/api/desks/summary")
-def api_desks_summary() -> dict[str, Any]:
-    with _get_conn() as conn:
-        rows = conn.execute(
-            """
-            WITH last_hop AS (
-                SELECT h.ticket_id, h.to_desk_id
-                FROM ticket_desk_hops h
-                JOIN (
-                    SELECT ticket_id, MAX(hop_seq) AS max_hop_seq
-                    FROM ticket_desk_hops
-                    GROUP BY ticket_id
-                ) x ON x.ticket_id = h.ticket_id AND x.max_hop_seq = h.hop_seq
-            ),
-            ticket_desk AS (
-                SELECT
-                    t.ticket_id,
-                    COALESCE(lh.to_desk_id, t.primary_desk_id) AS desk_id,
-                    t.status,
-                    t.requires_multi_desk,
-                    t.created_at
-                FROM tickets t
-                LEFT JOIN last_hop lh ON lh.ticket_id = t.ticket_id
-            ),
-            desk_ticket_stats AS (
-                SELECT
-                    desk_id,
-                    COUNT(*) AS total_tickets,
-                    SUM(CASE WHEN status IN ('OPEN','IN_PROGRESS','WAITING_CLIENT','ESCALATED') THEN 1 ELSE 0 END) AS active_tickets,
-                    SUM(CASE WHEN status = 'ESCALATED' THEN 1 ELSE 0 END) AS escalated_tickets,
-                    SUM(CASE WHEN status IN ('OPEN','IN_PROGRESS','WAITING_CLIENT','ESCALATED') AND requires_multi_desk = 1 THEN 1 ELSE 0 END) AS active_multi_desk,
-                    AVG(
-                        CASE WHEN status IN ('OPEN','IN_PROGRESS','WAITING_CLIENT','ESCALATED')
-                        THEN (julianday('now') - julianday(created_at)) * 24.0 END
-                    ) AS avg_active_age_hours
-                FROM ticket_desk
-                GROUP BY desk_id
-            ),
-            desk_agent_stats AS (
-                SELECT desk_id, COUNT(*) AS active_agents
-                FROM agents
-                WHERE is_active = 1
-                GROUP BY desk_id
-            )
+async def api_desks_summary(request: Request) -> Response:
+    return await _snapshot_response(request, "desks_summary", _build_desks_summary)
+
+
+def _build_desks_summary(conn: sqlite3.Connection) -> dict[str, Any]:
+    rows = conn.execute(
+        """
+        WITH desk_ticket_stats AS (
             SELECT
-                d.desk_code,
-                d.desk_name,
-                d.specialty,
-                COALESCE(ts.total_tickets, 0) AS total_tickets,
-                COALESCE(ts.active_tickets, 0) AS active_tickets,
-                COALESCE(ts.escalated_tickets, 0) AS escalated_tickets,
-                COALESCE(ts.active_multi_desk, 0) AS active_multi_desk,
-                COALESCE(ts.avg_active_age_hours, 0.0) AS avg_active_age_hours,
-                COALESCE(ags.active_agents, 0) AS active_agents
-            FROM desks d
-            LEFT JOIN desk_ticket_stats ts ON ts.desk_id = d.desk_id
-            LEFT JOIN desk_agent_stats ags ON ags.desk_id = d.desk_id
-            ORDER BY d.desk_id;
-            """
-        ).fetchall()
+                current_desk_id AS desk_id,
+                COUNT(*) AS total_tickets,
+                SUM(CASE WHEN status IN ('OPEN','IN_PROGRESS','WAITING_CLIENT','ESCALATED') THEN 1 ELSE 0 END) AS active_tickets,
+                SUM(CASE WHEN status = 'ESCALATED' THEN 1 ELSE 0 END) AS escalated_tickets,
+                SUM(CASE WHEN status IN ('OPEN','IN_PROGRESS','WAITING_CLIENT','ESCALATED') AND requires_multi_desk = 1 THEN 1 ELSE 0 END) AS active_multi_desk,
+                AVG(
+                    CASE WHEN status IN ('OPEN','IN_PROGRESS','WAITING_CLIENT','ESCALATED')
+                    THEN (julianday('now') - julianday(created_at)) * 24.0 END
+                ) AS avg_active_age_hours
+            FROM tickets
+            GROUP BY current_desk_id
+        ),
+        desk_agent_stats AS (
+            SELECT desk_id, COUNT(*) AS active_agents
+            FROM agents
+            WHERE is_active = 1
+            GROUP BY desk_id
+        )
+        SELECT
+            d.desk_code,
+            d.desk_name,
+            d.specialty,
+            COALESCE(ts.total_tickets, 0) AS total_tickets,
+            COALESCE(ts.active_tickets, 0) AS active_tickets,
+            COALESCE(ts.escalated_tickets, 0) AS escalated_tickets,
+            COALESCE(ts.active_multi_desk, 0) AS active_multi_desk,
+            COALESCE(ts.avg_active_age_hours, 0.0) AS avg_active_age_hours,
+            COALESCE(ags.active_agents, 0) AS active_agents
+        FROM desks d
+        LEFT JOIN desk_ticket_stats ts ON ts.desk_id = d.desk_id
+        LEFT JOIN desk_agent_stats ags ON ags.desk_id = d.desk_id
+        ORDER BY d.desk_id;
+        """
+    ).fetchall()
 
     payload: list[dict[str, Any]] = []
     for row in rows:
@@ -350,26 +652,29 @@ def api_desks_summary() -> dict[str, Any]:
 
 
 @app.get("/api/agents/load")
-def api_agents_load() -> dict[str, Any]:
-    with _get_conn() as conn:
-        rows = conn.execute(
-            """
-            SELECT
-                v.agent_code,
-                v.full_name,
-                v.desk_code,
-                d.desk_name,
-                v.specialty,
-                v.open_ticket_count,
-                v.max_open_tickets,
-                v.available_slots,
-                v.load_ratio,
-                v.is_active
-            FROM v_agent_open_load v
-            JOIN desks d ON d.desk_id = v.desk_id
-            ORDER BY v.load_ratio DESC, v.open_ticket_count DESC, v.agent_code ASC;
-            """
-        ).fetchall()
+async def api_agents_load(request: Request) -> Response:
+    return await _snapshot_response(request, "agents_load", _build_agents_load)
+
+
+def _build_agents_load(conn: sqlite3.Connection) -> dict[str, Any]:
+    rows = conn.execute(
+        """
+        SELECT
+            v.agent_code,
+            v.full_name,
+            v.desk_code,
+            d.desk_name,
+            v.specialty,
+            v.open_ticket_count,
+            v.max_open_tickets,
+            v.available_slots,
+            v.load_ratio,
+            v.is_active
+        FROM v_agent_open_load v
+        JOIN desks d ON d.desk_id = v.desk_id
+        ORDER BY v.load_ratio DESC, v.open_ticket_count DESC, v.agent_code ASC;
+        """
+    ).fetchall()
 
     agents: list[dict[str, Any]] = []
     for row in rows:
@@ -392,201 +697,206 @@ def api_agents_load() -> dict[str, Any]:
 
 
 @app.get("/api/events/recent")
-def api_recent_events(limit: int = 20) -> dict[str, Any]:
+async def api_recent_events(limit: int = 20) -> dict[str, Any]:
     if limit < 1 or limit > 100:
         raise HTTPException(status_code=422, detail="limit_must_be_between_1_and_100")
 
-    with _get_conn() as conn:
-        rows = conn.execute(
-            """
-            SELECT
-                em.sent_at,
-                em.direction,
-                em.sender_email,
-                em.recipient_email,
-                em.subject,
-                em.delivery_status,
-                t.ticket_ref,
-                t.status AS ticket_status
-            FROM email_messages em
-            JOIN tickets t ON t.ticket_id = em.ticket_id
-            ORDER BY em.message_id DESC
-            LIMIT ?;
-            """,
-            (limit,),
-        ).fetchall()
-
-    events: list[dict[str, Any]] = []
-    for row in rows:
-        events.append(
-            {
-                "sent_at": row["sent_at"],
-                "direction": row["direction"],
-                "sender_email": row["sender_email"],
-                "recipient_email": row["recipient_email"],
-                "subject": row["subject"],
-                "delivery_status": row["delivery_status"],
-                "ticket_ref": row["ticket_ref"],
-                "ticket_status": row["ticket_status"],
-            }
-        )
+    rows = await db_reads.run(
+        lambda conn: conn.execute(f"{EVENT_SELECT} ORDER BY em.message_id DESC LIMIT ?;", (limit,)).fetchall()
+    )
 
+    events = [_row_to_event(row) for row in rows]
     return {"events": events}
 
 
-@app.get("/api/tickets/{ticket_ref}")
-def api_ticket_detail(ticket_ref: str) -> dict[str, Any]:
-    ref = ticket_ref.strip().upper()
-    with _get_conn() as conn:
-        ticket = conn.execute(
-            """
-            WITH last_hop AS (
-                SELECT h.ticket_id, h.to_desk_id
-                FROM ticket_desk_hops h
-                JOIN (
-                    SELECT ticket_id, MAX(hop_seq) AS max_hop_seq
-                    FROM ticket_desk_hops
-                    GROUP BY ticket_id
-                ) x ON x.ticket_id = h.ticket_id AND x.max_hop_seq = h.hop_seq
-            )
-            SELECT
-                t.ticket_id,
-                t.ticket_ref,
-                t.status,
-                t.priority,
-                t.automatable,
-                t.requires_multi_desk,
-                t.requester_email,
-                t.subject,
-                t.body,
-                t.channel,
-                t.created_at,
-                t.first_response_at,
-                t.resolved_at,
-                t.closed_at,
-                c.client_code,
-                c.client_name,
-                i.intent_code,
-                i.intent_name,
-                pd.desk_code AS primary_desk_code,
-                pd.desk_name AS primary_desk_name,
-                cd.desk_code AS current_desk_code,
-                cd.desk_name AS current_desk_name,
-                a.agent_code AS owner_agent_code,
-                a.full_name AS owner_agent_name,
-                a.email AS owner_agent_email
-            FROM tickets t
-            JOIN clients c ON c.client_id = t.client_id
-            JOIN intents i ON i.intent_id = t.intent_id
-            JOIN desks pd ON pd.desk_id = t.primary_desk_id
-            LEFT JOIN last_hop lh ON lh.ticket_id = t.ticket_id
-            LEFT JOIN desks cd ON cd.desk_id = lh.to_desk_id
-            LEFT JOIN agents a ON a.agent_id = t.owner_agent_id
-            WHERE t.ticket_ref = ?
-            LIMIT 1;
-            """,
-            (ref,),
-        ).fetchone()
+change_feed = ChangeFeed()
 
-        if ticket is None:
-            raise HTTPException(status_code=404, detail="ticket_not_found")
 
-        trace_rows = conn.execute(
-            """
-            SELECT
-                rt.step_seq,
-                rt.node_name,
-                rt.decision,
-                rt.rationale,
-                rt.actor_type,
-                rt.created_at,
-                a.agent_code,
-                a.full_name
-            FROM routing_trace rt
-            LEFT JOIN agents a ON a.agent_id = rt.decided_by_agent_id
-            WHERE rt.ticket_id = ?
-            ORDER BY rt.step_seq;
-            """,
-            (int(ticket["ticket_id"]),),
-        ).fetchall()
+@app.get("/api/stream")
+async def api_stream(request: Request) -> StreamingResponse:
+    """Server-Sent Events: a `hello` with the cursor the deltas continue from, then `delta` events.
 
-        plan_rows = conn.execute(
-            """
-            SELECT
-                p.step_seq,
-                d.desk_code,
-                d.desk_name,
-                p.step_reason,
-                p.required_flag
-            FROM ticket_desk_plan p
-            JOIN desks d ON d.desk_id = p.desk_id
-            WHERE p.ticket_id = ?
-            ORDER BY p.step_seq;
-            """,
-            (int(ticket["ticket_id"]),),
-        ).fetchall()
+    Each delta carries the ticket summaries (same shape as /api/tickets) and email
+    events (same shape as /api/events/recent) that changed since the previous one.
+    """
+    queue = change_feed.subscribe()
 
-        hop_rows = conn.execute(
-            """
-            SELECT
-                h.hop_seq,
-                df.desk_code AS from_desk_code,
-                df.desk_name AS from_desk_name,
-                dt.desk_code AS to_desk_code,
-                dt.desk_name AS to_desk_name,
-                h.hop_reason,
-                h.hopped_at,
-                a.agent_code,
-                a.full_name
-            FROM ticket_desk_hops h
-            LEFT JOIN desks df ON df.desk_id = h.from_desk_id
-            JOIN desks dt ON dt.desk_id = h.to_desk_id
-            LEFT JOIN agents a ON a.agent_id = h.hopped_by_agent_id
-            WHERE h.ticket_id = ?
-            ORDER BY h.hop_seq;
-            """,
-            (int(ticket["ticket_id"]),),
-        ).fetchall()
+    async def event_stream():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=STREAM_KEEPALIVE_SECONDS)
+                except TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                if item is None:
+                    break
+                event, data = item
+                event_id = ":".join(str(value) for value in data["cursor"].values())
+                yield _sse(event, data, event_id)
+        finally:
+            change_feed.unsubscribe(queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-        assignment_rows = conn.execute(
-            """
-            SELECT
-                ta.assignment_role,
-                ta.assignment_reason,
-                ta.assigned_at,
-                ta.released_at,
-                a.agent_code,
-                a.full_name,
-                a.email,
-                d.desk_code,
-                d.desk_name
-            FROM ticket_assignments ta
-            JOIN agents a ON a.agent_id = ta.assigned_agent_id
-            JOIN desks d ON d.desk_id = ta.assigned_desk_id
-            WHERE ta.ticket_id = ?
-            ORDER BY ta.assigned_at DESC;
-            """,
-            (int(ticket["ticket_id"]),),
-        ).fetchall()
 
-        message_rows = conn.execute(
-            """
-            SELECT
-                message_id,
-                direction,
-                sender_email,
-                recipient_email,
-                subject,
-                body,
-                sent_at,
-                is_automated,
-                delivery_status
-            FROM email_messages
-            WHERE ticket_id = ?
-            ORDER BY message_id ASC;
-            """,
-            (int(ticket["ticket_id"]),),
-        ).fetchall()
+@app.get("/api/tickets/{ticket_ref}")
+async def api_ticket_detail(ticket_ref: str) -> dict[str, Any]:
+    ref = ticket_ref.strip().upper()
+    detail = await db_reads.run(lambda conn: _build_ticket_detail(conn, ref))
+    if detail is None:
+        raise HTTPException(status_code=404, detail="ticket_not_found")
+    return detail
+
+
+def _build_ticket_detail(conn: sqlite3.Connection, ref: str) -> dict[str, Any] | None:
+    ticket = conn.execute(
+        """
+        SELECT
+            t.ticket_id,
+            t.ticket_ref,
+            t.status,
+            t.priority,
+            t.automatable,
+            t.requires_multi_desk,
+            t.requester_email,
+            t.subject,
+            t.body,
+            t.channel,
+            t.created_at,
+            t.first_response_at,
+            t.resolved_at,
+            t.closed_at,
+            CAST(MAX((julianday('now') - julianday(t.created_at)) * 1440.0, 0) AS INTEGER) AS age_minutes,
+            c.client_code,
+            c.client_name,
+            i.intent_code,
+            i.intent_name,
+            pd.desk_code AS primary_desk_code,
+            pd.desk_name AS primary_desk_name,
+            cd.desk_code AS current_desk_code,
+            cd.desk_name AS current_desk_name,
+            a.agent_code AS owner_agent_code,
+            a.full_name AS owner_agent_name,
+            a.email AS owner_agent_email
+        FROM tickets t
+        JOIN clients c ON c.client_id = t.client_id
+        JOIN intents i ON i.intent_id = t.intent_id
+        JOIN desks pd ON pd.desk_id = t.primary_desk_id
+        LEFT JOIN desks cd ON cd.desk_id = t.current_desk_id
+        LEFT JOIN agents a ON a.agent_id = t.owner_agent_id
+        WHERE t.ticket_ref = ?
+        LIMIT 1;
+        """,
+        (ref,),
+    ).fetchone()
+
+    if ticket is None:
+        return None
+
+    trace_rows = conn.execute(
+        """
+        SELECT
+            rt.step_seq,
+            rt.node_name,
+            rt.decision,
+            rt.rationale,
+            rt.actor_type,
+            rt.created_at,
+            a.agent_code,
+            a.full_name
+        FROM routing_trace rt
+        LEFT JOIN agents a ON a.agent_id = rt.decided_by_agent_id
+        WHERE rt.ticket_id = ?
+        ORDER BY rt.step_seq;
+        """,
+        (int(ticket["ticket_id"]),),
+    ).fetchall()
+
+    plan_rows = conn.execute(
+        """
+        SELECT
+            p.step_seq,
+            d.desk_code,
+            d.desk_name,
+            p.step_reason,
+            p.required_flag
+        FROM ticket_desk_plan p
+        JOIN desks d ON d.desk_id = p.desk_id
+        WHERE p.ticket_id = ?
+        ORDER BY p.step_seq;
+        """,
+        (int(ticket["ticket_id"]),),
+    ).fetchall()
+
+    hop_rows = conn.execute(
+        """
+        SELECT
+            h.hop_seq,
+            df.desk_code AS from_desk_code,
+            df.desk_name AS from_desk_name,
+            dt.desk_code AS to_desk_code,
+            dt.desk_name AS to_desk_name,
+            h.hop_reason,
+            h.hopped_at,
+            a.agent_code,
+            a.full_name
+        FROM ticket_desk_hops h
+        LEFT JOIN desks df ON df.desk_id = h.from_desk_id
+        JOIN desks dt ON dt.desk_id = h.to_desk_id
+        LEFT JOIN agents a ON a.agent_id = h.hopped_by_agent_id
+        WHERE h.ticket_id = ?
+        ORDER BY h.hop_seq;
+        """,
+        (int(ticket["ticket_id"]),),
+    ).fetchall()
+
+    assignment_rows = conn.execute(
+        """
+        SELECT
+            ta.assignment_role,
+            ta.assignment_reason,
+            ta.assigned_at,
+            ta.released_at,
+            a.agent_code,
+            a.full_name,
+            a.email,
+            d.desk_code,
+            d.desk_name
+        FROM ticket_assignments ta
+        JOIN agents a ON a.agent_id = ta.assigned_agent_id
+        JOIN desks d ON d.desk_id = ta.assigned_desk_id
+        WHERE ta.ticket_id = ?
+        ORDER BY ta.assigned_at DESC;
+        """,
+        (int(ticket["ticket_id"]),),
+    ).fetchall()
+
+    message_rows = conn.execute(
+        """
+        SELECT
+            message_id,
+            direction,
+            sender_email,
+            recipient_email,
+            subject,
+            body,
+            sent_at,
+            is_automated,
+            delivery_status
+        FROM email_messages
+        WHERE ticket_id = ?
+        ORDER BY message_id ASC;
+        """,
+        (int(ticket["ticket_id"]),),
+    ).fetchall()
 
     ticket_payload = {
         "ticket_ref": ticket["ticket_ref"],
@@ -613,7 +923,7 @@ def api_ticket_detail(ticket_ref: str) -> dict[str, Any]:
         "owner_agent_code": ticket["owner_agent_code"],
         "owner_agent_name": ticket["owner_agent_name"],
         "owner_agent_email": ticket["owner_agent_email"],
-        "age_minutes": _age_minutes(ticket["created_at"]),
+        "age_minutes": ticket["age_minutes"],
     }
 
     traces = [
@@ -1,4 +1,9 @@
 const REFRESH_MS = 3000;
+// With the live stream connected, a full reload only refreshes time-based figures (ages, last 15m).
+const STREAM_RESYNC_MS = 60000;
+const AGGREGATE_DEBOUNCE_MS = 500;
+const TICKET_LIMIT = 300;
+const MAX_PAGE_SIZE = 500;
 
 const state = {
   query: "",
@@ -6,10 +11,14 @@ const state = {
   desk: "",
   selectedTicketRef: null,
   tickets: [],
+  nextCursor: null,
+  events: [],
 };
 
 let searchDebounce = null;
 let refreshTimer = null;
+let aggregateTimer = null;
+let stream = null;
 
 const dom = {
   lastRefresh: document.getElementById("last-refresh"),
@@ -25,6 +34,7 @@ const dom = {
   filterStatus: document.getElementById("filter-status"),
   filterDesk: document.getElementById("filter-desk"),
   manualRefresh: document.getElementById("manual-refresh"),
+  loadMore: document.getElementById("load-more"),
   ticketCount: document.getElementById("ticket-count"),
   ticketsBody: document.getElementById("tickets-body"),
   desksList: document.getElementById("desks-list"),
@@ -94,19 +104,21 @@ function yesNoBadge(flag) {
 }
 
 async function fetchJson(path) {
-  const res = await fetch(path, { cache: "no-store" });
+  // "no-cache" revalidates with If-None-Match, so unchanged aggregates come back as 304.
+  const res = await fetch(path, { cache: "no-cache" });
   if (!res.ok) {
     throw new Error(`HTTP ${res.status} for ${path}`);
   }
   return res.json();
 }
 
-function buildTicketsUrl() {
+function buildTicketsUrl(cursor = null, limit = TICKET_LIMIT) {
   const params = new URLSearchParams();
-  params.set("limit", "300");
+  params.set("limit", String(limit));
   if (state.status) params.set("status", state.status);
   if (state.desk) params.set("desk", state.desk);
   if (state.query) params.set("query", state.query);
+  if (cursor) params.set("cursor", cursor);
   return `/api/tickets?${params.toString()}`;
 }
 
@@ -134,7 +146,9 @@ function renderDeskFilter(desks) {
 
 function renderTickets(data) {
   state.tickets = data.tickets || [];
-  dom.ticketCount.textContent = `${state.tickets.length} records`;
+  if (data.next_cursor !== undefined) state.nextCursor = data.next_cursor;
+  dom.ticketCount.textContent = `${state.tickets.length}${state.nextCursor ? "+" : ""} records`;
+  dom.loadMore.hidden = !state.nextCursor;
 
   if (!state.tickets.length) {
     dom.ticketsBody.innerHTML = '<tr><td colspan="8"><p class="empty">No tickets match the current filter.</p></td></tr>';
@@ -217,6 +231,7 @@ function renderAgents(data) {
 
 function renderEvents(data) {
   const events = data.events || [];
+  state.events = events;
   if (!events.length) {
     dom.eventsList.innerHTML = '<li class="stat-item"><p class="empty">No recent exchanges.</p></li>';
     return;
@@ -389,7 +404,8 @@ async function refreshDashboard(refreshDetail = true) {
   try {
     const [overview, tickets, desks, agents, events] = await Promise.all([
       fetchJson("/api/overview"),
-      fetchJson(buildTicketsUrl()),
+      // Reload as many rows as are on screen, so "Load more" pages survive a refresh.
+      fetchJson(buildTicketsUrl(null, Math.min(Math.max(TICKET_LIMIT, state.tickets.length), MAX_PAGE_SIZE))),
       fetchJson("/api/desks/summary"),
       fetchJson("/api/agents/load"),
       fetchJson("/api/events/recent?limit=25"),
@@ -415,15 +431,133 @@ async function refreshDashboard(refreshDetail = true) {
   }
 }
 
+async function loadMoreTickets() {
+  if (!state.nextCursor) return;
+  try {
+    const page = await fetchJson(buildTicketsUrl(state.nextCursor));
+    const known = new Set(state.tickets.map((t) => t.ticket_ref));
+    const extra = (page.tickets || []).filter((t) => !known.has(t.ticket_ref));
+    renderTickets({ tickets: [...state.tickets, ...extra], next_cursor: page.next_cursor });
+  } catch (error) {
+    console.error("Failed to load more tickets", error);
+  }
+}
+
+async function refreshAggregates() {
+  try {
+    const [overview, desks, agents] = await Promise.all([
+      fetchJson("/api/overview"),
+      fetchJson("/api/desks/summary"),
+      fetchJson("/api/agents/load"),
+    ]);
+    renderOverview(overview);
+    renderDesks(desks);
+    renderAgents(agents);
+  } catch (error) {
+    console.error("Aggregate refresh failed", error);
+  }
+}
+
+function scheduleAggregates() {
+  if (aggregateTimer) return;
+  aggregateTimer = setTimeout(() => {
+    aggregateTimer = null;
+    refreshAggregates();
+  }, AGGREGATE_DEBOUNCE_MS);
+}
+
+function ticketMatchesFilters(ticket) {
+  if (state.status && ticket.status !== state.status) return false;
+  if (state.desk && ticket.current_desk_code !== state.desk) return false;
+  return true;
+}
+
+function applyTicketDelta(changed) {
+  const byRef = new Map(changed.map((t) => [t.ticket_ref, t]));
+  const kept = [];
+  for (const ticket of state.tickets) {
+    const update = byRef.get(ticket.ticket_ref);
+    if (!update) {
+      kept.push(ticket);
+    } else if (ticketMatchesFilters(update)) {
+      kept.push(update);
+    }
+    byRef.delete(ticket.ticket_ref);
+  }
+  // Whatever is left is new to this view. Only the plain list is newest-first;
+  // search results are ranked, so new matches wait for the next reload.
+  const added = state.query ? [] : [...byRef.values()].filter(ticketMatchesFilters);
+  renderTickets({ tickets: [...added, ...kept] });
+}
+
+function applyDelta(delta) {
+  if (delta.resync) {
+    refreshDashboard(true);
+    return;
+  }
+
+  const tickets = delta.tickets || [];
+  if (tickets.length) {
+    applyTicketDelta(tickets);
+    if (state.selectedTicketRef && tickets.some((t) => t.ticket_ref === state.selectedTicketRef)) {
+      loadDetail(state.selectedTicketRef, true);
+    }
+  }
+
+  const events = delta.events || [];
+  if (events.length) {
+    // Delivery updates resend an event already on screen: replace it rather than add a copy.
+    const changed = new Set(events.map((e) => e.message_id));
+    const merged = [...events, ...state.events.filter((e) => !changed.has(e.message_id))];
+    merged.sort((a, b) => b.message_id - a.message_id);
+    renderEvents({ events: merged.slice(0, 25) });
+  }
+
+  scheduleAggregates();
+  dom.lastRefresh.textContent = `${new Date().toLocaleTimeString()} (live)`;
+}
+
+function startPolling(intervalMs) {
+  if (refreshTimer) clearInterval(refreshTimer);
+  refreshTimer = setInterval(() => {
+    refreshDashboard(true);
+  }, intervalMs);
+}
+
+function connectStream() {
+  if (!window.EventSource) {
+    startPolling(REFRESH_MS);
+    return;
+  }
+
+  stream = new EventSource("/api/stream");
+  stream.addEventListener("hello", () => {
+    // (Re)connected: reload once to cover anything missed, then rely on deltas.
+    startPolling(STREAM_RESYNC_MS);
+    refreshDashboard(true);
+  });
+  stream.addEventListener("delta", (event) => {
+    applyDelta(JSON.parse(event.data));
+  });
+  stream.addEventListener("error", () => {
+    // EventSource retries on its own; poll at the old rate until it is back.
+    startPolling(REFRESH_MS);
+    dom.lastRefresh.textContent = "Live updates reconnecting...";
+  });
+}
+
 function onFiltersChanged() {
   state.query = dom.filterQuery.value.trim();
   state.status = dom.filterStatus.value;
   state.desk = dom.filterDesk.value;
+  state.tickets = [];
+  state.nextCursor = null;
   refreshDashboard(false);
 }
 
 function bindEvents() {
   dom.manualRefresh.addEventListener("click", () => refreshDashboard(true));
+  dom.loadMore.addEventListener("click", loadMoreTickets);
 
   dom.filterStatus.addEventListener("change", onFiltersChanged);
   dom.filterDesk.addEventListener("change", onFiltersChanged);
@@ -449,13 +583,11 @@ function bindEvents() {
 async function init() {
   bindEvents();
   await refreshDashboard(true);
-
-  refreshTimer = setInterval(() => {
-    refreshDashboard(true);
-  }, REFRESH_MS);
+  connectStream();
 
   window.addEventListener("beforeunload", () => {
     if (refreshTimer) clearInterval(refreshTimer);
+    if (stream) stream.close();
   });
 }
 
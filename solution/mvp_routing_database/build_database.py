@@ -1194,6 +1194,42 @@ def run_checks(conn: sqlite3.Connection) -> dict[str, int]:
             WHERE m.ticket_id IS NULL;
             """,
         ),
+        (
+            "consistent current-state",
+            """
+            SELECT COUNT(*)
+            FROM tickets t
+            WHERE t.hop_count != (SELECT COUNT(*) FROM ticket_desk_hops h WHERE h.ticket_id = t.ticket_id)
+               OR t.trace_count != (SELECT COUNT(*) FROM routing_trace rt WHERE rt.ticket_id = t.ticket_id)
+               OR t.current_desk_id != COALESCE(
+                    (SELECT h.to_desk_id FROM ticket_desk_hops h WHERE h.ticket_id = t.ticket_id
+                     ORDER BY h.hop_seq DESC LIMIT 1),
+                    t.primary_desk_id
+               )
+               OR t.last_event_at != MAX(
+                    t.created_at,
+                    COALESCE((SELECT MAX(rt.created_at) FROM routing_trace rt WHERE rt.ticket_id = t.ticket_id), ''),
+                    COALESCE((SELECT MAX(m.sent_at) FROM email_messages m WHERE m.ticket_id = t.ticket_id), '')
+               );
+            """,
+        ),
+        (
+            "consistent ticket_search",
+            """
+            SELECT COUNT(*)
+            FROM tickets t
+            JOIN clients c ON c.client_id = t.client_id
+            JOIN intents i ON i.intent_id = t.intent_id
+            LEFT JOIN ticket_search s ON s.rowid = t.ticket_id
+            WHERE s.rowid IS NULL
+               OR s.ticket_ref != t.ticket_ref
+               OR s.subject != t.subject
+               OR s.body != t.body
+               OR s.client_name != c.client_name
+               OR s.requester_email != t.requester_email
+               OR s.intent_code != i.intent_code;
+            """,
+        ),
     ]
     for label, sql in checks:
         missing = int(conn.execute(sql).fetchone()[0])
@@ -1279,6 +1315,8 @@ def main() -> None:
         counts = run_checks(conn)
         write_summary(conn, counts)
         conn.commit()
+        # Persistent on the file: dashboard readers never block the routing writer.
+        conn.execute("PRAGMA journal_mode = WAL;")
     finally:
         conn.close()
 
@@ -30,6 +30,15 @@ CREATE TABLE clients (
     FOREIGN KEY (primary_desk_id) REFERENCES desks(desk_id)
 );
 
+-- One-row counter bumped on every change to `clients`; the router's client cache
+-- compares it on each lookup and drops its entries when it moves.
+CREATE TABLE clients_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL
+);
+
+INSERT INTO clients_version (id, version) VALUES (1, 0);
+
 CREATE TABLE cash_accounts (
     cash_account_id INTEGER PRIMARY KEY,
     account_number TEXT NOT NULL UNIQUE,
@@ -58,7 +67,7 @@ CREATE TABLE positions (
 
 CREATE TABLE trades (
     trade_id INTEGER PRIMARY KEY,
-    trade_ref TEXT NOT NULL UNIQUE,
+    trade_ref TEXT NOT NULL UNIQUE CHECK (trade_ref = upper(trade_ref)),
     client_id INTEGER NOT NULL,
     position_id INTEGER,
     symbol TEXT NOT NULL,
@@ -115,6 +124,11 @@ CREATE TABLE tickets (
     resolved_at TEXT,
     closed_at TEXT,
     client_satisfied INTEGER CHECK (client_satisfied IN (0, 1)),
+    -- Current-state columns maintained by the trg_tickets_* / trg_*_ticket_state triggers below.
+    current_desk_id INTEGER,
+    last_event_at TEXT,
+    hop_count INTEGER NOT NULL DEFAULT 0,
+    trace_count INTEGER NOT NULL DEFAULT 0,
     CHECK (first_response_at IS NULL OR first_response_at >= created_at),
     CHECK (
         (status IN ('OPEN', 'IN_PROGRESS', 'WAITING_CLIENT', 'ESCALATED') AND resolved_at IS NULL AND closed_at IS NULL)
@@ -125,7 +139,8 @@ CREATE TABLE tickets (
     FOREIGN KEY (trade_id) REFERENCES trades(trade_id),
     FOREIGN KEY (intent_id) REFERENCES intents(intent_id),
     FOREIGN KEY (primary_desk_id) REFERENCES desks(desk_id),
-    FOREIGN KEY (owner_agent_id) REFERENCES agents(agent_id)
+    FOREIGN KEY (owner_agent_id) REFERENCES agents(agent_id),
+    FOREIGN KEY (current_desk_id) REFERENCES desks(desk_id)
 );
 
 CREATE TABLE ticket_assignments (
@@ -197,15 +212,22 @@ CREATE TABLE email_messages (
     is_automated INTEGER NOT NULL CHECK (is_automated IN (0, 1)),
     delivery_status TEXT NOT NULL CHECK (delivery_status IN ('QUEUED', 'SENT', 'FAILED')),
     related_trace_id INTEGER,
+    -- Bumped to MAX + 1 on every in-place delivery_status change (NULL until the first one),
+    -- so readers can find updated rows the same way they find new ones by message_id.
+    delivery_seq INTEGER,
     FOREIGN KEY (ticket_id) REFERENCES tickets(ticket_id),
     FOREIGN KEY (related_trace_id) REFERENCES routing_trace(trace_id)
 );
 
 CREATE INDEX idx_agents_desk_id ON agents(desk_id);
 CREATE INDEX idx_clients_primary_desk_id ON clients(primary_desk_id);
-CREATE INDEX idx_cash_accounts_client_id ON cash_accounts(client_id);
-CREATE INDEX idx_positions_client_id ON positions(client_id);
-CREATE INDEX idx_trades_client_id ON trades(client_id);
+CREATE INDEX idx_clients_email_lower ON clients(lower(email));
+-- Direct-data answers: each snapshot is one seek on a covering index, already in output order.
+CREATE INDEX idx_cash_accounts_client_balance
+    ON cash_accounts(client_id, cash_balance DESC, account_number, currency, available_cash, held_cash);
+CREATE INDEX idx_positions_client_market_value
+    ON positions(client_id, market_value DESC, symbol, asset_class, quantity, market_price, as_of_date);
+CREATE INDEX idx_trades_client_submitted ON trades(client_id, submitted_at DESC, trade_id DESC);
 CREATE INDEX idx_trades_status ON trades(trade_status);
 CREATE INDEX idx_tickets_status ON tickets(status);
 CREATE INDEX idx_tickets_owner_agent ON tickets(owner_agent_id);
@@ -216,6 +238,117 @@ CREATE INDEX idx_ticket_desk_plan_ticket_id ON ticket_desk_plan(ticket_id);
 CREATE INDEX idx_ticket_desk_hops_ticket_id ON ticket_desk_hops(ticket_id);
 CREATE INDEX idx_routing_trace_ticket_id ON routing_trace(ticket_id);
 CREATE INDEX idx_email_messages_ticket_id ON email_messages(ticket_id);
+CREATE INDEX idx_email_messages_delivery_seq ON email_messages(delivery_seq);
+CREATE INDEX idx_tickets_current_desk_status ON tickets(current_desk_id, status);
+CREATE INDEX idx_tickets_last_event_at ON tickets(last_event_at);
+
+-- Ticket current state: the desk of the latest hop (primary desk until the first hop),
+-- the latest event time across the ticket, its traces and emails, and hop/trace counts.
+CREATE TRIGGER trg_tickets_init_state
+AFTER INSERT ON tickets
+WHEN NEW.current_desk_id IS NULL OR NEW.last_event_at IS NULL
+BEGIN
+    UPDATE tickets
+    SET current_desk_id = COALESCE(current_desk_id, primary_desk_id),
+        last_event_at = COALESCE(last_event_at, created_at)
+    WHERE ticket_id = NEW.ticket_id;
+END;
+
+CREATE TRIGGER trg_hops_ticket_state
+AFTER INSERT ON ticket_desk_hops
+BEGIN
+    UPDATE tickets
+    SET hop_count = hop_count + 1,
+        current_desk_id = (
+            SELECT h.to_desk_id
+            FROM ticket_desk_hops h
+            WHERE h.ticket_id = NEW.ticket_id
+            ORDER BY h.hop_seq DESC
+            LIMIT 1
+        )
+    WHERE ticket_id = NEW.ticket_id;
+END;
+
+CREATE TRIGGER trg_trace_ticket_state
+AFTER INSERT ON routing_trace
+BEGIN
+    UPDATE tickets
+    SET trace_count = trace_count + 1,
+        last_event_at = MAX(COALESCE(last_event_at, ''), NEW.created_at)
+    WHERE ticket_id = NEW.ticket_id;
+END;
+
+CREATE TRIGGER trg_email_ticket_state
+AFTER INSERT ON email_messages
+BEGIN
+    UPDATE tickets
+    SET last_event_at = MAX(COALESCE(last_event_at, ''), NEW.sent_at)
+    WHERE ticket_id = NEW.ticket_id;
+END;
+
+-- Full-text index for the dashboard ticket search, keyed by rowid = tickets.ticket_id.
+-- Client names are denormalized here, so a client rename also rewrites its rows.
+CREATE VIRTUAL TABLE ticket_search USING fts5(
+    ticket_ref,
+    subject,
+    body,
+    client_name,
+    requester_email,
+    intent_code,
+    tokenize = 'unicode61',
+    prefix = '2 3'
+);
+
+CREATE TRIGGER trg_tickets_search_insert
+AFTER INSERT ON tickets
+BEGIN
+    INSERT INTO ticket_search (rowid, ticket_ref, subject, body, client_name, requester_email, intent_code)
+    SELECT NEW.ticket_id, NEW.ticket_ref, NEW.subject, NEW.body, c.client_name, NEW.requester_email, i.intent_code
+    FROM clients c, intents i
+    WHERE c.client_id = NEW.client_id AND i.intent_id = NEW.intent_id;
+END;
+
+CREATE TRIGGER trg_tickets_search_update
+AFTER UPDATE OF ticket_ref, subject, body, requester_email, client_id, intent_id ON tickets
+BEGIN
+    DELETE FROM ticket_search WHERE rowid = OLD.ticket_id;
+    INSERT INTO ticket_search (rowid, ticket_ref, subject, body, client_name, requester_email, intent_code)
+    SELECT NEW.ticket_id, NEW.ticket_ref, NEW.subject, NEW.body, c.client_name, NEW.requester_email, i.intent_code
+    FROM clients c, intents i
+    WHERE c.client_id = NEW.client_id AND i.intent_id = NEW.intent_id;
+END;
+
+CREATE TRIGGER trg_tickets_search_delete
+AFTER DELETE ON tickets
+BEGIN
+    DELETE FROM ticket_search WHERE rowid = OLD.ticket_id;
+END;
+
+CREATE TRIGGER trg_clients_search_rename
+AFTER UPDATE OF client_name ON clients
+BEGIN
+    UPDATE ticket_search
+    SET client_name = NEW.client_name
+    WHERE rowid IN (SELECT ticket_id FROM tickets WHERE client_id = NEW.client_id);
+END;
+
+CREATE TRIGGER trg_clients_version_insert
+AFTER INSERT ON clients
+BEGIN
+    UPDATE clients_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER trg_clients_version_update
+AFTER UPDATE ON clients
+BEGIN
+    UPDATE clients_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER trg_clients_version_delete
+AFTER DELETE ON clients
+BEGIN
+    UPDATE clients_version SET version = version + 1 WHERE id = 1;
+END;
 
 CREATE VIEW v_agent_open_load AS
 SELECT
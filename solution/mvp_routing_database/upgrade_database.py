@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""Apply schema additions to an existing routing DB without rebuilding it.
+
+`build_database.py` recreates the DB from `schema.sql`; this script brings a DB
+built from an older schema up to date in place. Every step is idempotent.
+"""
+from __future__ import annotations
+
+import argparse
+import sqlite3
+from pathlib import Path
+
+
+BASE_DIR = Path(__file__).resolve().parent
+DB_PATH = BASE_DIR / "mvp_routing.db"
+
+# (table, column, definition) added with ALTER TABLE when missing.
+COLUMN_ADDITIONS: list[tuple[str, str, str]] = [
+    ("tickets", "current_desk_id", "INTEGER REFERENCES desks(desk_id)"),
+    ("tickets", "last_event_at", "TEXT"),
+    ("tickets", "hop_count", "INTEGER NOT NULL DEFAULT 0"),
+    ("tickets", "trace_count", "INTEGER NOT NULL DEFAULT 0"),
+    ("email_messages", "delivery_seq", "INTEGER"),
+]
+
+UPGRADE_STATEMENTS: list[tuple[str, str]] = [
+    (
+        "clients_version",
+        """
+        CREATE TABLE IF NOT EXISTS clients_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        );
+        """,
+    ),
+    ("clients_version row", "INSERT OR IGNORE INTO clients_version (id, version) VALUES (1, 0);"),
+    (
+        "trg_clients_version_insert",
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_clients_version_insert
+        AFTER INSERT ON clients
+        BEGIN
+            UPDATE clients_version SET version = version + 1 WHERE id = 1;
+        END;
+        """,
+    ),
+    (
+        "trg_clients_version_update",
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_clients_version_update
+        AFTER UPDATE ON clients
+        BEGIN
+            UPDATE clients_version SET version = version + 1 WHERE id = 1;
+        END;
+        """,
+    ),
+    (
+        "trg_clients_version_delete",
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_clients_version_delete
+        AFTER DELETE ON clients
+        BEGIN
+            UPDATE clients_version SET version = version + 1 WHERE id = 1;
+        END;
+        """,
+    ),
+    (
+        "idx_clients_email_lower",
+        "CREATE INDEX IF NOT EXISTS idx_clients_email_lower ON clients(lower(email));",
+    ),
+    (
+        "trades_trade_ref_upper",
+        "UPDATE trades SET trade_ref = upper(trade_ref) WHERE trade_ref != upper(trade_ref);",
+    ),
+    (
+        "idx_cash_accounts_client_balance",
+        """
+        CREATE INDEX IF NOT EXISTS idx_cash_accounts_client_balance
+            ON cash_accounts(client_id, cash_balance DESC, account_number, currency, available_cash, held_cash);
+        """,
+    ),
+    (
+        "idx_positions_client_market_value",
+        """
+        CREATE INDEX IF NOT EXISTS idx_positions_client_market_value
+            ON positions(client_id, market_value DESC, symbol, asset_class, quantity, market_price, as_of_date);
+        """,
+    ),
+    (
+        "idx_trades_client_submitted",
+        "CREATE INDEX IF NOT EXISTS idx_trades_client_submitted ON trades(client_id, submitted_at DESC, trade_id DESC);",
+    ),
+    # Superseded by the composite indexes above (same leading column).
+    ("drop idx_cash_accounts_client_id", "DROP INDEX IF EXISTS idx_cash_accounts_client_id;"),
+    ("drop idx_positions_client_id", "DROP INDEX IF EXISTS idx_positions_client_id;"),
+    ("drop idx_trades_client_id", "DROP INDEX IF EXISTS idx_trades_client_id;"),
+    (
+        "tickets current-state backfill",
+        """
+        UPDATE tickets
+        SET hop_count = (SELECT COUNT(*) FROM ticket_desk_hops h WHERE h.ticket_id = tickets.ticket_id),
+            trace_count = (SELECT COUNT(*) FROM routing_trace rt WHERE rt.ticket_id = tickets.ticket_id),
+            current_desk_id = COALESCE(
+                (
+                    SELECT h.to_desk_id
+                    FROM ticket_desk_hops h
+                    WHERE h.ticket_id = tickets.ticket_id
+                    ORDER BY h.hop_seq DESC
+                    LIMIT 1
+                ),
+                primary_desk_id
+            ),
+            last_event_at = MAX(
+                created_at,
+                COALESCE((SELECT MAX(rt.created_at) FROM routing_trace rt WHERE rt.ticket_id = tickets.ticket_id), ''),
+                COALESCE((SELECT MAX(m.sent_at) FROM email_messages m WHERE m.ticket_id = tickets.ticket_id), '')
+            )
+        WHERE current_desk_id IS NULL OR last_event_at IS NULL;
+        """,
+    ),
+    (
+        "idx_tickets_current_desk_status",
+        "CREATE INDEX IF NOT EXISTS idx_tickets_current_desk_status ON tickets(current_desk_id, status);",
+    ),
+    (
+        "idx_tickets_last_event_at",
+        "CREATE INDEX IF NOT EXISTS idx_tickets_last_event_at ON tickets(last_event_at);",
+    ),
+    (
+        "idx_email_messages_delivery_seq",
+        "CREATE INDEX IF NOT EXISTS idx_email_messages_delivery_seq ON email_messages(delivery_seq);",
+    ),
+    (
+        "trg_tickets_init_state",
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_tickets_init_state
+        AFTER INSERT ON tickets
+        WHEN NEW.current_desk_id IS NULL OR NEW.last_event_at IS NULL
+        BEGIN
+            UPDATE tickets
+            SET current_desk_id = COALESCE(current_desk_id, primary_desk_id),
+                last_event_at = COALESCE(last_event_at, created_at)
+            WHERE ticket_id = NEW.ticket_id;
+        END;
+        """,
+    ),
+    (
+        "trg_hops_ticket_state",
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_hops_ticket_state
+        AFTER INSERT ON ticket_desk_hops
+        BEGIN
+            UPDATE tickets
+            SET hop_count = hop_count + 1,
+                current_desk_id = (
+                    SELECT h.to_desk_id
+                    FROM ticket_desk_hops h
+                    WHERE h.ticket_id = NEW.ticket_id
+                    ORDER BY h.hop_seq DESC
+                    LIMIT 1
+                )
+            WHERE ticket_id = NEW.ticket_id;
+        END;
+        """,
+    ),
+    (
+        "trg_trace_ticket_state",
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_trace_ticket_state
+        AFTER INSERT ON routing_trace
+        BEGIN
+            UPDATE tickets
+            SET trace_count = trace_count + 1,
+                last_event_at = MAX(COALESCE(last_event_at, ''), NEW.created_at)
+            WHERE ticket_id = NEW.ticket_id;
+        END;
+        """,
+    ),
+    (
+        "trg_email_ticket_state",
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_email_ticket_state
+        AFTER INSERT ON email_messages
+        BEGIN
+            UPDATE tickets
+            SET last_event_at = MAX(COALESCE(last_event_at, ''), NEW.sent_at)
+            WHERE ticket_id = NEW.ticket_id;
+        END;
+        """,
+    ),
+    (
+        "ticket_search",
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS ticket_search USING fts5(
+            ticket_ref,
+            subject,
+            body,
+            client_name,
+            requester_email,
+            intent_code,
+            tokenize = 'unicode61',
+            prefix = '2 3'
+        );
+        """,
+    ),
+    # Re-index from scratch: cheap at this size and makes the step idempotent.
+    ("ticket_search clear", "DELETE FROM ticket_search;"),
+    (
+        "ticket_search backfill",
+        """
+        INSERT INTO ticket_search (rowid, ticket_ref, subject, body, client_name, requester_email, intent_code)
+        SELECT t.ticket_id, t.ticket_ref, t.subject, t.body, c.client_name, t.requester_email, i.intent_code
+        FROM tickets t
+        JOIN clients c ON c.client_id = t.client_id
+        JOIN intents i ON i.intent_id = t.intent_id;
+        """,
+    ),
+    (
+        "trg_tickets_search_insert",
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_tickets_search_insert
+        AFTER INSERT ON tickets
+        BEGIN
+            INSERT INTO ticket_search (rowid, ticket_ref, subject, body, client_name, requester_email, intent_code)
+            SELECT NEW.ticket_id, NEW.ticket_ref, NEW.subject, NEW.body, c.client_name, NEW.requester_email, i.intent_code
+            FROM clients c, intents i
+            WHERE c.client_id = NEW.client_id AND i.intent_id = NEW.intent_id;
+        END;
+        """,
+    ),
+    (
+        "trg_tickets_search_update",
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_tickets_search_update
+        AFTER UPDATE OF ticket_ref, subject, body, requester_email, client_id, intent_id ON tickets
+        BEGIN
+            DELETE FROM ticket_search WHERE rowid = OLD.ticket_id;
+            INSERT INTO ticket_search (rowid, ticket_ref, subject, body, client_name, requester_email, intent_code)
+            SELECT NEW.ticket_id, NEW.ticket_ref, NEW.subject, NEW.body, c.client_name, NEW.requester_email, i.intent_code
+            FROM clients c, intents i
+            WHERE c.client_id = NEW.client_id AND i.intent_id = NEW.intent_id;
+        END;
+        """,
+    ),
+    (
+        "trg_tickets_search_delete",
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_tickets_search_delete
+        AFTER DELETE ON tickets
+        BEGIN
+            DELETE FROM ticket_search WHERE rowid = OLD.ticket_id;
+        END;
+        """,
+    ),
+    (
+        "trg_clients_search_rename",
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_clients_search_rename
+        AFTER UPDATE OF client_name ON clients
+        BEGIN
+            UPDATE ticket_search
+            SET client_name = NEW.client_name
+            WHERE rowid IN (SELECT ticket_id FROM tickets WHERE client_id = NEW.client_id);
+        END;
+        """,
+    ),
+]
+
+
+def _add_missing_columns(conn: sqlite3.Connection) -> list[str]:
+    added: list[str] = []
+    for table, column, definition in COLUMN_ADDITIONS:
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table});")}
+        if column not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition};")
+            added.append(f"{table}.{column}")
+    return added
+
+
+def upgrade(conn: sqlite3.Connection) -> list[str]:
+    applied = _add_missing_columns(conn)
+    for name, statement in UPGRADE_STATEMENTS:
+        conn.execute(statement)
+        applied.append(name)
+    conn.commit()
+    return applied
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Upgrade an existing MVP routing DB in place")
+    parser.add_argument("--db-path", default=str(DB_PATH))
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    db_path = Path(args.db_path).expanduser()
+    if not db_path.exists():
+        raise SystemExit(f"DB not found: {db_path}")
+
+    conn = sqlite3.connect(db_path)
+    try:
+        applied = upgrade(conn)
+    finally:
+        conn.close()
+    print(f"Upgraded {db_path}: {', '.join(applied)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,32 @@
 from __future__ import annotations
 
-from fastapi import FastAPI, HTTPException
+from functools import lru_cache
 
-from mvp_agent import InboundMessage, RoutingOutput, RoutingService, load_settings
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
 
+from mvp_agent import (
+    DeliveryReport,
+    InboundBatchRequest,
+    InboundBatchResponse,
+    InboundMessage,
+    RoutingOutput,
+    RoutingService,
+    WriteQueueFullError,
+    load_settings,
+)
 
-settings = load_settings()
-service = RoutingService(settings)
 
 app = FastAPI(title="OpenAI Agents Routing MVP", version="1.0.0")
 
 
+@lru_cache(maxsize=1)
+def get_service() -> RoutingService:
+    # Built on first use rather than at import, so importing the app (tests, tooling,
+    # `uvicorn --reload` parent) does not load settings or touch the DB.
+    return RoutingService(load_settings())
+
+
 @app.get("/health")
 def health() -> dict[str, str]:
     return {"status": "ok"}
@@ -18,12 +34,48 @@ def health() -> dict[str, str]:
 
 @app.post("/inbound", response_model=RoutingOutput)
 def inbound(payload: InboundMessage) -> RoutingOutput:
-    return service.process_inbound(payload)
+    try:
+        return get_service().process_inbound(payload)
+    except WriteQueueFullError as exc:
+        raise HTTPException(status_code=503, detail=f"write_queue_full: {exc}") from exc
+
+
+@app.post("/inbound/batch", response_model=InboundBatchResponse)
+def inbound_batch(payload: InboundBatchRequest) -> InboundBatchResponse:
+    try:
+        results, timings_ms = get_service().process_inbound_batch_timed(payload.messages)
+    except WriteQueueFullError as exc:
+        raise HTTPException(status_code=503, detail=f"write_queue_full: {exc}") from exc
+    return InboundBatchResponse(
+        count=len(results),
+        ok_count=sum(1 for result in results if result.ok),
+        results=results,
+        timings_ms=timings_ms,
+    )
+
+
+@app.post("/delivery")
+def delivery(payload: DeliveryReport) -> dict[str, int]:
+    try:
+        updated = get_service().record_delivery(payload.updates)
+    except WriteQueueFullError as exc:
+        raise HTTPException(status_code=503, detail=f"write_queue_full: {exc}") from exc
+    return {"updated": updated}
+
+
+@app.get("/writer/stats")
+def writer_stats() -> dict:
+    return get_service().writer_stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> PlainTextResponse:
+    return PlainTextResponse(get_service().metrics_text(), media_type="text/plain; version=0.0.4")
 
 
 @app.get("/ticket/{ticket_ref}")
 def ticket_status(ticket_ref: str) -> dict:
-    snapshot = service.get_ticket_status(ticket_ref)
+    snapshot = get_service().get_ticket_status(ticket_ref)
     if snapshot is None:
         raise HTTPException(status_code=404, detail="ticket_not_found")
     return snapshot
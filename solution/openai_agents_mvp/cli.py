@@ -5,13 +5,20 @@ import argparse
 import base64
 import json
 import sys
+from dataclasses import replace
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from mvp_agent import InboundMessage, RoutingService, load_settings
+from mvp_agent.config import load_settings
+
+if TYPE_CHECKING:
+    from mvp_agent import InboundMessage, Settings
 
 
 
 def _parse_payload(args: argparse.Namespace) -> InboundMessage:
+    from mvp_agent import InboundMessage
+
     if args.payload_b64:
         decoded = base64.b64decode(args.payload_b64.encode("utf-8")).decode("utf-8")
         payload = json.loads(decoded)
@@ -36,6 +43,35 @@ def _parse_payload(args: argparse.Namespace) -> InboundMessage:
 
 
 
+def _serve_stdio(settings: Settings) -> None:
+    """Long-running mode: one warm RoutingService for every line on stdin.
+
+    Output lines are written in input order and flushed per message, so a shell
+    pipeline can read each reply as soon as it is routed. A bad line yields an
+    error line instead of stopping the loop.
+    """
+    from pydantic import ValidationError
+
+    from mvp_agent import InboundMessage, RoutingService
+
+    service = RoutingService(settings)
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            payload = InboundMessage.model_validate_json(line)
+        except ValidationError as exc:
+            output = json.dumps({"ok": False, "error": "invalid_payload", "detail": str(exc)})
+        else:
+            try:
+                output = service.process_inbound(payload).model_dump_json()
+            except Exception as exc:
+                output = json.dumps({"ok": False, "error": "runtime_error", "detail": str(exc)})
+        sys.stdout.write(output + "\n")
+        sys.stdout.flush()
+
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="OpenAI Agents + SQLite routing MVP")
 
@@ -50,6 +86,12 @@ def build_parser() -> argparse.ArgumentParser:
     inbound.add_argument("--message-id")
     inbound.add_argument("--channel", default="EMAIL")
 
+    serve = sub.add_parser(
+        "serve-stdio",
+        help="Route newline-delimited JSON InboundMessages from stdin, one RoutingOutput JSON line each on stdout",
+    )
+    serve.add_argument("--db-path", help="Override DB path")
+
     status = sub.add_parser("status", help="Fetch ticket status and decision path")
     status.add_argument("--db-path", help="Override DB path")
     status.add_argument("--ticket-ref", required=True)
@@ -64,26 +106,28 @@ def main() -> None:
 
     settings = load_settings()
     if args.db_path:
-        settings = settings.__class__(
-            db_path=Path(args.db_path).expanduser(),
-            prompt_path=settings.prompt_path,
-            openai_api_key=settings.openai_api_key,
-            model=settings.model,
-            reasoning_effort=settings.reasoning_effort,
-            sender_email=settings.sender_email,
-        )
-
-    service = RoutingService(settings)
+        settings = replace(settings, db_path=Path(args.db_path).expanduser())
 
     try:
         if args.command == "inbound":
+            from mvp_agent import RoutingService
+
             payload = _parse_payload(args)
-            result = service.process_inbound(payload)
+            result = RoutingService(settings).process_inbound(payload)
             print(result.model_dump_json())
             return
 
+        if args.command == "serve-stdio":
+            _serve_stdio(settings)
+            return
+
         if args.command == "status":
-            snapshot = service.get_ticket_status(args.ticket_ref)
+            # Fast path: plain sqlite3 only, no pydantic models, service or agents SDK.
+            from mvp_agent.db import connect
+            from mvp_agent.ticket_status import fetch_ticket_status
+
+            with connect(settings.db_path) as conn:
+                snapshot = fetch_ticket_status(conn, args.ticket_ref)
             if snapshot is None:
                 print(json.dumps({"ok": False, "error": "ticket_not_found"}))
                 sys.exit(1)
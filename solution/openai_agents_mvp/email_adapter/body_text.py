@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import base64
+import codecs
+import re
+from collections.abc import Callable, Iterable, Iterator
+from html.parser import HTMLParser
+from typing import Any
+
+
+# Raw HTML decoded for one body at most; signatures and trackers beyond this never reach the parser.
+HTML_MAX_BYTES = 2_000_000
+# Base64 characters decoded and parsed per step (a multiple of 4).
+_FEED_CHUNK = 16_384
+_CHARSET_RE = re.compile(r"charset\s*=\s*\"?([\w.:-]+)", re.IGNORECASE)
+_SKIP_TAGS = {"script", "style", "head", "title", "noscript", "template"}
+
+
+def decode_b64url(data: str | None, max_bytes: int | None = None, charset: str = "utf-8") -> str:
+    """Decode Gmail's base64url body data, only as far as `max_bytes` of content."""
+    if not data:
+        return ""
+    truncated = False
+    if max_bytes is not None:
+        max_chars = -(-max_bytes // 3) * 4
+        if len(data) > max_chars:
+            data = data[:max_chars]
+            truncated = True
+    padding = "=" * ((4 - len(data) % 4) % 4)
+    try:
+        raw = base64.urlsafe_b64decode(data + padding)
+    except Exception:
+        return ""
+    text = raw.decode(_known_charset(charset), errors="replace")
+    # A cut can split a multi-byte character; drop the replacement it leaves behind.
+    return text.rstrip("\ufffd") if truncated else text
+
+
+def _known_charset(charset: str) -> str:
+    try:
+        codecs.lookup(charset)
+    except LookupError:
+        return "utf-8"
+    return charset
+
+
+def _iter_b64url_text(data: str, max_bytes: int, charset: str = "utf-8") -> Iterator[str]:
+    """Decode base64url data chunk by chunk, so a consumer that stops early never decodes the rest."""
+    decoder = codecs.getincrementaldecoder(_known_charset(charset))(errors="replace")
+    limit = min(len(data), -(-max_bytes // 3) * 4)
+    for start in range(0, limit, _FEED_CHUNK):
+        piece = data[start : min(start + _FEED_CHUNK, limit)]
+        try:
+            raw = base64.urlsafe_b64decode(piece + "=" * ((4 - len(piece) % 4) % 4))
+        except Exception:
+            return
+        yield decoder.decode(raw)
+    if limit == len(data):
+        yield decoder.decode(b"", final=True)
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self, max_chars: int) -> None:
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.chunks: list[str] = []
+        self.length = 0
+        self._skip_depth = 0
+
+    @property
+    def full(self) -> bool:
+        return self.length >= self.max_chars
+
+    def handle_starttag(self, tag: str, attrs) -> None:
+        if tag in _SKIP_TAGS:
+            self._skip_depth += 1
+        # Tags separate words, as `<br>` or `</td>` do when rendered.
+        self.chunks.append(" ")
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in _SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        self.chunks.append(" ")
+
+    def handle_data(self, data: str) -> None:
+        if self._skip_depth or self.full:
+            return
+        self.chunks.append(data)
+        self.length += len(data)
+
+
+def html_to_text(html: str | Iterable[str], max_chars: int) -> str:
+    """Visible text of `html` with whitespace collapsed, in one pass; stops once `max_chars` is reached.
+
+    `html` may be a string or an iterable of chunks (e.g. from a streaming decoder).
+    """
+    chunks = html
+    if isinstance(html, str):
+        chunks = (html[start : start + _FEED_CHUNK] for start in range(0, len(html), _FEED_CHUNK))
+    parser = _TextExtractor(max_chars)
+    for chunk in chunks:
+        parser.feed(chunk)
+        if parser.full:
+            break
+    else:
+        parser.close()
+    return " ".join("".join(parser.chunks).split())[:max_chars]
+
+
+def _iter_parts(payload: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    # Depth-first in document order, without recursion (deeply nested forwards).
+    stack = [payload]
+    while stack:
+        part = stack.pop()
+        yield part
+        stack.extend(reversed(part.get("parts") or []))
+
+
+def _part_charset(part: dict[str, Any]) -> str:
+    for header in part.get("headers") or []:
+        if (header.get("name") or "").lower() == "content-type":
+            match = _CHARSET_RE.search(header.get("value") or "")
+            if match:
+                return match.group(1).lower()
+    return "utf-8"
+
+
+def extract_body_text(
+    payload: dict[str, Any],
+    max_chars: int,
+    fetch_attachment: Callable[[str], str | None] | None = None,
+) -> str:
+    """Body text of a Gmail `format=full` payload, at most `max_chars` long.
+
+    Walks the MIME tree without decoding anything, then decodes one part: the first
+    inline `text/plain`, else the first inline `text/html` (converted to text).
+    Only the prefix needed for `max_chars` is decoded. Parts Gmail stores out of line
+    (`body.attachmentId`, large bodies) are fetched through `fetch_attachment` only
+    when chosen. Named parts (attachments) are never read.
+    """
+    html_part: dict[str, Any] | None = None
+    chosen: dict[str, Any] | None = None
+    for part in _iter_parts(payload):
+        mime_type = (part.get("mimeType") or "").lower()
+        body = part.get("body") or {}
+        if part.get("filename") or mime_type not in {"text/plain", "text/html"}:
+            continue
+        if not body.get("data") and not body.get("attachmentId"):
+            continue
+        if mime_type == "text/plain":
+            chosen = part
+            break
+        if html_part is None:
+            html_part = part
+    if chosen is None:
+        chosen = html_part
+    if chosen is None:
+        return ""
+
+    is_html = chosen is html_part
+    body = chosen.get("body") or {}
+    data = body.get("data")
+    if not data and body.get("attachmentId") and fetch_attachment is not None:
+        data = fetch_attachment(body["attachmentId"])
+
+    if not data:
+        return ""
+    charset = _part_charset(chosen)
+    if is_html:
+        return html_to_text(_iter_b64url_text(data, HTML_MAX_BYTES, charset), max_chars)
+    # UTF-8 needs at most 4 bytes per character.
+    text = decode_b64url(data, max_bytes=max_chars * 4, charset=charset)
+    return text.strip()[:max_chars].strip()
@@ -2,7 +2,6 @@ from __future__ import annotations
 
 import sqlite3
 from dataclasses import dataclass
-from datetime import UTC, datetime
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -11,6 +10,8 @@ from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 
+from processed_store import ProcessedStore
+
 
 SCOPES = [
     "https://www.googleapis.com/auth/gmail.modify",
@@ -30,6 +31,16 @@ class GmailAdapterSettings:
     gmail_max_batch: int
     skip_self: bool
     state_db_path: Path
+    gmail_workers: int
+    gmail_ingest_mode: str
+    gmail_poll_min_seconds: float
+    gmail_full_sync_seconds: float
+    state_retention_days: float
+    body_max_chars: int
+    worker_processes: int
+    claim_lease_seconds: float
+    gmail_automatable_workers: int
+    gmail_human_workers: int
 
 
 
@@ -59,6 +70,14 @@ def load_gmail_adapter_settings(project_root: Path) -> GmailAdapterSettings:
         )
     ).expanduser()
 
+    ingest_mode = os.getenv("GMAIL_INGEST_MODE", "history").strip().lower()
+    if ingest_mode not in {"history", "query"}:
+        ingest_mode = "history"
+
+    gmail_workers = max(int(os.getenv("GMAIL_WORKERS", "4")), 1)
+    # Each lane may use at most this many of the pool's threads; by default one is kept free for the other lane.
+    lane_default = str(max(gmail_workers - 1, 1))
+
     return GmailAdapterSettings(
         project_root=project_root,
         gmail_address=gmail_address,
@@ -70,6 +89,16 @@ def load_gmail_adapter_settings(project_root: Path) -> GmailAdapterSettings:
         gmail_max_batch=max(int(os.getenv("GMAIL_MAX_BATCH", "10")), 1),
         skip_self=os.getenv("GMAIL_SKIP_SELF", "1").strip() in {"1", "true", "True", "yes", "YES"},
         state_db_path=state_db_path,
+        gmail_workers=gmail_workers,
+        gmail_ingest_mode=ingest_mode,
+        gmail_poll_min_seconds=max(float(os.getenv("GMAIL_POLL_MIN_SECONDS", "0.5")), 0.0),
+        gmail_full_sync_seconds=max(float(os.getenv("GMAIL_FULL_SYNC_SECONDS", "300")), 30.0),
+        state_retention_days=max(float(os.getenv("GMAIL_STATE_RETENTION_DAYS", "30")), 0.0),
+        body_max_chars=max(int(os.getenv("EMAIL_BODY_MAX_CHARS", "20000")), 500),
+        worker_processes=max(int(os.getenv("EMAIL_WORKER_PROCESSES", "1")), 1),
+        claim_lease_seconds=max(float(os.getenv("EMAIL_CLAIM_LEASE_SECONDS", "600")), 30.0),
+        gmail_automatable_workers=min(max(int(os.getenv("GMAIL_AUTOMATABLE_WORKERS", lane_default)), 1), gmail_workers),
+        gmail_human_workers=min(max(int(os.getenv("GMAIL_HUMAN_WORKERS", lane_default)), 1), gmail_workers),
     )
 
 
@@ -133,49 +162,8 @@ def init_state_db(state_db_path: Path) -> None:
 
 
 
-def has_processed(state_db_path: Path, gmail_message_id: str) -> bool:
-    with sqlite3.connect(state_db_path) as conn:
-        row = conn.execute(
-            "SELECT 1 FROM processed_messages WHERE gmail_message_id = ? LIMIT 1;",
-            (gmail_message_id,),
-        ).fetchone()
-    return row is not None
-
-
-
-def record_processed(
-    state_db_path: Path,
-    gmail_message_id: str,
-    internet_message_id: str | None,
-    sender_email: str,
-    subject: str,
-    ticket_ref: str | None,
-    processed_ok: bool,
-    error_text: str | None,
-) -> None:
-    processed_at = datetime.now(UTC).strftime("%Y-%m-%d %H:%M:%S")
-    with sqlite3.connect(state_db_path) as conn:
-        conn.execute(
-            """
-            INSERT OR REPLACE INTO processed_messages (
-                gmail_message_id,
-                internet_message_id,
-                sender_email,
-                subject,
-                ticket_ref,
-                processed_ok,
-                error_text,
-                processed_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?);
-            """,
-            (
-                gmail_message_id,
-                internet_message_id,
-                sender_email,
-                subject,
-                ticket_ref,
-                1 if processed_ok else 0,
-                error_text,
-                processed_at,
-            ),
-        )
+class GmailStateStore(ProcessedStore):
+    """`ProcessedStore` for the Gmail adapter's state DB, keyed by `gmail_message_id`."""
+
+    def __init__(self, state_db_path: Path, flush_every: int = 50) -> None:
+        super().__init__(state_db_path, id_column="gmail_message_id", flush_every=flush_every)
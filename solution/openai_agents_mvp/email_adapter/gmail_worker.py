@@ -4,30 +4,58 @@ from __future__ import annotations
 import argparse
 import base64
 import json
-import re
+import os
+import socket
+import threading
 import time
-import urllib.error
-import urllib.request
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from email.mime.text import MIMEText
 from email.utils import parseaddr
+from functools import partial
 from pathlib import Path
 from typing import Any
 
 from gmail_oauth import (
+    GmailStateStore,
     build_gmail_service,
     get_gmail_credentials,
-    has_processed,
     init_state_db,
     load_gmail_adapter_settings,
-    record_processed,
 )
+from body_text import extract_body_text
+from inbox_source import AdaptivePoll, GmailHistorySource, GmailQuerySource, InboxSource
+from outbox import Outbox, OutboxSender, load_outbox_settings
+from router_client import RouterUnavailableError, get_router_client
+from triage import AUTOMATABLE, HUMAN, Triage, most_urgent, run_by_priority, triage
+from worker_metrics import WorkerMetrics, load_worker_metrics_settings, print_summary_if_due, serve_metrics
+
+# googleapiclient service objects are not thread-safe; each pool thread builds its own
+# and keeps it, since the pool lives for the whole process.
+_thread_local = threading.local()
+_pool: ThreadPoolExecutor | None = None
+# One state-DB handle per file for the whole process, shared by the pool threads.
+_stores: dict[Path, GmailStateStore] = {}
+_stores_lock = threading.Lock()
+_outboxes: dict[Path, Outbox] = {}
+_metrics = WorkerMetrics("gmail")
+
+# The Gmail batch endpoint takes up to 100 calls; Google recommends at most 50.
+FETCH_BATCH_SIZE = 50
+# messages.batchModify accepts up to 1000 ids per call.
+MODIFY_BATCH_SIZE = 1000
+# Results that must stay unread so the message is picked up again.
+_LEAVE_UNREAD = {"skipped_read"}
+# Results that leave an unread message behind for a later retry, unless it was
+# still marked read (a handled failure such as `missing_from_email`).
+_NEEDS_RESCAN = {"deferred", "failed"}
 
 
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Gmail OAuth worker: poll unread, route, and reply")
     parser.add_argument("--project-root", default=str(Path(__file__).resolve().parents[1]))
-    parser.add_argument("--once", action="store_true", help="Process one batch and exit")
+    parser.add_argument("--once", action="store_true", help="Process one batch, send its replies, and exit")
     parser.add_argument("--force-reauth", action="store_true")
     return parser.parse_args()
 
@@ -44,83 +72,24 @@ def _headers_to_map(headers: list[dict[str, str]]) -> dict[str, str]:
 
 
 
-def _decode_b64url(data: str | None) -> str:
-    if not data:
-        return ""
-    data = data.replace("-", "+").replace("_", "/")
-    padding = "=" * ((4 - len(data) % 4) % 4)
-    try:
-        raw = base64.b64decode(data + padding)
-        return raw.decode("utf-8", errors="replace")
-    except Exception:
-        return ""
-
-
-
-def _extract_text_from_payload(payload: dict[str, Any]) -> str:
-    mime_type = payload.get("mimeType", "")
-    body = payload.get("body", {})
-    data = body.get("data")
-
-    if mime_type == "text/plain" and data:
-        return _decode_b64url(data).strip()
-
-    text_chunks: list[str] = []
-    html_chunks: list[str] = []
-
-    for part in payload.get("parts", []) or []:
-        part_text = _extract_text_from_payload(part)
-        if not part_text:
-            continue
-        if part.get("mimeType") == "text/plain":
-            text_chunks.append(part_text)
-        else:
-            html_chunks.append(part_text)
+def _triage_message(message: dict[str, Any]) -> Triage:
+    headers = _headers_to_map((message.get("payload") or {}).get("headers", []))
+    return triage(headers.get("subject", ""), message.get("snippet") or "")
 
-    if text_chunks:
-        return "\n\n".join(text_chunks).strip()
 
-    if data:
-        decoded = _decode_b64url(data)
-        if decoded:
-            html_chunks.append(decoded)
 
-    if html_chunks:
-        text = "\n\n".join(html_chunks)
-        text = re.sub(r"<[^>]+>", " ", text)
-        text = re.sub(r"\s+", " ", text).strip()
-        return text
+def _attachment_fetcher(gmail_service, gmail_message_id: str) -> Callable[[str], str | None]:
+    """Loads a body part Gmail keeps out of line (large bodies); only called for the part being read."""
 
-    return ""
+    def fetch(attachment_id: str) -> str | None:
+        response = gmail_service.users().messages().attachments().get(
+            userId="me",
+            messageId=gmail_message_id,
+            id=attachment_id,
+        ).execute()
+        return response.get("data")
 
-
-
-def _call_router_api(api_base_url: str, payload: dict[str, Any]) -> dict[str, Any]:
-    request = urllib.request.Request(
-        f"{api_base_url}/inbound",
-        data=json.dumps(payload).encode("utf-8"),
-        headers={"Content-Type": "application/json"},
-        method="POST",
-    )
-    try:
-        with urllib.request.urlopen(request, timeout=45) as response:
-            raw = response.read().decode("utf-8")
-            return json.loads(raw)
-    except urllib.error.HTTPError as exc:
-        body = exc.read().decode("utf-8", errors="replace")
-        return {
-            "ok": False,
-            "error": f"router_http_{exc.code}",
-            "reply_subject": "Routing Error",
-            "reply_body": f"Routing API returned HTTP {exc.code}. Body: {body[:400]}",
-        }
-    except Exception as exc:  # noqa: BLE001
-        return {
-            "ok": False,
-            "error": "router_unreachable",
-            "reply_subject": "Routing Error",
-            "reply_body": f"Routing API call failed: {exc}",
-        }
+    return fetch
 
 
 
@@ -150,21 +119,91 @@ def _send_reply(
 
 
 
-def _mark_read(gmail_service, gmail_message_id: str) -> None:
-    gmail_service.users().messages().modify(
-        userId="me",
-        id=gmail_message_id,
-        body={"removeLabelIds": ["UNREAD"]},
-    ).execute()
+def _fetch_messages(
+    gmail_service,
+    gmail_message_ids: list[str],
+) -> tuple[dict[str, dict[str, Any]], dict[str, str]]:
+    """Fetch full messages with batch HTTP requests: one round trip per FETCH_BATCH_SIZE ids.
+
+    Returns (messages by id, error text by id for the calls that failed).
+    """
+    messages: dict[str, dict[str, Any]] = {}
+    errors: dict[str, str] = {}
+
+    def on_response(request_id: str, response: dict[str, Any], exception: Exception | None) -> None:
+        if exception is not None:
+            errors[request_id] = str(exception)
+        else:
+            messages[request_id] = response
 
+    for start in range(0, len(gmail_message_ids), FETCH_BATCH_SIZE):
+        batch = gmail_service.new_batch_http_request(callback=on_response)
+        for gmail_message_id in gmail_message_ids[start:start + FETCH_BATCH_SIZE]:
+            batch.add(
+                gmail_service.users().messages().get(userId="me", id=gmail_message_id, format="full"),
+                request_id=gmail_message_id,
+            )
+        batch.execute()
+    return messages, errors
+
+
+
+def _mark_read(gmail_service, gmail_message_ids: list[str]) -> None:
+    for start in range(0, len(gmail_message_ids), MODIFY_BATCH_SIZE):
+        gmail_service.users().messages().batchModify(
+            userId="me",
+            body={"ids": gmail_message_ids[start:start + MODIFY_BATCH_SIZE], "removeLabelIds": ["UNREAD"]},
+        ).execute()
+
+
+
+def _get_store(state_db_path: Path) -> GmailStateStore:
+    with _stores_lock:
+        store = _stores.get(state_db_path)
+        if store is None:
+            store = GmailStateStore(state_db_path)
+            _stores[state_db_path] = store
+        return store
+
+
+
+def _get_outbox(state_db_path: Path) -> Outbox:
+    with _stores_lock:
+        outbox = _outboxes.get(state_db_path)
+        if outbox is None:
+            outbox = Outbox(state_db_path, load_outbox_settings())
+            _outboxes[state_db_path] = outbox
+        return outbox
+
+
+
+def send_pending_replies(gmail_service, settings) -> dict[str, int]:
+    """Send one batch of queued replies on `gmail_service` and report their delivery to the router."""
+
+    def send(reply: dict[str, Any]) -> None:
+        with _metrics.time("send"):
+            _send_reply(gmail_service, **reply)
+
+    drained = _get_outbox(settings.state_db_path).drain(
+        send,
+        report=get_router_client(settings.router_api_base_url).report_delivery,
+    )
+    _metrics.count_retries("send", drained["retrying"])
+    _metrics.count_error("send_failed", drained["failed"])
+    return drained
 
 
-def _process_message(gmail_service, settings, gmail_message_id: str) -> dict[str, Any]:
-    if has_processed(settings.state_db_path, gmail_message_id):
-        _mark_read(gmail_service, gmail_message_id)
-        return {"status": "skipped_already_processed", "gmail_message_id": gmail_message_id}
 
-    message = gmail_service.users().messages().get(userId="me", id=gmail_message_id, format="full").execute()
+def _worker_id() -> str:
+    # Claims are per process: the pool threads share the process's leases.
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+
+def _process_message(gmail_service, settings, message: dict[str, Any]) -> dict[str, Any]:
+    """Route one claimed message and queue its reply. The caller marks it read afterwards."""
+    gmail_message_id = message["id"]
+    store = _get_store(settings.state_db_path)
     payload = message.get("payload", {})
     headers = _headers_to_map(payload.get("headers", []))
 
@@ -172,14 +211,16 @@ def _process_message(gmail_service, settings, gmail_message_id: str) -> dict[str
     from_raw = headers.get("from", "")
     internet_message_id = headers.get("message-id")
     from_email = parseaddr(from_raw)[1].strip().lower()
-    body_text = _extract_text_from_payload(payload)
+    body_text = extract_body_text(
+        payload,
+        settings.body_max_chars,
+        fetch_attachment=_attachment_fetcher(gmail_service, gmail_message_id),
+    )
     if not body_text:
         body_text = "(empty email body)"
 
     if settings.skip_self and from_email and settings.gmail_address and from_email.lower() == settings.gmail_address.lower():
-        _mark_read(gmail_service, gmail_message_id)
-        record_processed(
-            settings.state_db_path,
+        store.record(
             gmail_message_id,
             internet_message_id,
             from_email or "unknown",
@@ -191,9 +232,7 @@ def _process_message(gmail_service, settings, gmail_message_id: str) -> dict[str
         return {"status": "skipped_self", "gmail_message_id": gmail_message_id, "from_email": from_email}
 
     if not from_email:
-        _mark_read(gmail_service, gmail_message_id)
-        record_processed(
-            settings.state_db_path,
+        store.record(
             gmail_message_id,
             internet_message_id,
             "unknown",
@@ -210,25 +249,37 @@ def _process_message(gmail_service, settings, gmail_message_id: str) -> dict[str
         "body": body_text,
         "message_id": internet_message_id or gmail_message_id,
         "channel": "EMAIL",
+        "reply_queued": True,
     }
-    routed = _call_router_api(settings.router_api_base_url, router_payload)
+    with _metrics.time("route"):
+        try:
+            routed = get_router_client(settings.router_api_base_url).route(router_payload)
+        except RouterUnavailableError as exc:
+            # Nothing was written: no reply, no record, left unread for a later poll.
+            _metrics.count_error(f"route_{exc.error}")
+            raise
+    if routed.get("error"):
+        _metrics.count_error(f"route_{str(routed['error']).split(':', 1)[0]}")
 
     reply_subject = routed.get("reply_subject") or f"Re: {subject}"
     reply_body = routed.get("reply_body") or "Routing completed, but no response body was generated."
 
-    _send_reply(
-        gmail_service=gmail_service,
-        to_email=from_email,
-        from_email=settings.gmail_address or "me",
-        reply_subject=reply_subject,
-        reply_body=reply_body,
-        thread_id=message.get("threadId"),
-        internet_message_id=internet_message_id,
+    # Committed before the message is recorded or marked read; the sender thread delivers it.
+    _get_outbox(settings.state_db_path).enqueue(
+        gmail_message_id,
+        {
+            "to_email": from_email,
+            "from_email": settings.gmail_address or "me",
+            "reply_subject": reply_subject,
+            "reply_body": reply_body,
+            "thread_id": message.get("threadId"),
+            "internet_message_id": internet_message_id,
+        },
+        ticket_ref=routed.get("ticket_ref"),
+        reply_message_id=routed.get("reply_message_id"),
     )
-    _mark_read(gmail_service, gmail_message_id)
 
-    record_processed(
-        settings.state_db_path,
+    store.record(
         gmail_message_id,
         internet_message_id,
         from_email,
@@ -249,23 +300,195 @@ def _process_message(gmail_service, settings, gmail_message_id: str) -> dict[str
 
 
 
-def process_batch(gmail_service, settings) -> list[dict[str, Any]]:
-    response = gmail_service.users().messages().list(
-        userId="me",
-        q=settings.gmail_query,
-        maxResults=settings.gmail_max_batch,
-    ).execute()
+def _get_pool(workers: int) -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gmail-worker")
+    return _pool
+
+
+
+def _process_thread(
+    gmail_service,
+    settings,
+    messages: list[dict[str, Any]],
+    make_service: Callable[[], Any] | None,
+) -> tuple[dict[str, dict[str, Any]], list[str]]:
+    """Process one Gmail thread's messages in order, stopping at the first failure.
+
+    Returns (results by message id, ids to mark read).
+    """
+    if make_service is not None:
+        service = getattr(_thread_local, "gmail_service", None)
+        if service is None:
+            service = _thread_local.gmail_service = make_service()
+    else:
+        service = gmail_service
+
+    results: dict[str, dict[str, Any]] = {}
+    handled: list[str] = []
+    for idx, message in enumerate(messages):
+        gmail_message_id = message["id"]
+        try:
+            result = _process_message(service, settings, message)
+        except Exception as exc:  # noqa: BLE001
+            results[gmail_message_id] = {"status": "failed", "gmail_message_id": gmail_message_id, "error": str(exc)}
+            # Later messages in this thread wait for the next batch so replies stay in order.
+            for deferred in messages[idx + 1:]:
+                results[deferred["id"]] = {
+                    "status": "deferred",
+                    "gmail_message_id": deferred["id"],
+                    "error": "earlier_message_in_thread_failed",
+                }
+            break
+        results[gmail_message_id] = result
+        if result["status"] not in _LEAVE_UNREAD:
+            handled.append(gmail_message_id)
+    return results, handled
+
+
+
+def _thread_failed(
+    messages: list[dict[str, Any]],
+    exc: Exception,
+) -> tuple[dict[str, dict[str, Any]], list[str]]:
+    """`_process_thread` outcome for a thread whose job raised: every message failed, none to mark read."""
+    return {message["id"]: {"status": "failed", "gmail_message_id": message["id"], "error": str(exc)} for message in messages}, []
 
-    messages = response.get("messages", []) or []
-    results: list[dict[str, Any]] = []
 
-    for item in messages:
-        gmail_message_id = item.get("id")
-        if not gmail_message_id:
-            continue
-        result = _process_message(gmail_service, settings, gmail_message_id)
-        results.append(result)
 
+def process_batch(
+    gmail_service,
+    settings,
+    make_service: Callable[[], Any] | None = None,
+    source: InboxSource | None = None,
+) -> list[dict[str, Any]]:
+    """Process one page from `source` with up to `settings.gmail_workers` threads.
+
+    Only messages this process wins a lease on (`store.claim`) are processed, so
+    several worker processes can share one inbox and state DB. The page is fetched
+    with batch HTTP requests and marked read with one `batchModify`, so the
+    per-message call is the router call; replies go to the outbox and are sent by
+    `send_pending_replies`. Messages are grouped by Gmail thread: each group is
+    handled oldest-first by one pool thread. Groups run concurrently, most urgent
+    first (provisional priority from `triage`), within per-lane thread budgets.
+    `make_service` builds a per-thread Gmail client; without it the batch runs
+    sequentially (still most urgent first) on `gmail_service`. Without `source`, the
+    page is a fresh `settings.gmail_query` listing.
+    """
+    if source is None:
+        source = GmailQuerySource(gmail_service, settings.gmail_query)
+    store = _get_store(settings.state_db_path)
+    store.prune_if_due(settings.state_retention_days)
+    _get_outbox(settings.state_db_path).prune_if_due(settings.state_retention_days)
+    worker_id = _worker_id()
+    # With N worker processes on one inbox, look at N pages and lease one page's worth.
+    with _metrics.time("list"):
+        listed = source.pending(settings.gmail_max_batch * settings.worker_processes)
+    _metrics.set_gauge("inbox", "listed", len(listed))
+    by_id: dict[str, dict[str, Any]] = {}
+    to_mark_read: list[str] = []
+
+    # One query for the whole window instead of a lookup per message.
+    already_processed = store.processed_ids(item["id"] for item in listed)
+    unprocessed: list[dict[str, Any]] = []
+    for item in listed:
+        if item["id"] in already_processed:
+            by_id[item["id"]] = {"status": "skipped_already_processed", "gmail_message_id": item["id"]}
+            to_mark_read.append(item["id"])
+        else:
+            unprocessed.append(item)
+
+    # Claim thread by thread, so a thread's messages in this window go to one worker.
+    by_thread: dict[str, list[str]] = {}
+    for item in unprocessed:
+        by_thread.setdefault(item.get("threadId") or item["id"], []).append(item["id"])
+    candidates = [gmail_message_id for ids in by_thread.values() for gmail_message_id in ids]
+    with _metrics.time("claim"):
+        pending = store.claim(candidates, worker_id, settings.claim_lease_seconds, limit=settings.gmail_max_batch)
+    # Refs past this worker's share go back for the next poll. Refs another worker
+    # holds are dropped: it marks them read, or its lease expires and the next full
+    # sync lists them again. Requeueing those would stall an incremental source.
+    if pending and len(pending) >= settings.gmail_max_batch:
+        # `claim` returns ids in input order: refs after the last win may only be over the limit.
+        over_share = set(candidates[candidates.index(pending[-1]) + 1 :])
+        source.requeue([item for item in unprocessed if item["id"] in over_share])
+
+    handled_ids: set[str] = set()
+    try:
+        fetched, fetch_errors = {}, {}
+        if pending:
+            with _metrics.time("fetch"):
+                fetched, fetch_errors = _fetch_messages(gmail_service, pending)
+        _metrics.count_error("fetch_failed", len(fetch_errors))
+        for gmail_message_id, error in fetch_errors.items():
+            by_id[gmail_message_id] = {"status": "failed", "gmail_message_id": gmail_message_id, "error": f"fetch_failed: {error}"}
+
+        threads: dict[str, list[dict[str, Any]]] = {}
+        # Sources hand out refs oldest first, so each thread's replies go out in order.
+        for gmail_message_id in pending:
+            message = fetched.get(gmail_message_id)
+            if message is None:
+                continue
+            labels = message.get("labelIds")
+            if labels is not None and "UNREAD" not in labels:
+                # Read in the mailbox (by a person) since it was listed; leave it alone.
+                by_id[gmail_message_id] = {"status": "skipped_read", "gmail_message_id": gmail_message_id}
+                continue
+            threads.setdefault(message.get("threadId") or gmail_message_id, []).append(message)
+
+        # Provisional priority from the subject and Gmail's snippet, so nothing is decoded before dispatch.
+        triaged = {
+            message["id"]: _triage_message(message) for messages in threads.values() for message in messages
+        }
+        groups = [
+            (most_urgent([triaged[message["id"]] for message in messages]), messages)
+            for messages in threads.values()
+        ]
+        if make_service is None or settings.gmail_workers <= 1 or len(groups) <= 1:
+            outcomes = [
+                _process_thread(gmail_service, settings, messages, None)
+                for _, messages in sorted(groups, key=lambda group: group[0].rank)
+            ]
+        else:
+            outcomes = run_by_priority(
+                _get_pool(settings.gmail_workers),
+                [
+                    (group_triage, partial(_process_thread, gmail_service, settings, messages, make_service))
+                    for group_triage, messages in groups
+                ],
+                max_running=settings.gmail_workers,
+                lane_budgets={AUTOMATABLE: settings.gmail_automatable_workers, HUMAN: settings.gmail_human_workers},
+                on_error=lambda idx, exc: _thread_failed(groups[idx][1], exc),
+            )
+
+        for results, handled in outcomes:
+            for gmail_message_id, result in results.items():
+                result.setdefault("priority", triaged[gmail_message_id].priority)
+                result.setdefault("lane", triaged[gmail_message_id].lane)
+            by_id.update(results)
+            to_mark_read.extend(handled)
+
+        # Records are durable before their messages leave the unread set.
+        with _metrics.time("state_write"):
+            store.flush()
+        handled_ids = set(to_mark_read)
+        if to_mark_read:
+            with _metrics.time("mark_read"):
+                _mark_read(gmail_service, to_mark_read)
+    finally:
+        # Whatever stays unread is handed back, so any worker can retry it without waiting out the lease.
+        store.release((gmail_message_id for gmail_message_id in pending if gmail_message_id not in handled_ids), worker_id)
+
+    results = [by_id[item["id"]] for item in listed if item["id"] in by_id]
+    for result in results:
+        _metrics.count_message(result["status"])
+    # Only a retry left unread needs the full listing; a rescan costs a full query page.
+    if any(
+        result["status"] in _NEEDS_RESCAN and result["gmail_message_id"] not in handled_ids for result in results
+    ):
+        source.request_full_sync()
+    source.commit()
     return results
 
 
@@ -282,26 +505,76 @@ def main() -> None:
     gmail_service = build_gmail_service(creds)
     init_state_db(settings.state_db_path)
 
+    def make_service():
+        return build_gmail_service(creds)
+
+    if settings.gmail_ingest_mode == "history":
+        source: InboxSource = GmailHistorySource(
+            gmail_service,
+            settings.gmail_query,
+            settings.state_db_path,
+            full_sync_seconds=settings.gmail_full_sync_seconds,
+        )
+    else:
+        source = GmailQuerySource(gmail_service, settings.gmail_query)
+
     if args.once:
-        results = process_batch(gmail_service, settings)
-        print(json.dumps({"processed": len(results), "results": results}, indent=2))
+        results = process_batch(gmail_service, settings, make_service, source)
+        delivery = {"leased": 0, "sent": 0, "retrying": 0, "failed": 0}
+        while True:
+            drained = send_pending_replies(gmail_service, settings)
+            if not drained["leased"]:
+                break
+            for key in delivery:
+                delivery[key] += drained[key]
+        print(
+            json.dumps(
+                {"processed": len(results), "results": results, "delivery": delivery, "metrics": _metrics.summary()},
+                indent=2,
+            )
+        )
         return
 
+    metrics_settings = load_worker_metrics_settings()
+    _metrics.add_gauge("outbox", _get_outbox(settings.state_db_path).stats)
+    _metrics.add_gauge("router", get_router_client(settings.router_api_base_url).stats)
+    if metrics_settings.port:
+        serve_metrics(_metrics, metrics_settings.host, metrics_settings.port)
+        print(f"Metrics on http://{metrics_settings.host}:{metrics_settings.port}/metrics")
+
+    sender_service = make_service()
+    sender = OutboxSender(
+        lambda: send_pending_replies(sender_service, settings),
+        idle_seconds=_get_outbox(settings.state_db_path).settings.idle_seconds,
+        name="gmail-sender",
+        on_error=lambda exc: _metrics.count_error("outbox_sender_failure", detail=str(exc)),
+    )
+    sender.start()
+
+    poll = AdaptivePoll(settings.gmail_poll_min_seconds, settings.poll_seconds)
     print(
-        f"Gmail worker started for {settings.gmail_address}. "
-        f"Polling every {settings.poll_seconds}s with query: {settings.gmail_query}"
+        f"Gmail worker started for {settings.gmail_address} ({settings.gmail_ingest_mode} mode). "
+        f"Polling every {poll.min_seconds}-{poll.max_seconds}s with query: {settings.gmail_query}"
     )
     while True:
         try:
-            results = process_batch(gmail_service, settings)
+            results = process_batch(gmail_service, settings, make_service, source)
             if results:
+                sender.wake()
                 print(json.dumps({"processed": len(results), "results": results}, indent=2))
+            delay = poll.next_delay(len(results), batch_full=len(results) >= settings.gmail_max_batch)
+            # While the router's breaker is open every route fails fast; do not spin on it.
+            delay = max(delay, get_router_client(settings.router_api_base_url).retry_after())
         except KeyboardInterrupt:
             print("Stopping Gmail worker.")
+            sender.stop(timeout_s=30)
             return
         except Exception as exc:  # noqa: BLE001
             print(json.dumps({"error": f"worker_loop_failure: {exc}"}))
-        time.sleep(settings.poll_seconds)
+            _metrics.count_error("worker_loop_failure", detail=str(exc))
+            delay = poll.next_delay(0, batch_full=False)
+        print_summary_if_due(_metrics, metrics_settings.summary_seconds)
+        time.sleep(delay)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+
+# {"id": ..., "threadId": ...}; threadId is optional (MailSlurp has none).
+MessageRef = dict[str, str]
+
+
+class InboxSource(ABC):
+    """Where a worker learns which inbound messages may need processing.
+
+    `pending(limit)` returns up to `limit` refs, oldest first. `commit()` is called
+    after the worker has handled everything `pending` returned, so a source can
+    advance a persisted cursor only once the work is done. `request_full_sync()`
+    asks the source to re-scan everything unread on its next call, e.g. after a
+    message failed and was left unread for a retry. `requeue(refs)` returns refs the
+    worker did not take this time (over its share of a shared inbox) to the front.
+    """
+
+    @abstractmethod
+    def pending(self, limit: int) -> list[MessageRef]:
+        raise NotImplementedError
+
+    def commit(self) -> None:
+        return None
+
+    def request_full_sync(self) -> None:
+        return None
+
+    def requeue(self, refs: list[MessageRef]) -> None:
+        # Sources that re-list on every call see unread refs again anyway.
+        return None
+
+
+class GmailQuerySource(InboxSource):
+    """Re-lists `query` (e.g. `label:inbox is:unread -from:me`) on every call."""
+
+    def __init__(self, gmail_service, query: str) -> None:
+        self._service = gmail_service
+        self._query = query
+
+    def pending(self, limit: int) -> list[MessageRef]:
+        response = self._service.users().messages().list(userId="me", q=self._query, maxResults=limit).execute()
+        refs = [
+            {"id": item["id"], "threadId": item.get("threadId") or item["id"]}
+            for item in response.get("messages", []) or []
+            if item.get("id")
+        ]
+        # messages.list is newest first.
+        return list(reversed(refs))
+
+
+class GmailHistorySource(InboxSource):
+    """Incremental Gmail ingestion from `users.history.list` with a persisted `historyId`.
+
+    An idle poll is one `history.list` call. Without a cursor, when Gmail reports the
+    cursor as expired (HTTP 404), after `request_full_sync()` and every
+    `full_sync_seconds`, the source falls back to one `GmailQuerySource` scan and
+    restarts the cursor from the mailbox's current `historyId`.
+
+    `query` only applies to those full scans. Between them, a new message is taken
+    when it is in INBOX, UNREAD and not SENT: `history.list` returns ids and labels,
+    not something a Gmail search can be checked against. Use `GmailQuerySource` for
+    a narrower query (e.g. a `from:` or `subject:` filter).
+    """
+
+    def __init__(
+        self,
+        gmail_service,
+        query: str,
+        state_db_path: Path,
+        full_sync_seconds: float = 300.0,
+        cursor_name: str = "gmail_history",
+    ) -> None:
+        self._service = gmail_service
+        self._query_source = GmailQuerySource(gmail_service, query)
+        self._state_db_path = state_db_path
+        self._cursor_name = cursor_name
+        self._full_sync_seconds = full_sync_seconds
+        self._history_id = load_inbox_cursor(state_db_path, cursor_name)
+        self._backlog: deque[MessageRef] = deque()
+        self._seen: set[str] = set()
+        self._next_history_id: str | None = None
+        self._full_sync_due = self._history_id is None
+        self._last_full_sync = time.monotonic()
+
+    def request_full_sync(self) -> None:
+        self._full_sync_due = True
+
+    def requeue(self, refs: list[MessageRef]) -> None:
+        self._backlog.extendleft(reversed(refs))
+
+    def pending(self, limit: int) -> list[MessageRef]:
+        if not self._backlog:
+            if self._full_sync_due or time.monotonic() - self._last_full_sync >= self._full_sync_seconds:
+                self._full_sync(limit)
+            else:
+                self._read_history()
+
+        batch: list[MessageRef] = []
+        while self._backlog and len(batch) < limit:
+            batch.append(self._backlog.popleft())
+        return batch
+
+    def commit(self) -> None:
+        # Only move the cursor once everything read up to it has been handed out and handled.
+        if self._backlog or self._next_history_id is None:
+            return
+        self._history_id = self._next_history_id
+        self._next_history_id = None
+        self._seen.clear()
+        save_inbox_cursor(self._state_db_path, self._cursor_name, self._history_id)
+
+    def _full_sync(self, limit: int) -> None:
+        # Read the mailbox position first, so anything arriving during the scan is in the next history page.
+        profile = self._service.users().getProfile(userId="me").execute()
+        refs = self._query_source.pending(limit)
+        self._backlog.extend(refs)
+        self._seen = {ref["id"] for ref in refs}
+        # A full page means more unread mail is waiting: keep scanning before switching to history.
+        self._full_sync_due = len(refs) >= limit
+        self._next_history_id = str(profile["historyId"]) if not self._full_sync_due else None
+        self._last_full_sync = time.monotonic()
+
+    def _read_history(self) -> None:
+        page_token: str | None = None
+        latest = self._history_id
+        while True:
+            request: dict[str, Any] = {
+                "userId": "me",
+                "startHistoryId": self._history_id,
+                "historyTypes": ["messageAdded"],
+                "labelId": "INBOX",
+            }
+            if page_token:
+                request["pageToken"] = page_token
+            try:
+                response = self._service.users().history().list(**request).execute()
+            except Exception as exc:  # noqa: BLE001
+                if getattr(getattr(exc, "resp", None), "status", None) == 404:
+                    # historyId too old for Gmail to replay: rescan unread mail instead.
+                    self._full_sync_due = True
+                    return
+                raise
+
+            for record in response.get("history", []) or []:
+                for added in record.get("messagesAdded", []) or []:
+                    message = added.get("message") or {}
+                    message_id = message.get("id")
+                    labels = message.get("labelIds") or []
+                    if not message_id or message_id in self._seen or "SENT" in labels or "UNREAD" not in labels:
+                        continue
+                    self._seen.add(message_id)
+                    self._backlog.append({"id": message_id, "threadId": message.get("threadId") or message_id})
+            latest = str(response.get("historyId") or latest)
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                break
+        self._next_history_id = latest
+
+
+class MailSlurpInboxSource(InboxSource):
+    """MailSlurp has no change feed: lists the inbox, oldest first, on every call."""
+
+    def __init__(self, inbox_api, inbox_id: str, unread_only: bool) -> None:
+        self._inbox_api = inbox_api
+        self._inbox_id = inbox_id
+        self._unread_only = unread_only
+
+    def pending(self, limit: int) -> list[MessageRef]:
+        previews = self._inbox_api.get_emails(
+            self._inbox_id,
+            limit=limit,
+            sort="ASC",
+            unread_only=self._unread_only,
+            min_count=0,
+        )
+        return [{"id": str(preview.id)} for preview in previews or [] if getattr(preview, "id", None)]
+
+
+class MemoryInboxSource(InboxSource):
+    """Local stand-in: refs pushed by a test or a local producer, handed out in order."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._queue: deque[MessageRef] = deque()
+
+    def push(self, ref: MessageRef) -> None:
+        with self._lock:
+            self._queue.append(ref)
+
+    def pending(self, limit: int) -> list[MessageRef]:
+        with self._lock:
+            batch: list[MessageRef] = []
+            while self._queue and len(batch) < limit:
+                batch.append(self._queue.popleft())
+            return batch
+
+    def requeue(self, refs: list[MessageRef]) -> None:
+        with self._lock:
+            self._queue.extendleft(reversed(refs))
+
+
+class AdaptivePoll:
+    """Poll interval that tightens to `min_seconds` while mail is flowing and backs off when idle.
+
+    A full batch means more is waiting, so the next poll is immediate; each empty
+    poll multiplies the interval by `backoff`, capped at `max_seconds`.
+    """
+
+    def __init__(self, min_seconds: float, max_seconds: float, backoff: float = 2.0) -> None:
+        self.min_seconds = max(min_seconds, 0.0)
+        self.max_seconds = max(max_seconds, self.min_seconds)
+        self.backoff = max(backoff, 1.0)
+        self.interval = self.min_seconds
+
+    def next_delay(self, handled: int, batch_full: bool) -> float:
+        if batch_full:
+            self.interval = self.min_seconds
+            return 0.0
+        if handled:
+            self.interval = self.min_seconds
+        else:
+            self.interval = min(max(self.interval, 0.1) * self.backoff, self.max_seconds)
+        return self.interval
+
+
+def _ensure_cursor_table(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS inbox_cursors (
+            cursor_name TEXT PRIMARY KEY,
+            cursor_value TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        );
+        """
+    )
+
+
+def load_inbox_cursor(state_db_path: Path, cursor_name: str) -> str | None:
+    with sqlite3.connect(state_db_path) as conn:
+        _ensure_cursor_table(conn)
+        row = conn.execute(
+            "SELECT cursor_value FROM inbox_cursors WHERE cursor_name = ?;",
+            (cursor_name,),
+        ).fetchone()
+    return str(row[0]) if row else None
+
+
+def save_inbox_cursor(state_db_path: Path, cursor_name: str, cursor_value: str) -> None:
+    updated_at = datetime.now(UTC).strftime("%Y-%m-%d %H:%M:%S")
+    with sqlite3.connect(state_db_path) as conn:
+        _ensure_cursor_table(conn)
+        conn.execute(
+            """
+            INSERT INTO inbox_cursors (cursor_name, cursor_value, updated_at)
+            VALUES (?, ?, ?)
+            ON CONFLICT(cursor_name) DO UPDATE
+            SET cursor_value = excluded.cursor_value,
+                updated_at = excluded.updated_at;
+            """,
+            (cursor_name, cursor_value, updated_at),
+        )
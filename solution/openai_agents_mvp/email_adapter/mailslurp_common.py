@@ -2,7 +2,6 @@ from __future__ import annotations
 
 import sqlite3
 from dataclasses import dataclass
-from datetime import UTC, datetime
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -16,12 +15,17 @@ class MailSlurpSettings:
     inbox_email: str | None
     router_api_base_url: str
     poll_seconds: int
+    poll_min_seconds: float
     max_batch: int
     unread_only: bool
     skip_self: bool
     send_mode: str
     outbox_log_path: Path
     state_db_path: Path
+    state_retention_days: float
+    body_max_chars: int
+    worker_processes: int
+    claim_lease_seconds: float
     inbox_name: str
     inbox_description: str
 
@@ -64,12 +68,17 @@ def load_mailslurp_settings(project_root: Path) -> MailSlurpSettings:
         inbox_email=inbox_email,
         router_api_base_url=router_api_base_url,
         poll_seconds=max(int(os.getenv("MAILSLURP_POLL_SECONDS", "15")), 5),
+        poll_min_seconds=max(float(os.getenv("MAILSLURP_POLL_MIN_SECONDS", "1")), 0.0),
         max_batch=max(int(os.getenv("MAILSLURP_MAX_BATCH", "10")), 1),
         unread_only=os.getenv("MAILSLURP_UNREAD_ONLY", "1").strip() in {"1", "true", "True", "yes", "YES"},
         skip_self=os.getenv("MAILSLURP_SKIP_SELF", "1").strip() in {"1", "true", "True", "yes", "YES"},
         send_mode=send_mode,
         outbox_log_path=outbox_log_path,
         state_db_path=state_db_path,
+        state_retention_days=max(float(os.getenv("MAILSLURP_STATE_RETENTION_DAYS", "30")), 0.0),
+        body_max_chars=max(int(os.getenv("EMAIL_BODY_MAX_CHARS", "20000")), 500),
+        worker_processes=max(int(os.getenv("EMAIL_WORKER_PROCESSES", "1")), 1),
+        claim_lease_seconds=max(float(os.getenv("EMAIL_CLAIM_LEASE_SECONDS", "600")), 30.0),
         inbox_name=os.getenv("MAILSLURP_INBOX_NAME", "BNP BDD MVP Router Inbox").strip(),
         inbox_description=os.getenv("MAILSLURP_INBOX_DESCRIPTION", "MVP routing demo inbox").strip(),
     )
@@ -102,55 +111,6 @@ def init_state_db(state_db_path: Path) -> None:
 
 
 
-def has_processed(state_db_path: Path, message_id: str) -> bool:
-    with sqlite3.connect(state_db_path) as conn:
-        row = conn.execute(
-            "SELECT 1 FROM processed_messages WHERE message_id = ? LIMIT 1;",
-            (message_id,),
-        ).fetchone()
-    return row is not None
-
-
-
-def record_processed(
-    state_db_path: Path,
-    message_id: str,
-    internet_message_id: str | None,
-    sender_email: str,
-    subject: str,
-    ticket_ref: str | None,
-    processed_ok: bool,
-    error_text: str | None,
-) -> None:
-    processed_at = datetime.now(UTC).strftime("%Y-%m-%d %H:%M:%S")
-    with sqlite3.connect(state_db_path) as conn:
-        conn.execute(
-            """
-            INSERT OR REPLACE INTO processed_messages (
-                message_id,
-                internet_message_id,
-                sender_email,
-                subject,
-                ticket_ref,
-                processed_ok,
-                error_text,
-                processed_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?);
-            """,
-            (
-                message_id,
-                internet_message_id,
-                sender_email,
-                subject,
-                ticket_ref,
-                1 if processed_ok else 0,
-                error_text,
-                processed_at,
-            ),
-        )
-
-
-
 def upsert_env_key(env_path: Path, key: str, value: str) -> None:
     lines: list[str] = []
     if env_path.exists():
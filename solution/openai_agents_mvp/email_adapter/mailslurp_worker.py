@@ -3,9 +3,10 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
+import socket
+import threading
 import time
-import urllib.error
-import urllib.request
 from email.utils import parseaddr
 from pathlib import Path
 from typing import Any
@@ -15,18 +16,23 @@ from mailslurp_client.exceptions import ApiException
 
 from mailslurp_common import (
     MailSlurpSettings,
-    has_processed,
     init_state_db,
     load_mailslurp_settings,
-    record_processed,
 )
+from body_text import html_to_text
+from inbox_source import AdaptivePoll, InboxSource, MailSlurpInboxSource
+from outbox import Outbox, OutboxSender, PermanentSendError, load_outbox_settings
+from processed_store import ProcessedStore
+from router_client import RouterUnavailableError, get_router_client
+from triage import Triage, triage
+from worker_metrics import WorkerMetrics, load_worker_metrics_settings, print_summary_if_due, serve_metrics
 
 
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="MailSlurp worker: poll inbox, route, and reply")
     parser.add_argument("--project-root", default=str(Path(__file__).resolve().parents[1]))
-    parser.add_argument("--once", action="store_true", help="Process one batch and exit")
+    parser.add_argument("--once", action="store_true", help="Process one batch, send its replies, and exit")
     return parser.parse_args()
 
 
@@ -38,35 +44,6 @@ def _build_api_client(api_key: str) -> mailslurp_client.ApiClient:
 
 
 
-def _call_router_api(api_base_url: str, payload: dict[str, Any]) -> dict[str, Any]:
-    request = urllib.request.Request(
-        f"{api_base_url}/inbound",
-        data=json.dumps(payload).encode("utf-8"),
-        headers={"Content-Type": "application/json"},
-        method="POST",
-    )
-    try:
-        with urllib.request.urlopen(request, timeout=45) as response:
-            raw = response.read().decode("utf-8")
-            return json.loads(raw)
-    except urllib.error.HTTPError as exc:
-        body = exc.read().decode("utf-8", errors="replace")
-        return {
-            "ok": False,
-            "error": f"router_http_{exc.code}",
-            "reply_subject": "Routing Error",
-            "reply_body": f"Routing API returned HTTP {exc.code}. Body: {body[:400]}",
-        }
-    except Exception as exc:  # noqa: BLE001
-        return {
-            "ok": False,
-            "error": "router_unreachable",
-            "reply_subject": "Routing Error",
-            "reply_body": f"Routing API call failed: {exc}",
-        }
-
-
-
 def _ensure_inbox(settings: MailSlurpSettings, inbox_api: mailslurp_client.InboxControllerApi):
     if not settings.inbox_id:
         raise ValueError(
@@ -76,86 +53,149 @@ def _ensure_inbox(settings: MailSlurpSettings, inbox_api: mailslurp_client.Inbox
 
 
 
-def _get_body_text(email: mailslurp_client.Email) -> str:
+def _get_body_text(email: mailslurp_client.Email, max_chars: int) -> str:
     if email.body and email.body.strip():
-        return email.body.strip()
+        if email.is_html:
+            text = html_to_text(email.body, max_chars)
+            if text:
+                return text
+        else:
+            return email.body.strip()[:max_chars].strip()
     if email.text_excerpt and email.text_excerpt.strip():
-        return email.text_excerpt.strip()
+        return email.text_excerpt.strip()[:max_chars]
     return "(empty email body)"
 
 
 
+class _OutboxLog:
+    """Append-only JSONL log of outbound replies, kept open for the life of the process."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._handle = None
+        self._lock = threading.Lock()
+
+    def write(self, payload: dict[str, Any]) -> None:
+        with self._lock:
+            if self._handle is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._handle = self.path.open("a", encoding="utf-8")
+            self._handle.write(json.dumps(payload, ensure_ascii=True) + "\n")
+            self._handle.flush()
+
+
+
 def _send_reply(
     settings: MailSlurpSettings,
     inbox_api: mailslurp_client.InboxControllerApi,
-    inbox_id: str,
-    to_email: str,
-    reply_subject: str,
-    reply_body: str,
-) -> tuple[bool, str | None]:
+    outbox_log: _OutboxLog,
+    reply: dict[str, Any],
+) -> None:
+    """Outbox send function: returns once the reply is sent (or logged in dry_run), raises otherwise."""
     payload = {
-        "to_email": to_email,
-        "subject": reply_subject,
-        "body": reply_body,
+        "to_email": reply["to_email"],
+        "subject": reply["reply_subject"],
+        "body": reply["reply_body"],
         "send_mode": settings.send_mode,
     }
 
     if settings.send_mode == "dry_run":
-        _log_outbox(settings.outbox_log_path, payload | {"status": "dry_run"})
-        return True, "dry_run_logged"
+        outbox_log.write(payload | {"status": "dry_run"})
+        return
 
     send_opts = mailslurp_client.SendEmailOptions(
-        to=[to_email],
-        subject=reply_subject,
-        body=reply_body,
+        to=[reply["to_email"]],
+        subject=reply["reply_subject"],
+        body=reply["reply_body"],
     )
     try:
-        inbox_api.send_email(inbox_id, send_opts)
-        _log_outbox(settings.outbox_log_path, payload | {"status": "sent"})
-        return True, None
+        inbox_api.send_email(reply["inbox_id"], send_opts)
     except ApiException as exc:
-        # Free plan may block sending; in auto mode we keep processing and log.
+        # Free plan may block sending; in auto mode we log it and do not retry.
         if settings.send_mode == "auto":
             msg = f"send_blocked_api_exception_{exc.status}"
-            _log_outbox(settings.outbox_log_path, payload | {"status": msg, "detail": str(exc)})
-            return False, msg
+            outbox_log.write(payload | {"status": msg, "detail": str(exc)})
+            raise PermanentSendError(msg) from exc
         raise
+    outbox_log.write(payload | {"status": "sent"})
+
+
+
+# One state-DB handle (and outbox) per file for the whole process.
+_stores: dict[Path, ProcessedStore] = {}
+_stores_lock = threading.Lock()
+_outboxes: dict[Path, Outbox] = {}
+_metrics = WorkerMetrics("mailslurp")
+
+
+def _get_store(state_db_path: Path) -> ProcessedStore:
+    with _stores_lock:
+        store = _stores.get(state_db_path)
+        if store is None:
+            store = ProcessedStore(state_db_path, id_column="message_id")
+            _stores[state_db_path] = store
+        return store
+
+
+
+def _get_outbox(state_db_path: Path) -> Outbox:
+    with _stores_lock:
+        outbox = _outboxes.get(state_db_path)
+        if outbox is None:
+            outbox = Outbox(state_db_path, load_outbox_settings())
+            _outboxes[state_db_path] = outbox
+        return outbox
+
+
+
+def send_pending_replies(
+    settings: MailSlurpSettings,
+    inbox_api: mailslurp_client.InboxControllerApi,
+    outbox_log: _OutboxLog,
+) -> dict[str, int]:
+    """Send one batch of queued replies and report their delivery to the router."""
+
+    def send(reply: dict[str, Any]) -> None:
+        with _metrics.time("send"):
+            _send_reply(settings, inbox_api, outbox_log, reply)
+
+    drained = _get_outbox(settings.state_db_path).drain(
+        send,
+        report=get_router_client(settings.router_api_base_url).report_delivery,
+    )
+    _metrics.count_retries("send", drained["retrying"])
+    _metrics.count_error("send_failed", drained["failed"])
+    return drained
+
 
 
-def _log_outbox(outbox_log_path: Path, payload: dict[str, Any]) -> None:
-    outbox_log_path.parent.mkdir(parents=True, exist_ok=True)
-    with outbox_log_path.open("a", encoding="utf-8") as handle:
-        handle.write(json.dumps(payload, ensure_ascii=True) + "\n")
+def _worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
 
 
 
 def _mark_read(email_api: mailslurp_client.EmailControllerApi, email_id: str) -> None:
-    email_api.mark_as_read(email_id, read=True)
+    with _metrics.time("mark_read"):
+        email_api.mark_as_read(email_id, read=True)
 
 
 
 def _process_one(
     settings: MailSlurpSettings,
     inbox: mailslurp_client.InboxDto,
-    inbox_api: mailslurp_client.InboxControllerApi,
     email_api: mailslurp_client.EmailControllerApi,
-    preview: mailslurp_client.EmailPreview,
+    message_id: str,
+    email: mailslurp_client.Email,
+    body_text: str,
 ) -> dict[str, Any]:
-    message_id = str(preview.id)
-    if has_processed(settings.state_db_path, message_id):
-        _mark_read(email_api, message_id)
-        return {"status": "skipped_already_processed", "message_id": message_id}
-
-    email = email_api.get_email(message_id)
+    """Route one claimed email and queue its reply. The caller marks it read once its record is flushed."""
+    store = _get_store(settings.state_db_path)
     subject = email.subject or "(no subject)"
     from_raw = email._from or ""
     from_email = parseaddr(from_raw)[1].strip().lower()
-    body_text = _get_body_text(email)
 
     if settings.skip_self and from_email and inbox.email_address and from_email.lower() == inbox.email_address.lower():
-        _mark_read(email_api, message_id)
-        record_processed(
-            settings.state_db_path,
+        store.record(
             message_id,
             email.message_id,
             from_email,
@@ -167,9 +207,7 @@ def _process_one(
         return {"status": "skipped_self", "message_id": message_id, "from_email": from_email}
 
     if not from_email:
-        _mark_read(email_api, message_id)
-        record_processed(
-            settings.state_db_path,
+        store.record(
             message_id,
             email.message_id,
             "unknown",
@@ -180,37 +218,49 @@ def _process_one(
         )
         return {"status": "failed", "message_id": message_id, "error": "missing_from_email"}
 
-    routed = _call_router_api(
-        settings.router_api_base_url,
-        {
-            "from_email": from_email,
-            "subject": subject,
-            "body": body_text,
-            "message_id": email.message_id or message_id,
-            "channel": "EMAIL",
-        },
-    )
+    with _metrics.time("route"):
+        try:
+            routed = get_router_client(settings.router_api_base_url).route(
+                {
+                    "from_email": from_email,
+                    "subject": subject,
+                    "body": body_text,
+                    "message_id": email.message_id or message_id,
+                    "channel": "EMAIL",
+                    "reply_queued": True,
+                },
+            )
+        except RouterUnavailableError as exc:
+            # Nothing was written: no reply, no record, left unread for a later poll.
+            _metrics.count_error(f"route_{exc.error}")
+            raise
+    if routed.get("error"):
+        _metrics.count_error(f"route_{str(routed['error']).split(':', 1)[0]}")
 
     reply_subject = routed.get("reply_subject") or f"Re: {subject}"
     reply_body = routed.get("reply_body") or "Routing completed, but no response body was generated."
 
-    send_ok, send_error = _send_reply(settings, inbox_api, str(inbox.id), from_email, reply_subject, reply_body)
-    _mark_read(email_api, message_id)
-
-    routing_error = routed.get("error")
-    combined_error = routing_error
-    if send_error:
-        combined_error = f"{routing_error}; {send_error}" if routing_error else send_error
+    # Committed before the email is marked read; the sender loop delivers it.
+    _get_outbox(settings.state_db_path).enqueue(
+        message_id,
+        {
+            "inbox_id": str(inbox.id),
+            "to_email": from_email,
+            "reply_subject": reply_subject,
+            "reply_body": reply_body,
+        },
+        ticket_ref=routed.get("ticket_ref"),
+        reply_message_id=routed.get("reply_message_id"),
+    )
 
-    record_processed(
-        settings.state_db_path,
+    store.record(
         message_id,
         email.message_id,
         from_email,
         subject,
         ticket_ref=routed.get("ticket_ref"),
-        processed_ok=bool(routed.get("ok", False)) and send_ok,
-        error_text=combined_error,
+        processed_ok=bool(routed.get("ok", False)),
+        error_text=routed.get("error"),
     )
 
     return {
@@ -219,8 +269,7 @@ def _process_one(
         "from_email": from_email,
         "ticket_ref": routed.get("ticket_ref"),
         "ok": routed.get("ok", False),
-        "send_ok": send_ok,
-        "error": combined_error,
+        "error": routed.get("error"),
     }
 
 
@@ -230,27 +279,80 @@ def process_batch(
     inbox: mailslurp_client.InboxDto,
     inbox_api: mailslurp_client.InboxControllerApi,
     email_api: mailslurp_client.EmailControllerApi,
+    source: InboxSource | None = None,
 ) -> list[dict[str, Any]]:
-    previews = inbox_api.get_emails(
-        str(inbox.id),
-        limit=settings.max_batch,
-        sort="ASC",
-        unread_only=settings.unread_only,
-        min_count=0,
-    )
-
+    """Process the emails of one page this process wins a lease on (`store.claim`).
+
+    Worker processes sharing the inbox and `MAILSLURP_STATE_DB` split it this way;
+    emails leased to another process are left to it until its lease expires. The
+    claimed emails are fetched, then routed most urgent first.
+    """
+    if source is None:
+        source = MailSlurpInboxSource(inbox_api, str(inbox.id), settings.unread_only)
+    store = _get_store(settings.state_db_path)
+    store.prune_if_due(settings.state_retention_days)
+    _get_outbox(settings.state_db_path).prune_if_due(settings.state_retention_days)
+
+    worker_id = _worker_id()
+    # With N worker processes on one inbox, look at N pages and lease one page's worth.
+    with _metrics.time("list"):
+        refs = source.pending(settings.max_batch * settings.worker_processes)
+    _metrics.set_gauge("inbox", "listed", len(refs))
+    already_processed = store.processed_ids(ref["id"] for ref in refs)
+    with _metrics.time("claim"):
+        claimed = set(
+            store.claim(
+                (ref["id"] for ref in refs if ref["id"] not in already_processed),
+                worker_id,
+                settings.claim_lease_seconds,
+                limit=settings.max_batch,
+            )
+        )
     results: list[dict[str, Any]] = []
-    for preview in previews or []:
+    failed: list[str] = []
+    # Fetch the claimed emails first, then route the most urgent first (provisional priority from `triage`).
+    fetched: list[tuple[Triage, str, mailslurp_client.Email, str]] = []
+    for ref in refs:
+        if ref["id"] not in already_processed and ref["id"] not in claimed:
+            # Over this worker's share, or leased to another worker.
+            continue
         try:
-            results.append(_process_one(settings, inbox, inbox_api, email_api, preview))
+            if ref["id"] in already_processed:
+                _mark_read(email_api, ref["id"])
+                results.append({"status": "skipped_already_processed", "message_id": ref["id"]})
+                continue
+            with _metrics.time("fetch"):
+                email = email_api.get_email(ref["id"])
+            body_text = _get_body_text(email, settings.body_max_chars)
+            fetched.append((triage(email.subject or "", body_text), ref["id"], email, body_text))
         except Exception as exc:  # noqa: BLE001
-            results.append(
-                {
-                    "status": "failed",
-                    "message_id": getattr(preview, "id", None),
-                    "error": str(exc),
-                }
-            )
+            failed.append(ref["id"])
+            _metrics.count_error("fetch_failed")
+            results.append({"status": "failed", "message_id": ref["id"], "error": str(exc)})
+
+    handled: list[str] = []
+    for item_triage, message_id, email, body_text in sorted(fetched, key=lambda item: item[0].rank):
+        try:
+            result = _process_one(settings, inbox, email_api, message_id, email, body_text)
+            handled.append(message_id)
+        except Exception as exc:  # noqa: BLE001
+            failed.append(message_id)
+            result = {"status": "failed", "message_id": message_id, "error": str(exc)}
+        results.append(result | {"priority": item_triage.priority, "lane": item_triage.lane})
+    with _metrics.time("state_write"):
+        store.flush()
+    # Only once their records are durable: an email read but unrecorded would never be retried.
+    for message_id in handled:
+        try:
+            _mark_read(email_api, message_id)
+        except Exception:  # noqa: BLE001
+            # Recorded as processed, so the next poll skips it and marks it read then.
+            _metrics.count_error("mark_read_failed")
+    # Hand failures back so any worker can retry them without waiting out the lease.
+    store.release(failed, worker_id)
+    source.commit()
+    for result in results:
+        _metrics.count_message(result["status"])
     return results
 
 
@@ -266,27 +368,71 @@ def main() -> None:
         email_api = mailslurp_client.EmailControllerApi(api_client)
 
         inbox = _ensure_inbox(settings, inbox_api)
+        source = MailSlurpInboxSource(inbox_api, str(inbox.id), settings.unread_only)
+        outbox_log = _OutboxLog(settings.outbox_log_path)
 
         if args.once:
-            results = process_batch(settings, inbox, inbox_api, email_api)
-            print(json.dumps({"inbox": inbox.email_address, "processed": len(results), "results": results}, indent=2))
+            results = process_batch(settings, inbox, inbox_api, email_api, source)
+            delivery = {"leased": 0, "sent": 0, "retrying": 0, "failed": 0}
+            while True:
+                drained = send_pending_replies(settings, inbox_api, outbox_log)
+                if not drained["leased"]:
+                    break
+                for key in delivery:
+                    delivery[key] += drained[key]
+            print(
+                json.dumps(
+                    {
+                        "inbox": inbox.email_address,
+                        "processed": len(results),
+                        "results": results,
+                        "delivery": delivery,
+                        "metrics": _metrics.summary(),
+                    },
+                    indent=2,
+                )
+            )
             return
 
+        metrics_settings = load_worker_metrics_settings()
+        _metrics.add_gauge("outbox", _get_outbox(settings.state_db_path).stats)
+        _metrics.add_gauge("router", get_router_client(settings.router_api_base_url).stats)
+        if metrics_settings.port:
+            serve_metrics(_metrics, metrics_settings.host, metrics_settings.port)
+            print(f"Metrics on http://{metrics_settings.host}:{metrics_settings.port}/metrics")
+
+        sender = OutboxSender(
+            lambda: send_pending_replies(settings, inbox_api, outbox_log),
+            idle_seconds=_get_outbox(settings.state_db_path).settings.idle_seconds,
+            name="mailslurp-sender",
+            on_error=lambda exc: _metrics.count_error("outbox_sender_failure", detail=str(exc)),
+        )
+        sender.start()
+
+        poll = AdaptivePoll(settings.poll_min_seconds, settings.poll_seconds)
         print(
             f"MailSlurp worker started for {inbox.email_address}. "
-            f"Polling every {settings.poll_seconds}s."
+            f"Polling every {poll.min_seconds}-{poll.max_seconds}s."
         )
         while True:
             try:
-                results = process_batch(settings, inbox, inbox_api, email_api)
+                results = process_batch(settings, inbox, inbox_api, email_api, source)
                 if results:
+                    sender.wake()
                     print(json.dumps({"processed": len(results), "results": results}, indent=2))
+                delay = poll.next_delay(len(results), batch_full=len(results) >= settings.max_batch)
+                # While the router's breaker is open every route fails fast; do not spin on it.
+                delay = max(delay, get_router_client(settings.router_api_base_url).retry_after())
             except KeyboardInterrupt:
                 print("Stopping MailSlurp worker.")
+                sender.stop(timeout_s=30)
                 return
             except Exception as exc:  # noqa: BLE001
                 print(json.dumps({"error": f"worker_loop_failure: {exc}"}))
-            time.sleep(settings.poll_seconds)
+                _metrics.count_error("worker_loop_failure", detail=str(exc))
+                delay = poll.next_delay(0, batch_full=False)
+            print_summary_if_due(_metrics, metrics_settings.summary_seconds)
+            time.sleep(delay)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+
+PRUNE_INTERVAL_SECONDS = 3600
+# Outbox status -> email_messages.delivery_status reported to the router.
+_DELIVERY_STATUS = {"PENDING": "QUEUED", "SENT": "SENT", "FAILED": "FAILED"}
+
+
+class PermanentSendError(Exception):
+    """Delivery can never succeed (e.g. the provider blocks sending); the reply is failed without retries."""
+
+
+@dataclass(frozen=True)
+class OutboxSettings:
+    batch_size: int
+    max_attempts: int
+    retry_base_seconds: float
+    retry_max_seconds: float
+    lease_seconds: float
+    idle_seconds: float
+
+
+def load_outbox_settings() -> OutboxSettings:
+    return OutboxSettings(
+        batch_size=max(int(os.getenv("OUTBOX_BATCH_SIZE", "20")), 1),
+        max_attempts=max(int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8")), 1),
+        retry_base_seconds=max(float(os.getenv("OUTBOX_RETRY_BASE_SECONDS", "5")), 0.0),
+        retry_max_seconds=max(float(os.getenv("OUTBOX_RETRY_MAX_SECONDS", "900")), 1.0),
+        lease_seconds=max(float(os.getenv("OUTBOX_LEASE_SECONDS", "120")), 5.0),
+        idle_seconds=max(float(os.getenv("OUTBOX_IDLE_SECONDS", "2")), 0.1),
+    )
+
+
+@dataclass(frozen=True)
+class OutboxItem:
+    outbox_id: int
+    source_message_id: str
+    reply: dict[str, Any]
+    attempts: int
+
+
+def _utc_ts(dt: datetime) -> str:
+    return dt.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _ensure_outbox_table(conn: sqlite3.Connection) -> None:
+    conn.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS outbox (
+            outbox_id INTEGER PRIMARY KEY,
+            source_message_id TEXT NOT NULL UNIQUE,
+            reply_json TEXT NOT NULL,
+            ticket_ref TEXT,
+            reply_message_id INTEGER,
+            status TEXT NOT NULL CHECK (status IN ('PENDING', 'SENT', 'FAILED')),
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            last_error TEXT,
+            report_pending INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT NOT NULL,
+            finished_at TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox(status, next_attempt_at);
+        CREATE INDEX IF NOT EXISTS idx_outbox_report_pending ON outbox(outbox_id) WHERE report_pending = 1;
+        """
+    )
+
+
+class Outbox:
+    """Durable reply queue in the adapter state DB, so routing never waits on delivery.
+
+    Workers `enqueue` a reply (one per inbound message) and move on; a sender loop
+    calls `drain`, which leases a batch of due replies, sends them, and commits each
+    outcome as soon as its send returns. Failed sends are retried with jittered exponential
+    backoff up to `max_attempts`. A lease that is never completed (sender crash)
+    expires after `lease_seconds` and the reply becomes due again.
+
+    Delivery is at least once: a sender that crashes after a send but before its
+    outcome is committed sends that one reply again once the lease expires.
+
+    When the router gave a `reply_message_id`, the final outcome (SENT or FAILED) is
+    reported back to its `email_messages.delivery_status`, which the router wrote as
+    QUEUED. Unreported outcomes are retried on the next drain.
+    """
+
+    def __init__(self, state_db_path: Path, settings: OutboxSettings) -> None:
+        self.settings = settings
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(state_db_path, timeout=30.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL;")
+        self._conn.execute("PRAGMA synchronous=NORMAL;")
+        _ensure_outbox_table(self._conn)
+        self._last_prune = 0.0
+
+    def enqueue(
+        self,
+        source_message_id: str,
+        reply: dict[str, Any],
+        ticket_ref: str | None = None,
+        reply_message_id: int | None = None,
+    ) -> bool:
+        """Queue the reply to `source_message_id`; False if one is already queued."""
+        with self._lock:
+            with self._conn:
+                cursor = self._conn.execute(
+                    """
+                    INSERT OR IGNORE INTO outbox (
+                        source_message_id, reply_json, ticket_ref, reply_message_id,
+                        status, next_attempt_at, report_pending, created_at
+                    ) VALUES (?, ?, ?, ?, 'PENDING', ?, 0, ?);
+                    """,
+                    (
+                        source_message_id,
+                        json.dumps(reply, ensure_ascii=True),
+                        ticket_ref,
+                        reply_message_id,
+                        time.time(),
+                        _utc_ts(datetime.now(UTC)),
+                    ),
+                )
+        return cursor.rowcount == 1
+
+    def _lease_due(self, limit: int) -> list[OutboxItem]:
+        now = time.time()
+        with self._lock:
+            with self._conn:
+                # BEGIN IMMEDIATE: two senders on the same file cannot lease the same rows.
+                self._conn.execute("BEGIN IMMEDIATE;")
+                rows = self._conn.execute(
+                    """
+                    SELECT outbox_id, source_message_id, reply_json, attempts
+                    FROM outbox
+                    WHERE status = 'PENDING' AND next_attempt_at <= ?
+                    ORDER BY outbox_id
+                    LIMIT ?;
+                    """,
+                    (now, limit),
+                ).fetchall()
+                self._conn.executemany(
+                    "UPDATE outbox SET attempts = attempts + 1, next_attempt_at = ? WHERE outbox_id = ?;",
+                    [(now + self.settings.lease_seconds, row[0]) for row in rows],
+                )
+        return [
+            OutboxItem(outbox_id=row[0], source_message_id=row[1], reply=json.loads(row[2]), attempts=row[3] + 1)
+            for row in rows
+        ]
+
+    def _retry_delay(self, attempts: int) -> float:
+        ceiling = min(self.settings.retry_base_seconds * 2 ** (attempts - 1), self.settings.retry_max_seconds)
+        # Equal jitter: at least half the backoff, so retries still spread out.
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+    def drain(
+        self,
+        send: Callable[[dict[str, Any]], None],
+        report: Callable[[list[dict[str, Any]]], bool] | None = None,
+        limit: int | None = None,
+    ) -> dict[str, int]:
+        """Send one batch of due replies with `send(reply)`; returns counts for the batch.
+
+        `send` raises on failure (`PermanentSendError` for failures not worth retrying).
+        Each outcome is committed as soon as its send returns, so a crash mid-batch
+        only leaves the reply being sent at that moment to go out again.
+        """
+        items = self._lease_due(limit or self.settings.batch_size)
+        counts = {"leased": len(items), "sent": 0, "retrying": 0, "failed": 0}
+        for item in items:
+            try:
+                send(item.reply)
+            except PermanentSendError as exc:
+                self._finish(item.outbox_id, "FAILED", str(exc))
+                counts["failed"] += 1
+            except Exception as exc:  # noqa: BLE001
+                error = f"{type(exc).__name__}: {exc}"
+                if item.attempts >= self.settings.max_attempts:
+                    self._finish(item.outbox_id, "FAILED", error)
+                    counts["failed"] += 1
+                else:
+                    self._retry_later(item.outbox_id, time.time() + self._retry_delay(item.attempts), error)
+                    counts["retrying"] += 1
+            else:
+                self._finish(item.outbox_id, "SENT", None)
+                counts["sent"] += 1
+
+        counts["reported"] = self._report(report) if report is not None else 0
+        return counts
+
+    def _finish(self, outbox_id: int, status: str, error: str | None) -> None:
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    """
+                    UPDATE outbox
+                    SET status = ?, finished_at = ?, last_error = ?,
+                        report_pending = (reply_message_id IS NOT NULL)
+                    WHERE outbox_id = ?;
+                    """,
+                    (status, _utc_ts(datetime.now(UTC)), error, outbox_id),
+                )
+
+    def _retry_later(self, outbox_id: int, next_attempt_at: float, error: str) -> None:
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE outbox SET next_attempt_at = ?, last_error = ? WHERE outbox_id = ?;",
+                    (next_attempt_at, error, outbox_id),
+                )
+
+    def _report(self, report: Callable[[list[dict[str, Any]]], bool], limit: int = 500) -> int:
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT outbox_id, reply_message_id, status
+                FROM outbox
+                WHERE report_pending = 1
+                ORDER BY outbox_id
+                LIMIT ?;
+                """,
+                (limit,),
+            ).fetchall()
+        if not rows:
+            return 0
+        updates = [{"message_id": row[1], "delivery_status": _DELIVERY_STATUS[row[2]]} for row in rows]
+        if not report(updates):
+            return 0
+        with self._lock:
+            with self._conn:
+                # Only clear rows whose status is still the one just reported.
+                self._conn.executemany(
+                    "UPDATE outbox SET report_pending = 0 WHERE outbox_id = ? AND status = ?;",
+                    [(row[0], row[2]) for row in rows],
+                )
+        return len(rows)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status;").fetchall()
+        counts = {"PENDING": 0, "SENT": 0, "FAILED": 0}
+        counts.update({str(status): int(count) for status, count in rows})
+        return counts
+
+    def prune_if_due(self, retention_days: float) -> int:
+        """Delete finished, reported replies older than `retention_days` (at most once an hour)."""
+        if retention_days <= 0:
+            return 0
+        if self._last_prune and time.monotonic() - self._last_prune < PRUNE_INTERVAL_SECONDS:
+            return 0
+        cutoff = _utc_ts(datetime.now(UTC) - timedelta(days=retention_days))
+        with self._lock:
+            with self._conn:
+                deleted = self._conn.execute(
+                    """
+                    DELETE FROM outbox
+                    WHERE status IN ('SENT', 'FAILED') AND report_pending = 0 AND finished_at < ?;
+                    """,
+                    (cutoff,),
+                ).rowcount
+            self._last_prune = time.monotonic()
+        return deleted
+
+
+class OutboxSender:
+    """Background thread that keeps calling `drain` until stopped.
+
+    A batch that leased anything is followed immediately by the next one; otherwise
+    the thread waits `idle_seconds`, or less when `wake()` signals new replies.
+    """
+
+    def __init__(
+        self,
+        drain: Callable[[], dict[str, int]],
+        idle_seconds: float,
+        name: str = "outbox-sender",
+        on_error: Callable[[Exception], None] | None = None,
+    ) -> None:
+        self._drain = drain
+        self._idle_seconds = idle_seconds
+        self._on_error = on_error
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name=name, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def stop(self, timeout_s: float | None = None) -> None:
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout=timeout_s)
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                summary = self._drain()
+            except Exception as exc:  # noqa: BLE001
+                print(json.dumps({"error": f"outbox_sender_failure: {exc}"}))
+                if self._on_error is not None:
+                    self._on_error(exc)
+                summary = {"leased": 0}
+            if summary.get("sent") or summary.get("failed") or summary.get("retrying"):
+                print(json.dumps({"outbox": summary}))
+            if summary.get("leased"):
+                continue
+            self._wake.wait(self._idle_seconds)
+            self._wake.clear()
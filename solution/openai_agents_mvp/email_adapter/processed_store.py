@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+
+# SQLite's default limit on host parameters is 999 on older builds.
+_IN_CHUNK = 500
+PRUNE_INTERVAL_SECONDS = 3600
+
+
+def _utc_ts(dt: datetime) -> str:
+    return dt.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _ensure_claims_table(conn: sqlite3.Connection, id_column: str) -> None:
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS message_claims (
+            {id_column} TEXT PRIMARY KEY,
+            claimed_by TEXT NOT NULL,
+            claimed_at TEXT NOT NULL,
+            lease_expires_at REAL NOT NULL DEFAULT 0
+        );
+        """
+    )
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(message_claims);")}
+    if "lease_expires_at" not in columns:
+        # Claims from before leases: treat them as expired.
+        conn.execute("ALTER TABLE message_claims ADD COLUMN lease_expires_at REAL NOT NULL DEFAULT 0;")
+    conn.commit()
+
+
+class ProcessedStore:
+    """Adapter state DB behind one long-lived WAL connection.
+
+    Dedupe checks a whole page with one `IN (...)` query and remembers recently seen
+    processed ids in memory. `record` buffers rows; they are written in one
+    transaction every `flush_every` records and by `flush()`, which workers call
+    at the end of each batch before marking messages read. Buffered ids already
+    count as processed for `processed_ids`.
+
+    The connection is shared by the worker's threads under a lock. Other processes
+    on the same file still work: WAL lets them read while one writes.
+
+    Worker processes sharing the file split the inbox with leases in `message_claims`:
+    `claim` hands each message to one worker until its lease expires, so a crashed
+    worker's messages are taken over by the others.
+    """
+
+    def __init__(
+        self,
+        state_db_path: Path,
+        id_column: str,
+        flush_every: int = 50,
+        cache_size: int = 20000,
+    ) -> None:
+        self.state_db_path = state_db_path
+        self._id_column = id_column
+        self._flush_every = max(flush_every, 1)
+        self._cache_size = max(cache_size, 0)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(state_db_path, timeout=30.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL;")
+        # WAL + NORMAL: commits no longer fsync; a power loss can drop the last few, never corrupt.
+        self._conn.execute("PRAGMA synchronous=NORMAL;")
+        _ensure_claims_table(self._conn, id_column)
+        self._pending: dict[str, tuple[Any, ...]] = {}
+        self._known: OrderedDict[str, None] = OrderedDict()
+        self._last_prune = 0.0
+
+    def _remember(self, message_ids: Iterable[str]) -> None:
+        if not self._cache_size:
+            return
+        for message_id in message_ids:
+            self._known[message_id] = None
+            self._known.move_to_end(message_id)
+        while len(self._known) > self._cache_size:
+            self._known.popitem(last=False)
+
+    def processed_ids(self, message_ids: Iterable[str]) -> set[str]:
+        """Subset of `message_ids` already processed (recorded or buffered)."""
+        wanted = list(dict.fromkeys(message_ids))
+        with self._lock:
+            found = {message_id for message_id in wanted if message_id in self._known or message_id in self._pending}
+            lookup = [message_id for message_id in wanted if message_id not in found]
+            for start in range(0, len(lookup), _IN_CHUNK):
+                chunk = lookup[start : start + _IN_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT {self._id_column} FROM processed_messages WHERE {self._id_column} IN ({placeholders});",
+                    chunk,
+                ).fetchall()
+                found.update(str(row[0]) for row in rows)
+            self._remember(found)
+        return found
+
+    def has_processed(self, message_id: str) -> bool:
+        return bool(self.processed_ids([message_id]))
+
+    def claim(
+        self,
+        message_ids: Iterable[str],
+        worker_id: str,
+        lease_seconds: float,
+        limit: int | None = None,
+    ) -> list[str]:
+        """Lease up to `limit` of `message_ids` to `worker_id`; returns the ids won, in input order.
+
+        An id is free when it is not processed and has no live lease (or the lease is
+        already `worker_id`'s). The whole page is claimed in one write transaction,
+        with one guarded `UPDATE ... WHERE`, so two workers never win the same id.
+        """
+        if limit == 0:
+            return []
+        column = self._id_column
+        now = time.time()
+        claimed_at = _utc_ts(datetime.now(UTC))
+        free: set[str] = set()
+        with self._lock:
+            # Buffered records are processed already; `_pending` is only read under the lock.
+            wanted = [message_id for message_id in dict.fromkeys(message_ids) if message_id not in self._pending]
+            if not wanted:
+                return []
+            with self._conn:
+                # Take the write lock up front: the read below must not go stale before the UPDATE.
+                self._conn.execute("BEGIN IMMEDIATE;")
+                self._conn.executemany(
+                    f"INSERT OR IGNORE INTO message_claims ({column}, claimed_by, claimed_at) VALUES (?, '', ?);",
+                    [(message_id, claimed_at) for message_id in wanted],
+                )
+                for start in range(0, len(wanted), _IN_CHUNK):
+                    chunk = wanted[start : start + _IN_CHUNK]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows = self._conn.execute(
+                        f"""
+                        SELECT c.{column}
+                        FROM message_claims c
+                        WHERE c.{column} IN ({placeholders})
+                          AND (c.lease_expires_at < ? OR c.claimed_by = ?)
+                          AND NOT EXISTS (SELECT 1 FROM processed_messages p WHERE p.{column} = c.{column});
+                        """,
+                        [*chunk, now, worker_id],
+                    ).fetchall()
+                    free.update(str(row[0]) for row in rows)
+                picked = [message_id for message_id in wanted if message_id in free][:limit]
+                for start in range(0, len(picked), _IN_CHUNK):
+                    chunk = picked[start : start + _IN_CHUNK]
+                    placeholders = ",".join("?" * len(chunk))
+                    self._conn.execute(
+                        f"""
+                        UPDATE message_claims
+                        SET claimed_by = ?, claimed_at = ?, lease_expires_at = ?
+                        WHERE {column} IN ({placeholders})
+                          AND (lease_expires_at < ? OR claimed_by = ?);
+                        """,
+                        [worker_id, claimed_at, now + lease_seconds, *chunk, now, worker_id],
+                    )
+        return picked
+
+    def release(self, message_ids: Iterable[str], worker_id: str) -> None:
+        """Hand claimed messages back (e.g. after a failure) so any worker can take them at once."""
+        released = list(dict.fromkeys(message_ids))
+        with self._lock:
+            with self._conn:
+                for start in range(0, len(released), _IN_CHUNK):
+                    chunk = released[start : start + _IN_CHUNK]
+                    placeholders = ",".join("?" * len(chunk))
+                    self._conn.execute(
+                        f"""
+                        UPDATE message_claims
+                        SET claimed_by = '', lease_expires_at = 0
+                        WHERE {self._id_column} IN ({placeholders}) AND claimed_by = ?;
+                        """,
+                        [*chunk, worker_id],
+                    )
+
+    def record(
+        self,
+        message_id: str,
+        internet_message_id: str | None,
+        sender_email: str,
+        subject: str,
+        ticket_ref: str | None,
+        processed_ok: bool,
+        error_text: str | None,
+    ) -> None:
+        row = (
+            message_id,
+            internet_message_id,
+            sender_email,
+            subject,
+            ticket_ref,
+            1 if processed_ok else 0,
+            error_text,
+            _utc_ts(datetime.now(UTC)),
+        )
+        with self._lock:
+            self._pending[message_id] = row
+            if len(self._pending) >= self._flush_every:
+                self.flush()
+
+    def flush(self) -> int:
+        with self._lock:
+            if not self._pending:
+                return 0
+            rows = list(self._pending.values())
+            with self._conn:
+                self._conn.executemany(
+                    f"""
+                    INSERT OR REPLACE INTO processed_messages (
+                        {self._id_column},
+                        internet_message_id,
+                        sender_email,
+                        subject,
+                        ticket_ref,
+                        processed_ok,
+                        error_text,
+                        processed_at
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?);
+                    """,
+                    rows,
+                )
+            self._remember(self._pending)
+            self._pending.clear()
+            return len(rows)
+
+    def prune(self, retention_days: float) -> int:
+        """Delete records processed (and expired claims taken) more than `retention_days` ago."""
+        cutoff = _utc_ts(datetime.now(UTC) - timedelta(days=retention_days))
+        with self._lock:
+            with self._conn:
+                deleted = self._conn.execute(
+                    "DELETE FROM processed_messages WHERE processed_at < ?;",
+                    (cutoff,),
+                ).rowcount
+                deleted += self._conn.execute(
+                    "DELETE FROM message_claims WHERE claimed_at < ? AND lease_expires_at < ?;",
+                    (cutoff, time.time()),
+                ).rowcount
+            self._known.clear()
+            self._last_prune = time.monotonic()
+        return deleted
+
+    def prune_if_due(self, retention_days: float) -> int:
+        if retention_days <= 0:
+            return 0
+        if self._last_prune and time.monotonic() - self._last_prune < PRUNE_INTERVAL_SECONDS:
+            return 0
+        return self.prune(retention_days)
+
+    def close(self) -> None:
+        with self._lock:
+            self.flush()
+            self._conn.close()
@@ -0,0 +1,354 @@
+from __future__ import annotations
+
+import http.client
+import json
+import os
+import random
+import select
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+from urllib.parse import urlsplit
+
+
+# 503 is what the router returns when its write queue is full (nothing was written);
+# 502 comes from a proxy that could not reach it. Other 5xx may follow a partial
+# write, and `/inbound` is not idempotent, so they are not retried.
+RETRY_STATUSES = {502, 503}
+
+
+@dataclass(frozen=True)
+class RouterClientSettings:
+    base_url: str
+    transport: str
+    connect_timeout_seconds: float
+    read_timeout_seconds: float
+    max_retries: int
+    retry_backoff_seconds: float
+    breaker_failures: int
+    breaker_reset_seconds: float
+
+
+def load_router_client_settings(base_url: str) -> RouterClientSettings:
+    transport = os.getenv("ROUTER_TRANSPORT", "http").strip().lower()
+    if transport not in {"http", "inprocess"}:
+        transport = "http"
+
+    return RouterClientSettings(
+        base_url=base_url.rstrip("/"),
+        transport=transport,
+        connect_timeout_seconds=max(float(os.getenv("ROUTER_CONNECT_TIMEOUT_SECONDS", "3")), 0.1),
+        read_timeout_seconds=max(float(os.getenv("ROUTER_READ_TIMEOUT_SECONDS", "45")), 1.0),
+        max_retries=max(int(os.getenv("ROUTER_MAX_RETRIES", "2")), 0),
+        retry_backoff_seconds=max(float(os.getenv("ROUTER_RETRY_BACKOFF_SECONDS", "0.25")), 0.0),
+        breaker_failures=max(int(os.getenv("ROUTER_BREAKER_FAILURES", "5")), 1),
+        breaker_reset_seconds=max(float(os.getenv("ROUTER_BREAKER_RESET_SECONDS", "30")), 1.0),
+    )
+
+
+def _error_output(error: str, reply_body: str) -> dict[str, Any]:
+    return {
+        "ok": False,
+        "error": error,
+        "reply_subject": "Routing Error",
+        "reply_body": reply_body,
+    }
+
+
+class _RequestNotSent(Exception):
+    """The router never saw the whole request (connect or send failed), so it is safe to resend."""
+
+
+class RouterUnavailableError(Exception):
+    """The router did not take the message: circuit open, unreachable, or overloaded (502/503).
+
+    Nothing was written, so the caller should leave the message for a later retry
+    rather than reply to it. `error` is the short code (e.g. `router_circuit_open`).
+    """
+
+    def __init__(self, error: str, detail: str) -> None:
+        super().__init__(f"{error}: {detail}")
+        self.error = error
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failed calls and rejects calls while open.
+
+    After `reset_seconds`, a single trial call is let through: success closes the
+    breaker, failure re-opens it for another `reset_seconds`.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_in_flight = False
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self._opened_at is not None
+
+    def retry_after(self) -> float:
+        """Seconds until the next trial call is let through (0 while closed)."""
+        with self._lock:
+            if self._opened_at is None:
+                return 0.0
+            return max(self.reset_seconds - (time.monotonic() - self._opened_at), 0.0)
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial_in_flight or time.monotonic() - self._opened_at < self.reset_seconds:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class HttpRouterClient:
+    """POSTs to the router (`/inbound`, `/delivery`) over keep-alive connections, one per calling thread.
+
+    Worker pool threads each reuse their own connection across emails, so the TCP
+    (and TLS) setup is paid once per thread rather than once per email.
+    """
+
+    def __init__(self, settings: RouterClientSettings) -> None:
+        parts = urlsplit(settings.base_url)
+        self._connection_class = (
+            http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        )
+        self._host = parts.hostname or "127.0.0.1"
+        self._port = parts.port
+        self._base_path = parts.path.rstrip("/")
+        self._headers = {"Content-Type": "application/json", "Connection": "keep-alive"}
+        self._settings = settings
+        self._breaker = CircuitBreaker(settings.breaker_failures, settings.breaker_reset_seconds)
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._retries = 0
+
+    @property
+    def breaker(self) -> CircuitBreaker:
+        return self._breaker
+
+    def route(self, payload: dict[str, Any]) -> dict[str, Any]:
+        """Route one message; raises `RouterUnavailableError` when the router did not take it."""
+        if not self._breaker.allow():
+            raise RouterUnavailableError(
+                "router_circuit_open",
+                "the router failed repeatedly and is being given time to recover",
+            )
+
+        body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        result: dict[str, Any] = {}
+        unavailable: RouterUnavailableError | None = None
+        for attempt in range(self._settings.max_retries + 1):
+            if attempt:
+                with self._stats_lock:
+                    self._retries += 1
+                # Full jitter, so workers that failed together do not retry together.
+                time.sleep(random.uniform(0, self._settings.retry_backoff_seconds * 2**attempt))
+            try:
+                status, raw = self._post("/inbound", body)
+            except _RequestNotSent as exc:
+                unavailable = RouterUnavailableError("router_unreachable", str(exc.__cause__ or exc))
+                continue
+            except Exception as exc:  # noqa: BLE001
+                # Sent but no answer (e.g. read timeout): the router may have routed it, so do not resend.
+                unavailable = None
+                result = _error_output("router_unreachable", f"Routing API call failed: {exc}")
+                break
+            unavailable = None
+
+            if status < 400:
+                try:
+                    routed = json.loads(raw.decode("utf-8"))
+                except ValueError as exc:
+                    result = _error_output("router_unreachable", f"Routing API call failed: {exc}")
+                    break
+                self._breaker.record_success()
+                return routed
+
+            body_text = raw.decode("utf-8", errors="replace")
+            if status in RETRY_STATUSES:
+                # Nothing was written; the message is left for a later poll once retries run out.
+                unavailable = RouterUnavailableError(f"router_http_{status}", body_text[:400])
+                continue
+            result = _error_output(
+                f"router_http_{status}",
+                f"Routing API returned HTTP {status}. Body: {body_text[:400]}",
+            )
+            if status < 500:
+                # The router is up and answered; the request itself was rejected.
+                self._breaker.record_success()
+                return result
+            break
+
+        self._breaker.record_failure()
+        if unavailable is not None:
+            raise unavailable
+        return result
+
+    def retry_after(self) -> float:
+        """How long a worker should hold off polling: the open breaker's remaining time."""
+        return self._breaker.retry_after()
+
+    def stats(self) -> dict[str, int]:
+        with self._stats_lock:
+            retries = self._retries
+        return {"retries": retries, "breaker_open": int(self._breaker.is_open)}
+
+    def report_delivery(self, updates: list[dict[str, Any]]) -> bool:
+        """POST reply delivery outcomes to `/delivery`; False when the router did not take them.
+
+        Not retried here: the outbox keeps unreported outcomes and sends them again later.
+        """
+        body = json.dumps({"updates": updates}, separators=(",", ":")).encode("utf-8")
+        try:
+            status, _ = self._post("/delivery", body)
+        except Exception:  # noqa: BLE001
+            return False
+        return status < 400
+
+    def close(self) -> None:
+        connection = getattr(self._local, "connection", None)
+        self._local.connection = None
+        if connection is not None:
+            connection.close()
+
+    def _connect(self) -> http.client.HTTPConnection:
+        connection = self._connection_class(self._host, self._port, timeout=self._settings.connect_timeout_seconds)
+        try:
+            connection.connect()
+        except OSError as exc:
+            connection.close()
+            raise _RequestNotSent(str(exc)) from exc
+        connection.sock.settimeout(self._settings.read_timeout_seconds)
+        self._local.connection = connection
+        return connection
+
+    def _send(self, connection: http.client.HTTPConnection, path: str, body: bytes) -> tuple[int, bytes]:
+        try:
+            connection.request("POST", f"{self._base_path}{path}", body=body, headers=self._headers)
+        except (OSError, http.client.ImproperConnectionState) as exc:
+            # The body was not fully written, so the router cannot have acted on it.
+            raise _RequestNotSent(str(exc)) from exc
+        # From here the router may have processed the request: a failure is not resent.
+        response = connection.getresponse()
+        raw = response.read()
+        if response.will_close:
+            self.close()
+        return response.status, raw
+
+    @staticmethod
+    def _is_closed_by_peer(connection: http.client.HTTPConnection) -> bool:
+        # An idle keep-alive socket only turns readable once the server closed it.
+        sock = connection.sock
+        if sock is None:
+            return True
+        readable, _, _ = select.select([sock], [], [], 0)
+        return bool(readable)
+
+    def _post(self, path: str, body: bytes) -> tuple[int, bytes]:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None and self._is_closed_by_peer(connection):
+            self.close()
+            connection = None
+        if connection is not None:
+            try:
+                return self._send(connection, path, body)
+            except _RequestNotSent:
+                # Failed while writing (e.g. broken pipe): resend once on a fresh connection.
+                self.close()
+            except Exception:
+                self.close()
+                raise
+        try:
+            return self._send(self._connect(), path, body)
+        except Exception:
+            self.close()
+            raise
+
+
+class InProcessRouterClient:
+    """Calls `RoutingService` directly when the worker runs next to the router database.
+
+    Skips HTTP and JSON entirely; the service (and its writer thread) is built on
+    the first call, from the same `.env` the API would load.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._service = None
+
+    def _get_service(self):
+        with self._lock:
+            if self._service is None:
+                from mvp_agent import RoutingService, load_settings
+
+                self._service = RoutingService(load_settings())
+            return self._service
+
+    def route(self, payload: dict[str, Any]) -> dict[str, Any]:
+        from mvp_agent import InboundMessage, WriteQueueFullError
+
+        try:
+            routed = self._get_service().process_inbound(InboundMessage(**payload))
+        except WriteQueueFullError as exc:
+            # Nothing was written: backpressure, so the message is retried on a later poll.
+            raise RouterUnavailableError("router_http_503", f"write_queue_full: {exc}") from exc
+        except Exception as exc:  # noqa: BLE001
+            return _error_output("router_inprocess_failure", f"Routing service call failed: {exc}")
+        return routed.model_dump(mode="json")
+
+    def report_delivery(self, updates: list[dict[str, Any]]) -> bool:
+        from mvp_agent import DeliveryUpdate
+
+        try:
+            self._get_service().record_delivery([DeliveryUpdate(**update) for update in updates])
+        except Exception:  # noqa: BLE001
+            return False
+        return True
+
+    def retry_after(self) -> float:
+        return 0.0
+
+    def stats(self) -> dict[str, int]:
+        return {"retries": 0, "breaker_open": 0}
+
+    def close(self) -> None:
+        return None
+
+
+RouterClient = HttpRouterClient | InProcessRouterClient
+
+_clients: dict[str, RouterClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_router_client(base_url: str) -> RouterClient:
+    """Process-wide client for `base_url`, built from the `ROUTER_*` env settings on first use."""
+    with _clients_lock:
+        client = _clients.get(base_url)
+        if client is None:
+            settings = load_router_client_settings(base_url)
+            client = InProcessRouterClient() if settings.transport == "inprocess" else HttpRouterClient(settings)
+            _clients[base_url] = client
+        return client
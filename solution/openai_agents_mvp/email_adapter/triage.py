@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from collections import Counter, deque
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import TypeVar
+
+from mvp_agent.classifier import heuristic_classification
+
+
+PRIORITY_RANK = {"CRITICAL": 0, "HIGH": 1, "MEDIUM": 2, "LOW": 3}
+AUTOMATABLE = "automatable"
+HUMAN = "human"
+# Below this confidence the router does not trust the intent and hands the request to a desk.
+_MIN_CONFIDENCE = 0.65
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class Triage:
+    """Provisional priority and lane for an inbound email, before the router classifies it."""
+
+    priority: str
+    lane: str
+    intent_code: str
+
+    @property
+    def rank(self) -> int:
+        return PRIORITY_RANK.get(self.priority, len(PRIORITY_RANK))
+
+
+def triage(subject: str, body: str) -> Triage:
+    """Triage with the router's keyword heuristic (no model call, microseconds per email).
+
+    The lane is a guess at the router's outcome: confident, objective requests with
+    no multi-desk hint are likely automatable; everything else likely goes to a person.
+    """
+    classification = heuristic_classification(subject, body)
+    automatable = (
+        classification.confidence >= _MIN_CONFIDENCE
+        and classification.objective_request
+        and not classification.requires_multi_desk_hint
+    )
+    return Triage(
+        priority=classification.priority,
+        lane=AUTOMATABLE if automatable else HUMAN,
+        intent_code=classification.intent_code,
+    )
+
+
+def most_urgent(triages: list[Triage]) -> Triage:
+    """Triage for a group handled as one unit (a Gmail thread): its most urgent member, human lane if any is."""
+    top = min(triages, key=lambda item: item.rank)
+    lane = HUMAN if any(item.lane == HUMAN for item in triages) else AUTOMATABLE
+    return Triage(priority=top.priority, lane=lane, intent_code=top.intent_code)
+
+
+def run_by_priority(
+    pool: ThreadPoolExecutor,
+    jobs: list[tuple[Triage, Callable[[], T]]],
+    max_running: int,
+    lane_budgets: dict[str, int],
+    on_error: Callable[[int, Exception], T],
+) -> list[T]:
+    """Run `jobs` on `pool`, most urgent first; returns their results in job order.
+
+    At most `max_running` jobs run at once, and at most `lane_budgets[lane]` of them
+    per lane, so a burst in one lane cannot take every thread from the other. Jobs
+    are only handed to the pool when a slot is free: the pool's own FIFO queue never
+    decides the order. A job that raises gets `on_error(job index, exception)` as its
+    result; the other jobs still run.
+    """
+    waiting: dict[str, deque[int]] = {}
+    for idx in sorted(range(len(jobs)), key=lambda idx: (jobs[idx][0].rank, idx)):
+        waiting.setdefault(jobs[idx][0].lane, deque()).append(idx)
+
+    results: list[T | None] = [None] * len(jobs)
+    running: dict[Future[T], tuple[int, str]] = {}
+    in_lane: Counter[str] = Counter()
+    while waiting or running:
+        while len(running) < max_running:
+            ready = [
+                queue[0]
+                for lane, queue in waiting.items()
+                if in_lane[lane] < max(lane_budgets.get(lane, max_running), 1)
+            ]
+            if not ready:
+                break
+            idx = min(ready, key=lambda idx: (jobs[idx][0].rank, idx))
+            lane = jobs[idx][0].lane
+            waiting[lane].popleft()
+            if not waiting[lane]:
+                del waiting[lane]
+            in_lane[lane] += 1
+            running[pool.submit(jobs[idx][1])] = (idx, lane)
+
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            idx, lane = running.pop(future)
+            in_lane[lane] -= 1
+            try:
+                results[idx] = future.result()
+            except Exception as exc:  # noqa: BLE001
+                results[idx] = on_error(idx, exc)
+    return results  # type: ignore[return-value]
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+from mvp_agent.metrics import DEFAULT_BUCKETS, Histogram, render_histogram
+
+
+@dataclass(frozen=True)
+class WorkerMetricsSettings:
+    host: str
+    port: int
+    summary_seconds: float
+
+
+def load_worker_metrics_settings() -> WorkerMetricsSettings:
+    return WorkerMetricsSettings(
+        host=os.getenv("EMAIL_METRICS_HOST", "127.0.0.1").strip() or "127.0.0.1",
+        port=max(int(os.getenv("EMAIL_METRICS_PORT", "0")), 0),
+        summary_seconds=max(float(os.getenv("EMAIL_METRICS_SUMMARY_SECONDS", "60")), 0.0),
+    )
+
+
+class WorkerMetrics:
+    """Throughput, per-stage latency, queue depth, retries and errors for one worker process.
+
+    Stages cover each external dependency separately: the inbox (`list`, `fetch`),
+    the router (`route`), the mail API (`send`, `mark_read`) and the state DB
+    (`claim`, `state_write`), so the slowest one stands out. Rendered as Prometheus
+    text for `/metrics` and as JSON summaries of the interval since the previous one.
+    """
+
+    def __init__(self, adapter: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.adapter = adapter
+        self._buckets = buckets
+        self._lock = threading.Lock()
+        self._stages: dict[str, Histogram] = {}
+        self._messages: Counter[str] = Counter()
+        self._errors: Counter[str] = Counter()
+        self._retries: Counter[str] = Counter()
+        self._values: dict[tuple[str, str], float] = {}
+        self._gauges: dict[str, Callable[[], dict[str, Any]]] = {}
+        self._last_error: str | None = None
+        self._summary_at = time.monotonic()
+        self._summary_base: dict[str, Any] = self._snapshot()
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            hist = self._stages.get(stage)
+            if hist is None:
+                hist = self._stages[stage] = Histogram(len(self._buckets))
+            hist.observe(self._buckets, seconds)
+
+    @contextmanager
+    def time(self, stage: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def count_message(self, status: str) -> None:
+        with self._lock:
+            self._messages[status] += 1
+
+    def count_error(self, kind: str, count: int = 1, detail: str | None = None) -> None:
+        if count <= 0:
+            return
+        with self._lock:
+            self._errors[kind] += count
+            if detail is not None:
+                self._last_error = f"{kind}: {detail}"
+
+    def count_retries(self, kind: str, count: int = 1) -> None:
+        if count <= 0:
+            return
+        with self._lock:
+            self._retries[kind] += count
+
+    def set_gauge(self, name: str, key: str, value: float) -> None:
+        with self._lock:
+            self._values[(name, key)] = value
+
+    def add_gauge(self, name: str, read: Callable[[], dict[str, Any]]) -> None:
+        """Gauge family read on demand, e.g. outbox counts by status; `read` returns {key: value}."""
+        with self._lock:
+            self._gauges[name] = read
+
+    def _gauge_values(self) -> dict[tuple[str, str], float]:
+        with self._lock:
+            values = dict(self._values)
+            gauges = dict(self._gauges)
+        for name, read in gauges.items():
+            try:
+                values.update({(name, str(key)): float(value) for key, value in read().items()})
+            except Exception:  # noqa: BLE001
+                # A gauge must never break the endpoint (e.g. state DB busy).
+                continue
+        return values
+
+    def _snapshot(self) -> dict[str, Any]:
+        return {
+            "messages": Counter(self._messages),
+            "errors": Counter(self._errors),
+            "retries": Counter(self._retries),
+            "stages": {stage: list(hist.bucket_counts) + [hist.count, hist.total] for stage, hist in self._stages.items()},
+        }
+
+    def summary_due(self, interval_seconds: float) -> bool:
+        return interval_seconds > 0 and time.monotonic() - self._summary_at >= interval_seconds
+
+    def summary(self) -> dict[str, Any]:
+        """JSON-ready summary of the interval since the previous call, plus current gauges."""
+        now = time.monotonic()
+        with self._lock:
+            current = self._snapshot()
+            base, self._summary_base = self._summary_base, current
+            elapsed, self._summary_at = now - self._summary_at, now
+            last_error, self._last_error = self._last_error, None
+
+        messages = current["messages"] - base["messages"]
+        stages: dict[str, dict[str, float]] = {}
+        for stage, values in current["stages"].items():
+            before = base["stages"].get(stage, [0] * len(values))
+            delta = [after - prior for after, prior in zip(values, before)]
+            count, total = int(delta[-2]), delta[-1]
+            if count:
+                stages[stage] = {
+                    "count": count,
+                    "avg_ms": round(total / count * 1000, 3),
+                    "p95_ms": self._quantile_ms(delta[:-2], count, 0.95),
+                    "busy_share": round(total / elapsed, 3) if elapsed > 0 else 0.0,
+                }
+
+        gauges: dict[str, dict[str, float]] = {}
+        for (name, key), value in self._gauge_values().items():
+            gauges.setdefault(name, {})[key] = value
+        return {
+            "adapter": self.adapter,
+            "interval_seconds": round(elapsed, 3),
+            "messages": sum(messages.values()),
+            "messages_per_second": round(sum(messages.values()) / elapsed, 3) if elapsed > 0 else 0.0,
+            "by_status": dict(messages),
+            "stages": stages,
+            "errors": dict(current["errors"] - base["errors"]),
+            "retries": dict(current["retries"] - base["retries"]),
+            "gauges": gauges,
+            "last_error": last_error,
+        }
+
+    def _quantile_ms(self, bucket_counts: list[float], count: int, q: float) -> float | None:
+        # Upper bound of the bucket holding the q-th observation; None past the last bucket.
+        target = q * count
+        cumulative = 0.0
+        for bound, bucket_count in zip(self._buckets, bucket_counts):
+            cumulative += bucket_count
+            if cumulative >= target:
+                return round(bound * 1000, 3)
+        return None
+
+    def render_prometheus(self) -> str:
+        adapter = f'adapter="{self.adapter}"'
+        lines: list[str] = []
+        with self._lock:
+            counters = (
+                ("email_worker_messages_total", "Messages handled, by result status.", "status", self._messages),
+                ("email_worker_errors_total", "Errors, by kind.", "kind", self._errors),
+                ("email_worker_retries_total", "Retried operations, by kind.", "kind", self._retries),
+            )
+            for name, help_text, label, counter in counters:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} counter")
+                lines.extend(f'{name}{{{adapter},{label}="{key}"}} {value}' for key, value in sorted(counter.items()))
+            lines.append("# HELP email_worker_stage_duration_seconds Time spent per worker stage call.")
+            lines.append("# TYPE email_worker_stage_duration_seconds histogram")
+            for stage, hist in sorted(self._stages.items()):
+                lines.extend(
+                    render_histogram("email_worker_stage_duration_seconds", f'{adapter},stage="{stage}"', self._buckets, hist)
+                )
+        for (name, key), value in sorted(self._gauge_values().items()):
+            lines.append(f'email_worker_{name}{{{adapter},key="{key}"}} {value:g}')
+        return "\n".join(lines) + "\n"
+
+
+def serve_metrics(metrics: WorkerMetrics, host: str, port: int) -> ThreadingHTTPServer:
+    """Serve `GET /metrics` (Prometheus text) from a daemon thread; returns the running server."""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+            return None
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def print_summary_if_due(metrics: WorkerMetrics, interval_seconds: float) -> None:
+    if metrics.summary_due(interval_seconds):
+        print(json.dumps({"metrics": metrics.summary()}))
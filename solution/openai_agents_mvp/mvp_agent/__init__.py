@@ -1,12 +1,45 @@
-from .config import Settings, load_settings
-from .models import InboundMessage, IntentClassification, RoutingOutput
-from .service import RoutingService
-
-__all__ = [
-    "Settings",
-    "load_settings",
-    "InboundMessage",
-    "IntentClassification",
-    "RoutingOutput",
-    "RoutingService",
-]
+from __future__ import annotations
+
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .config import Settings, load_settings
+    from .models import (
+        DeliveryReport,
+        DeliveryUpdate,
+        InboundBatchRequest,
+        InboundBatchResponse,
+        InboundMessage,
+        IntentClassification,
+        RoutingOutput,
+    )
+    from .service import RoutingService
+    from .writer import WriteQueueFullError
+
+# Exports resolve on first access, so `import mvp_agent.config` (e.g. the
+# `cli.py status` fast path) does not pay for pydantic models or the service.
+_EXPORTS = {
+    "Settings": ".config",
+    "load_settings": ".config",
+    "DeliveryReport": ".models",
+    "DeliveryUpdate": ".models",
+    "InboundBatchRequest": ".models",
+    "InboundBatchResponse": ".models",
+    "InboundMessage": ".models",
+    "IntentClassification": ".models",
+    "RoutingOutput": ".models",
+    "RoutingService": ".service",
+    "WriteQueueFullError": ".writer",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
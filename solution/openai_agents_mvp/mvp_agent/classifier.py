@@ -1,12 +1,15 @@
 from __future__ import annotations
 
+import asyncio
 from pathlib import Path
-
-from agents import Agent, ModelSettings, Runner
-from agents.model_settings import Reasoning
+from typing import TYPE_CHECKING
 
 from .models import INTENT_CODES, IntentClassification
 
+if TYPE_CHECKING:
+    # The agents SDK takes ~1-2s to import; it is loaded on the first model call.
+    from agents import Agent, RunResult
+
 
 INTENT_KEYWORDS: dict[str, list[str]] = {
     "cash_balance": ["cash balance", "available cash", "cash position", "liquidity"],
@@ -47,6 +50,43 @@ INTENT_KEYWORDS: dict[str, list[str]] = {
 
 SUBJECTIVE_HINTS = {"advice", "recommend", "opinion", "best strategy", "what should we do"}
 MULTI_HINTS = {"failed", "investigation", "sanctions", "corporate action", "reconcile", "closure", "cross-desk"}
+# Checked in order; the first level with any hit wins, otherwise LOW.
+PRIORITY_HINTS: dict[str, set[str]] = {
+    "CRITICAL": {"urgent", "critical", "escalate"},
+    "HIGH": {"failed", "sanctions"},
+    "MEDIUM": {"amend", "dispute"},
+}
+
+
+def heuristic_classification(subject: str, body: str) -> IntentClassification:
+    """Keyword classification: the model fallback, and cheap enough for workers to triage with."""
+    text = f"{subject} {body}".lower()
+
+    best_intent = "fee_dispute"
+    best_hits = 0
+    for intent, keywords in INTENT_KEYWORDS.items():
+        hits = sum(1 for keyword in keywords if keyword in text)
+        if hits > best_hits:
+            best_hits = hits
+            best_intent = intent
+
+    objective = not any(keyword in text for keyword in SUBJECTIVE_HINTS)
+    requires_multi = any(keyword in text for keyword in MULTI_HINTS)
+
+    priority = next(
+        (level for level, keywords in PRIORITY_HINTS.items() if any(keyword in text for keyword in keywords)),
+        "LOW",
+    )
+
+    confidence = 0.55 if best_hits == 0 else min(0.55 + 0.12 * best_hits, 0.92)
+    return IntentClassification(
+        intent_code=best_intent,
+        confidence=round(confidence, 2),
+        objective_request=objective,
+        requires_multi_desk_hint=requires_multi,
+        priority=priority,
+        reasoning_short="Heuristic fallback classifier used.",
+    )
 
 
 class IntentClassifier:
@@ -66,8 +106,36 @@ class IntentClassifier:
                 return self._heuristic(subject, body)
         return self._heuristic(subject, body)
 
-    def _classify_with_agent(self, subject: str, body: str) -> IntentClassification:
+    def classify_many(self, items: list[tuple[str, str]], concurrency: int) -> list[IntentClassification]:
+        """Classify (subject, body) pairs, running model calls concurrently."""
+        if not self._has_api_key or len(items) <= 1:
+            return [self.classify(subject, body) for subject, body in items]
+        return asyncio.run(self._classify_many_with_agent(items, concurrency))
+
+    async def _classify_many_with_agent(
+        self,
+        items: list[tuple[str, str]],
+        concurrency: int,
+    ) -> list[IntentClassification]:
+        from agents import Runner
+
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+        async def classify_one(subject: str, body: str) -> IntentClassification:
+            async with semaphore:
+                try:
+                    run_result = await Runner.run(self._get_agent(), self._prompt(subject, body), max_turns=3)
+                    return self._parse_agent_output(run_result, subject, body)
+                except Exception:
+                    return self._heuristic(subject, body)
+
+        return list(await asyncio.gather(*(classify_one(subject, body) for subject, body in items)))
+
+    def _get_agent(self) -> Agent[None]:
         if self._agent is None:
+            from agents import Agent, ModelSettings
+            from agents.model_settings import Reasoning
+
             instructions = self._prompt_path.read_text(encoding="utf-8")
             self._agent = Agent(
                 name="Intent Classifier",
@@ -79,9 +147,19 @@ class IntentClassifier:
                 ),
                 output_type=IntentClassification,
             )
+        return self._agent
+
+    @staticmethod
+    def _prompt(subject: str, body: str) -> str:
+        return f"Subject: {subject}\nBody:\n{body}"
+
+    def _classify_with_agent(self, subject: str, body: str) -> IntentClassification:
+        from agents import Runner
+
+        run_result = Runner.run_sync(self._get_agent(), self._prompt(subject, body), max_turns=3)
+        return self._parse_agent_output(run_result, subject, body)
 
-        prompt = f"Subject: {subject}\nBody:\n{body}"
-        run_result = Runner.run_sync(self._agent, prompt, max_turns=3)
+    def _parse_agent_output(self, run_result: RunResult, subject: str, body: str) -> IntentClassification:
         parsed = run_result.final_output_as(IntentClassification)
 
         # Guardrail against accidental out-of-schema intent values.
@@ -90,34 +168,4 @@ class IntentClassifier:
         return parsed
 
     def _heuristic(self, subject: str, body: str) -> IntentClassification:
-        text = f"{subject} {body}".lower()
-
-        best_intent = "fee_dispute"
-        best_hits = 0
-        for intent, keywords in INTENT_KEYWORDS.items():
-            hits = sum(1 for keyword in keywords if keyword in text)
-            if hits > best_hits:
-                best_hits = hits
-                best_intent = intent
-
-        objective = not any(keyword in text for keyword in SUBJECTIVE_HINTS)
-        requires_multi = any(keyword in text for keyword in MULTI_HINTS)
-
-        if "urgent" in text or "critical" in text or "escalate" in text:
-            priority = "CRITICAL"
-        elif "failed" in text or "sanctions" in text:
-            priority = "HIGH"
-        elif "amend" in text or "dispute" in text:
-            priority = "MEDIUM"
-        else:
-            priority = "LOW"
-
-        confidence = 0.55 if best_hits == 0 else min(0.55 + 0.12 * best_hits, 0.92)
-        return IntentClassification(
-            intent_code=best_intent,
-            confidence=round(confidence, 2),
-            objective_request=objective,
-            requires_multi_desk_hint=requires_multi,
-            priority=priority,
-            reasoning_short="Heuristic fallback classifier used.",
-        )
+        return heuristic_classification(subject, body)
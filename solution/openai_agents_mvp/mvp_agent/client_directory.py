@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+
+
+def normalize_email(email: str) -> str:
+    """Sender key used for both the cache and the `clients` lookup."""
+    return email.strip().lower()
+
+
+class ClientDirectory:
+    """Sender email -> client row resolver with an in-memory map in front of `clients`.
+
+    Emails are normalized once (`normalize_email`) and that key is used for both the
+    cache and the indexed `lower(email)` lookup, so a sender resolves the same way
+    whether or not it is cached. Only resolved clients are cached: an unknown sender
+    always falls through to the DB, so newly added clients are picked up immediately.
+
+    Every resolve first reads `clients_version`, a one-row counter that triggers bump
+    on any insert, update or delete in `clients`; when it has moved, the whole map is
+    dropped. Edits are therefore seen on the next request, and `ttl_s` only bounds
+    how long an idle entry is kept.
+    """
+
+    def __init__(self, connect: Callable[[], sqlite3.Connection], ttl_s: float, max_entries: int) -> None:
+        self._connect = connect
+        self._ttl_s = ttl_s
+        self._max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, sqlite3.Row]] = OrderedDict()
+        self._version: int | None = None
+        self._conn: sqlite3.Connection | None = None
+        # Guards the map and the shared connection; each resolve is a few index lookups.
+        self._lock = threading.Lock()
+
+    def resolve(self, email: str) -> sqlite3.Row | None:
+        return self.resolve_many([email])[0]
+
+    def resolve_many(self, emails: list[str]) -> list[sqlite3.Row | None]:
+        """Resolve each email (None for unknown senders), checking `clients_version` once."""
+        keys = [normalize_email(email) for email in emails]
+        with self._lock:
+            if self._conn is None:
+                self._conn = self._connect()
+            version = self._conn.execute("SELECT version FROM clients_version WHERE id = 1;").fetchone()[0]
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+
+            now = time.monotonic()
+            clients: list[sqlite3.Row | None] = []
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] >= now:
+                    self._entries.move_to_end(key)
+                    clients.append(entry[1])
+                    continue
+                client = self._lookup(self._conn, key)
+                if client is not None:
+                    self._entries[key] = (now + self._ttl_s, client)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self._max_entries:
+                        self._entries.popitem(last=False)
+                elif entry is not None:
+                    del self._entries[key]
+                clients.append(client)
+        return clients
+
+    @staticmethod
+    def _lookup(conn: sqlite3.Connection, key: str) -> sqlite3.Row | None:
+        # Served by idx_clients_email_lower; the plain UNIQUE index on email cannot
+        # answer a lower() comparison.
+        return conn.execute(
+            """
+            SELECT client_id, client_code, client_name, email
+            FROM clients
+            WHERE lower(email) = ?;
+            """,
+            (key,),
+        ).fetchone()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -20,6 +20,13 @@ class Settings:
     model: str
     reasoning_effort: str
     sender_email: str
+    classify_concurrency: int
+    write_queue_max: int
+    write_queue_timeout_s: float
+    client_cache_ttl_s: float
+    client_cache_max: int
+    metrics_sample_rate: float
+    timings_in_output: bool
 
 
 
@@ -33,6 +40,13 @@ def load_settings() -> Settings:
     model = os.getenv("OPENAI_MODEL", "gpt-5.2-2025-12-11")
     reasoning_effort = os.getenv("OPENAI_REASONING_EFFORT", "high")
     sender_email = os.getenv("SERVICE_SENDER_EMAIL", "ai-router@mvp.demo")
+    classify_concurrency = max(int(os.getenv("CLASSIFIER_CONCURRENCY", "8")), 1)
+    write_queue_max = max(int(os.getenv("WRITE_QUEUE_MAX", "1000")), 1)
+    write_queue_timeout_s = max(float(os.getenv("WRITE_QUEUE_TIMEOUT_SECONDS", "5")), 0.0)
+    client_cache_ttl_s = max(float(os.getenv("CLIENT_CACHE_TTL_SECONDS", "300")), 0.0)
+    client_cache_max = max(int(os.getenv("CLIENT_CACHE_MAX", "50000")), 1)
+    metrics_sample_rate = min(max(float(os.getenv("ROUTING_METRICS_SAMPLE_RATE", "1")), 0.0), 1.0)
+    timings_in_output = os.getenv("ROUTING_TIMINGS_IN_OUTPUT", "0").strip().lower() in {"1", "true", "yes"}
 
     openai_api_key = os.getenv("OPENAI_API_KEY")
     if openai_api_key:
@@ -45,4 +59,11 @@ def load_settings() -> Settings:
         model=model,
         reasoning_effort=reasoning_effort,
         sender_email=sender_email,
+        classify_concurrency=classify_concurrency,
+        write_queue_max=write_queue_max,
+        write_queue_timeout_s=write_queue_timeout_s,
+        client_cache_ttl_s=client_cache_ttl_s,
+        client_cache_max=client_cache_max,
+        metrics_sample_rate=metrics_sample_rate,
+        timings_in_output=timings_in_output,
     )
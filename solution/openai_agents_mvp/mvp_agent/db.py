@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+
+def connect(db_path: Path, check_same_thread: bool = True) -> sqlite3.Connection:
+    """Open a routing DB connection with the pragmas every caller relies on."""
+    if not db_path.exists():
+        raise FileNotFoundError(f"DB not found: {db_path}")
+
+    conn = sqlite3.connect(db_path, check_same_thread=check_same_thread)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON;")
+    conn.execute("PRAGMA busy_timeout = 5000;")
+    return conn
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from bisect import bisect_left
+
+
+# Seconds; roughly log-spaced from a cached read to a slow model call.
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+
+class StageTimer:
+    """Lap timer that follows one request through the pipeline.
+
+    `lap(stage)` charges the time since the previous lap (or since creation) to
+    `stage`; repeated stages accumulate. The timer may be handed to the writer
+    thread and back, since only one thread uses it at a time.
+    """
+
+    enabled = True
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self._last = self.started
+        self._stages: dict[str, float] = {}
+
+    def lap(self, stage: str) -> None:
+        now = time.perf_counter()
+        self._stages[stage] = self._stages.get(stage, 0.0) + (now - self._last)
+        self._last = now
+
+    def stages(self) -> dict[str, float]:
+        return dict(self._stages)
+
+    def total(self) -> float:
+        return self._last - self.started
+
+    def as_ms(self) -> dict[str, float]:
+        timings = {stage: round(seconds * 1000, 3) for stage, seconds in self._stages.items()}
+        timings["total"] = round(self.total() * 1000, 3)
+        return timings
+
+
+class _NullStageTimer(StageTimer):
+    """Shared no-op timer handed out for unsampled requests."""
+
+    enabled = False
+
+    def __init__(self) -> None:
+        self.started = 0.0
+        self._last = 0.0
+        self._stages = {}
+
+    def lap(self, stage: str) -> None:
+        return None
+
+
+NULL_TIMER: StageTimer = _NullStageTimer()
+
+
+class Histogram:
+    """Cumulative-at-render bucket counts for one series; the caller holds the lock."""
+
+    __slots__ = ("bucket_counts", "count", "total")
+
+    def __init__(self, bucket_count: int) -> None:
+        self.bucket_counts = [0] * bucket_count
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, buckets: tuple[float, ...], seconds: float) -> None:
+        idx = bisect_left(buckets, seconds)
+        if idx < len(self.bucket_counts):
+            self.bucket_counts[idx] += 1
+        self.count += 1
+        self.total += seconds
+
+
+class LatencyMetrics:
+    """Per-route, per-stage latency histograms rendered in Prometheus text format.
+
+    `sample_rate` is the share of requests that get a real timer; the rest get
+    `NULL_TIMER`, whose laps are no-ops, so a disabled layer costs one comparison.
+    """
+
+    def __init__(self, sample_rate: float, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self._sample_rate = sample_rate
+        self._buckets = buckets
+        self._lock = threading.Lock()
+        self._stage_hist: dict[tuple[str, str], Histogram] = {}
+        self._request_hist: dict[str, Histogram] = {}
+
+    def start(self, force: bool = False) -> StageTimer:
+        if force or self._sample_rate >= 1.0:
+            return StageTimer()
+        if self._sample_rate <= 0.0 or random.random() >= self._sample_rate:
+            return NULL_TIMER
+        return StageTimer()
+
+    def observe(self, route: str, timer: StageTimer) -> None:
+        if not timer.enabled:
+            return
+        stages = timer.stages()
+        total = timer.total()
+        with self._lock:
+            for stage, seconds in stages.items():
+                hist = self._stage_hist.get((route, stage))
+                if hist is None:
+                    hist = self._stage_hist[(route, stage)] = Histogram(len(self._buckets))
+                hist.observe(self._buckets, seconds)
+            hist = self._request_hist.get(route)
+            if hist is None:
+                hist = self._request_hist[route] = Histogram(len(self._buckets))
+            hist.observe(self._buckets, total)
+
+    def render_prometheus(self) -> str:
+        lines = [
+            "# HELP routing_stage_duration_seconds Time spent in each routing pipeline stage.",
+            "# TYPE routing_stage_duration_seconds histogram",
+        ]
+        with self._lock:
+            for (route, stage), hist in sorted(self._stage_hist.items()):
+                lines.extend(
+                    self._render_histogram("routing_stage_duration_seconds", f'route="{route}",stage="{stage}"', hist)
+                )
+            lines.append("# HELP routing_request_duration_seconds End-to-end routing time per request.")
+            lines.append("# TYPE routing_request_duration_seconds histogram")
+            for route, hist in sorted(self._request_hist.items()):
+                lines.extend(self._render_histogram("routing_request_duration_seconds", f'route="{route}"', hist))
+        return "\n".join(lines) + "\n"
+
+    def _render_histogram(self, name: str, labels: str, hist: Histogram) -> list[str]:
+        return render_histogram(name, labels, self._buckets, hist)
+
+
+def render_histogram(name: str, labels: str, buckets: tuple[float, ...], hist: Histogram) -> list[str]:
+    """Prometheus text lines (`_bucket`, `_sum`, `_count`) for one histogram series."""
+    lines: list[str] = []
+    cumulative = 0
+    for bound, count in zip(buckets, hist.bucket_counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {hist.count}')
+    lines.append(f"{name}_sum{{{labels}}} {hist.total:.6f}")
+    lines.append(f"{name}_count{{{labels}}} {hist.count}")
+    return lines
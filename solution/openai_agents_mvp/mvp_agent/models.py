@@ -32,6 +32,13 @@ class InboundMessage(BaseModel):
     body: str = ""
     message_id: str | None = None
     channel: str = "EMAIL"
+    # Set by email workers that send the reply themselves and report the outcome to
+    # POST /delivery: the reply row starts QUEUED instead of SENT.
+    reply_queued: bool = False
+
+
+class InboundBatchRequest(BaseModel):
+    messages: list[InboundMessage] = Field(min_length=1, max_length=500)
 
 
 class IntentClassification(BaseModel):
@@ -57,5 +64,24 @@ class RoutingOutput(BaseModel):
     to_email: str | None = None
     reply_subject: str | None = None
     reply_body: str | None = None
+    # email_messages.message_id of the reply, for delivery status updates.
+    reply_message_id: int | None = None
     decision_path: list[str] = Field(default_factory=list)
     classification: IntentClassification | None = None
+    timings_ms: dict[str, float] | None = None
+
+
+class DeliveryUpdate(BaseModel):
+    message_id: int
+    delivery_status: str = Field(pattern=r"^(QUEUED|SENT|FAILED)$")
+
+
+class DeliveryReport(BaseModel):
+    updates: list[DeliveryUpdate] = Field(min_length=1, max_length=500)
+
+
+class InboundBatchResponse(BaseModel):
+    count: int
+    ok_count: int
+    results: list[RoutingOutput]
+    timings_ms: dict[str, float] | None = None
@@ -2,14 +2,19 @@ from __future__ import annotations
 
 import re
 import sqlite3
+from dataclasses import dataclass
 from datetime import UTC, datetime, timedelta
 from pathlib import Path
 from typing import Any
-from uuid import uuid4
 
 from .classifier import IntentClassifier
+from .client_directory import ClientDirectory
+from .metrics import NULL_TIMER, LatencyMetrics, StageTimer
 from .config import Settings
-from .models import InboundMessage, IntentClassification, RoutingOutput
+from .db import connect
+from .models import DeliveryUpdate, InboundMessage, IntentClassification, RoutingOutput
+from .ticket_status import fetch_ticket_status
+from .writer import SerializedWriter
 
 
 TRADE_REF_RE = re.compile(r"\bTRD\d{6}\b", re.IGNORECASE)
@@ -22,6 +27,32 @@ MULTI_DESK_SEQUENCE: dict[str, list[str]] = {
     "corporate_action_instruction": ["CA", "SET", "TRD"],
 }
 
+# Batch writes commit once per this many messages instead of once per message.
+BATCH_COMMIT_SIZE = 100
+
+
+@dataclass(frozen=True)
+class TraceStep:
+    node_name: str
+    decision: str
+    rationale: str
+    actor_type: str
+    created_at: datetime
+    decided_by_agent_id: int | None = None
+
+
+@dataclass(frozen=True)
+class EmailRow:
+    direction: str
+    sender_email: str
+    recipient_email: str
+    subject: str
+    body: str
+    sent_at: datetime
+    is_automated: int
+    related_step_seq: int | None
+    delivery_status: str = "SENT"
+
 
 class RoutingService:
     def __init__(self, settings: Settings) -> None:
@@ -32,81 +63,182 @@ class RoutingService:
             prompt_path=settings.prompt_path,
             has_api_key=bool(settings.openai_api_key),
         )
+        # Every ticket mutation goes through one writer thread; request threads only
+        # read (on their own WAL connections) and classify.
+        self._writer = SerializedWriter(
+            connect=lambda: self._get_write_conn(settings.db_path),
+            max_queue=settings.write_queue_max,
+            submit_timeout_s=settings.write_queue_timeout_s,
+        )
+        self._clients = ClientDirectory(
+            connect=lambda: connect(settings.db_path, check_same_thread=False),
+            ttl_s=settings.client_cache_ttl_s,
+            max_entries=settings.client_cache_max,
+        )
+        self._metrics = LatencyMetrics(sample_rate=settings.metrics_sample_rate)
 
     def process_inbound(self, payload: InboundMessage) -> RoutingOutput:
-        with self._get_conn(self._settings.db_path) as conn:
-            client = self._resolve_client(conn, payload.from_email)
-            if client is None:
-                return RoutingOutput(
-                    ok=False,
-                    error="unknown_client",
-                    to_email=payload.from_email,
-                    reply_subject=f"Re: {payload.subject}",
-                    reply_body=(
-                        "We could not match your sender email to a client profile. "
-                        "Please provide your client code so we can route your request."
-                    ),
+        timer = self._metrics.start(force=self._settings.timings_in_output)
+        try:
+            result = self._route_inbound(payload, timer)
+        finally:
+            self._metrics.observe("inbound", timer)
+        if self._settings.timings_in_output:
+            result.timings_ms = timer.as_ms()
+        return result
+
+    def _route_inbound(self, payload: InboundMessage, timer: StageTimer) -> RoutingOutput:
+        client = self._clients.resolve(payload.from_email)
+        timer.lap("client_resolution")
+        if client is None:
+            return self._unknown_client_output(payload)
+
+        not_resolved = self._is_not_resolved_reply(payload)
+        timer.lap("not_resolved_detection")
+        if not_resolved:
+            result = self._writer.run(
+                lambda conn: self._handle_not_resolved_reply(conn, payload, client, timer=self._queued(timer))
+            )
+        else:
+            classification = self._classifier.classify(payload.subject, payload.body)
+            timer.lap("classification")
+            result = self._writer.run(
+                lambda conn: self._create_ticket_and_route(
+                    conn, payload, client, classification, timer=self._queued(timer)
                 )
+            )
+        # Commit plus the hand-back from the writer thread.
+        timer.lap("commit")
+        return result
+
+    def process_inbound_batch(self, payloads: list[InboundMessage]) -> list[RoutingOutput]:
+        """Route many messages with concurrent classification and grouped commits.
+
+        Messages are written in input order, so a NOT RESOLVED reply can reference a
+        ticket created earlier in the same batch. Each message runs inside its own
+        savepoint: a failure is reported in its result and does not undo the others.
+        """
+        return self.process_inbound_batch_timed(payloads)[0]
+
+    def process_inbound_batch_timed(
+        self, payloads: list[InboundMessage]
+    ) -> tuple[list[RoutingOutput], dict[str, float] | None]:
+        """`process_inbound_batch`, plus batch stage timings when embedding is enabled."""
+        timer = self._metrics.start(force=self._settings.timings_in_output)
+        try:
+            results = self._route_inbound_batch(payloads, timer)
+        finally:
+            self._metrics.observe("inbound_batch", timer)
+        return results, (timer.as_ms() if self._settings.timings_in_output else None)
+
+    def _route_inbound_batch(self, payloads: list[InboundMessage], timer: StageTimer) -> list[RoutingOutput]:
+        clients = self._clients.resolve_many([payload.from_email for payload in payloads])
+        timer.lap("client_resolution")
+
+        pending = [
+            idx
+            for idx, (payload, client) in enumerate(zip(payloads, clients))
+            if client is not None and not self._is_not_resolved_reply(payload)
+        ]
+        classified = self._classifier.classify_many(
+            [(payloads[idx].subject, payloads[idx].body) for idx in pending],
+            self._settings.classify_concurrency,
+        )
+        classifications = dict(zip(pending, classified))
+        timer.lap("classification")
 
-            escalated = self._handle_not_resolved_reply(conn, payload, client)
-            if escalated is not None:
-                return escalated
+        results = self._writer.run(
+            lambda conn: self._write_batch(conn, payloads, clients, classifications, timer=self._queued(timer))
+        )
+        timer.lap("commit")
+        return results
 
-            classification = self._classifier.classify(payload.subject, payload.body)
-            return self._create_ticket_and_route(conn, payload, client, classification)
+    def record_delivery(self, updates: list[DeliveryUpdate]) -> int:
+        """Write reply delivery outcomes reported by the email workers; returns rows updated."""
+        return self._writer.run(lambda conn: self._update_delivery_status(conn, updates))
 
-    def get_ticket_status(self, ticket_ref: str) -> dict[str, Any] | None:
-        with self._get_conn(self._settings.db_path) as conn:
-            ticket = conn.execute(
-                """
-                SELECT
-                    t.ticket_id,
-                    t.ticket_ref,
-                    t.status,
-                    t.automatable,
-                    t.requires_multi_desk,
-                    t.priority,
-                    t.requester_email,
-                    a.agent_code AS owner_agent_code,
-                    a.email AS owner_agent_email,
-                    t.created_at,
-                    t.first_response_at,
-                    t.resolved_at,
-                    t.closed_at
-                FROM tickets t
-                LEFT JOIN agents a ON a.agent_id = t.owner_agent_id
-                WHERE t.ticket_ref = ?
-                LIMIT 1;
-                """,
-                (ticket_ref,),
-            ).fetchone()
-            if ticket is None:
-                return None
+    @staticmethod
+    def _update_delivery_status(conn: sqlite3.Connection, updates: list[DeliveryUpdate]) -> int:
+        # Each real change takes the next delivery_seq, which the dashboard feed and
+        # snapshot token watch; repeated reports of the same status change nothing.
+        cursor = conn.executemany(
+            """
+            UPDATE email_messages
+            SET delivery_status = ?,
+                delivery_seq = (SELECT COALESCE(MAX(delivery_seq), 0) + 1 FROM email_messages)
+            WHERE message_id = ? AND direction = 'OUTBOUND' AND delivery_status <> ?;
+            """,
+            [(update.delivery_status, update.message_id, update.delivery_status) for update in updates],
+        )
+        return cursor.rowcount
 
-            path_rows = conn.execute(
-                """
-                SELECT step_seq, node_name, decision, actor_type, created_at
-                FROM v_ticket_decision_path
-                WHERE ticket_ref = ?
-                ORDER BY step_seq;
-                """,
-                (ticket_ref,),
-            ).fetchall()
+    def writer_stats(self) -> dict[str, Any]:
+        return self._writer.stats()
 
-            return {
-                "ticket": dict(ticket),
-                "decision_path": [dict(row) for row in path_rows],
-            }
+    def metrics_text(self) -> str:
+        return self._metrics.render_prometheus()
+
+    @staticmethod
+    def _queued(timer: StageTimer) -> StageTimer:
+        # Called when the write job starts: the gap since the last lap is queue wait.
+        timer.lap("write_queue_wait")
+        return timer
+
+    def _write_batch(
+        self,
+        conn: sqlite3.Connection,
+        payloads: list[InboundMessage],
+        clients: list[sqlite3.Row | None],
+        classifications: dict[int, IntentClassification],
+        timer: StageTimer = NULL_TIMER,
+    ) -> list[RoutingOutput]:
+        results: list[RoutingOutput] = []
+        for start in range(0, len(payloads), BATCH_COMMIT_SIZE):
+            conn.execute("BEGIN;")
+            for idx in range(start, min(start + BATCH_COMMIT_SIZE, len(payloads))):
+                payload = payloads[idx]
+                client = clients[idx]
+                if client is None:
+                    results.append(self._unknown_client_output(payload))
+                    continue
+
+                conn.execute("SAVEPOINT inbound_item;")
+                try:
+                    classification = classifications.get(idx)
+                    if classification is None:
+                        result = self._handle_not_resolved_reply(conn, payload, client, timer=timer)
+                    else:
+                        result = self._create_ticket_and_route(conn, payload, client, classification, timer=timer)
+                    conn.execute("RELEASE inbound_item;")
+                except Exception as exc:  # noqa: BLE001
+                    conn.execute("ROLLBACK TO inbound_item;")
+                    conn.execute("RELEASE inbound_item;")
+                    result = RoutingOutput(
+                        ok=False,
+                        error=f"runtime_error: {exc}",
+                        to_email=payload.from_email,
+                        reply_subject=f"Re: {payload.subject}",
+                    )
+                results.append(result)
+            conn.commit()
+            timer.lap("commit")
+        return results
+
+    def get_ticket_status(self, ticket_ref: str) -> dict[str, Any] | None:
+        with self._get_conn(self._settings.db_path) as conn:
+            return fetch_ticket_status(conn, ticket_ref)
 
     @staticmethod
     def _get_conn(db_path: Path) -> sqlite3.Connection:
-        if not db_path.exists():
-            raise FileNotFoundError(f"DB not found: {db_path}")
+        return connect(db_path)
 
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        conn.execute("PRAGMA foreign_keys = ON;")
-        conn.execute("PRAGMA busy_timeout = 5000;")
+    @classmethod
+    def _get_write_conn(cls, db_path: Path) -> sqlite3.Connection:
+        conn = cls._get_conn(db_path)
+        # WAL is persistent on the DB file: readers (dashboard, status lookups) no
+        # longer block on, or get blocked by, the writer.
+        conn.execute("PRAGMA journal_mode = WAL;")
+        conn.execute("PRAGMA synchronous = NORMAL;")
         return conn
 
     @staticmethod
@@ -120,15 +252,21 @@ class RoutingService:
         return dt.strftime("%Y-%m-%d %H:%M:%S")
 
     @staticmethod
-    def _resolve_client(conn: sqlite3.Connection, from_email: str) -> sqlite3.Row | None:
-        return conn.execute(
-            """
-            SELECT client_id, client_code, client_name, email
-            FROM clients
-            WHERE lower(email) = lower(?);
-            """,
-            (from_email,),
-        ).fetchone()
+    def _unknown_client_output(payload: InboundMessage) -> RoutingOutput:
+        return RoutingOutput(
+            ok=False,
+            error="unknown_client",
+            to_email=payload.from_email,
+            reply_subject=f"Re: {payload.subject}",
+            reply_body=(
+                "We could not match your sender email to a client profile. "
+                "Please provide your client code so we can route your request."
+            ),
+        )
+
+    @staticmethod
+    def _is_not_resolved_reply(payload: InboundMessage) -> bool:
+        return "NOT RESOLVED" in f"{payload.subject} {payload.body}".upper()
 
     @staticmethod
     def _load_intent_rule(conn: sqlite3.Connection, intent_code: str) -> sqlite3.Row:
@@ -230,6 +368,9 @@ class RoutingService:
             return True, "\n".join(lines), None
 
         if intent_code in {"trade_status", "settlement_eta"}:
+            # trade_ref is stored uppercase and extracted uppercase, so this is a direct
+            # seek on the UNIQUE index; without a ref, idx_trades_client_submitted
+            # returns the latest trade without sorting.
             trade_ref = self._extract_trade_ref(subject, body)
             if trade_ref:
                 row = conn.execute(
@@ -248,11 +389,11 @@ class RoutingService:
                         executed_at,
                         settlement_date
                     FROM trades
-                    WHERE client_id = ?
-                      AND upper(trade_ref) = upper(?)
+                    WHERE trade_ref = ?
+                      AND client_id = ?
                     LIMIT 1;
                     """,
-                    (client_id, trade_ref),
+                    (trade_ref, client_id),
                 ).fetchone()
             else:
                 row = conn.execute(
@@ -347,11 +488,6 @@ class RoutingService:
             raise RuntimeError("No active agent available.")
         return fallback
 
-    @staticmethod
-    def _desk_code_map(conn: sqlite3.Connection) -> dict[str, int]:
-        rows = conn.execute("SELECT desk_id, desk_code FROM desks;").fetchall()
-        return {str(row["desk_code"]): int(row["desk_id"]) for row in rows}
-
     @staticmethod
     def _desk_details_map(conn: sqlite3.Connection) -> dict[int, dict[str, str]]:
         rows = conn.execute("SELECT desk_id, desk_code, desk_name FROM desks;").fetchall()
@@ -439,25 +575,14 @@ class RoutingService:
             ]
         )
 
-    def _insert_trace(
+    def _insert_traces(
         self,
         conn: sqlite3.Connection,
         ticket_id: int,
-        node_name: str,
-        decision: str,
-        rationale: str,
-        actor_type: str,
-        created_at: datetime,
-        decided_by_agent_id: int | None = None,
-    ) -> int:
-        step_seq = int(
-            conn.execute(
-                "SELECT COALESCE(MAX(step_seq), 0) + 1 FROM routing_trace WHERE ticket_id = ?;",
-                (ticket_id,),
-            ).fetchone()[0]
-        )
-
-        cur = conn.execute(
+        steps: list[TraceStep],
+        first_step_seq: int = 1,
+    ) -> None:
+        conn.executemany(
             """
             INSERT INTO routing_trace (
                 ticket_id,
@@ -470,33 +595,45 @@ class RoutingService:
                 created_at
             ) VALUES (?, ?, ?, ?, ?, ?, ?, ?);
             """,
-            (
-                ticket_id,
-                step_seq,
-                node_name,
-                decision,
-                rationale,
-                actor_type,
-                decided_by_agent_id,
-                self._to_ts(created_at),
-            ),
+            [
+                (
+                    ticket_id,
+                    first_step_seq + offset,
+                    step.node_name,
+                    step.decision,
+                    step.rationale,
+                    step.actor_type,
+                    step.decided_by_agent_id,
+                    self._to_ts(step.created_at),
+                )
+                for offset, step in enumerate(steps)
+            ],
         )
-        return int(cur.lastrowid)
 
-    def _insert_email_message(
+    @staticmethod
+    def _next_trace_step_seq(conn: sqlite3.Connection, ticket_id: int) -> int:
+        return int(
+            conn.execute(
+                "SELECT COALESCE(MAX(step_seq), 0) + 1 FROM routing_trace WHERE ticket_id = ?;",
+                (ticket_id,),
+            ).fetchone()[0]
+        )
+
+    @staticmethod
+    def _reply_delivery_status(payload: InboundMessage) -> str:
+        # Workers that queue the reply report SENT/FAILED later; otherwise the caller has it now.
+        return "QUEUED" if payload.reply_queued else "SENT"
+
+    def _insert_email_messages(
         self,
         conn: sqlite3.Connection,
         ticket_id: int,
-        direction: str,
-        sender_email: str,
-        recipient_email: str,
-        subject: str,
-        body: str,
-        sent_at: datetime,
-        is_automated: int,
-        related_trace_id: int | None,
-    ) -> None:
-        conn.execute(
+        messages: list[EmailRow],
+    ) -> int | None:
+        """Insert the ticket's email rows; returns the id of the outbound reply, if any."""
+        # related_trace_id is resolved from (ticket_id, step_seq) in SQL so trace rows
+        # can be flushed with executemany without reading back their ids.
+        conn.executemany(
             """
             INSERT INTO email_messages (
                 ticket_id,
@@ -509,20 +646,36 @@ class RoutingService:
                 is_automated,
                 delivery_status,
                 related_trace_id
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'SENT', ?);
+            ) VALUES (
+                ?, ?, ?, ?, ?, ?, ?, ?, ?,
+                (SELECT trace_id FROM routing_trace WHERE ticket_id = ? AND step_seq = ?)
+            );
             """,
-            (
-                ticket_id,
-                direction,
-                sender_email,
-                recipient_email,
-                subject,
-                body,
-                self._to_ts(sent_at),
-                is_automated,
-                related_trace_id,
-            ),
+            [
+                (
+                    ticket_id,
+                    message.direction,
+                    message.sender_email,
+                    message.recipient_email,
+                    message.subject,
+                    message.body,
+                    self._to_ts(message.sent_at),
+                    message.is_automated,
+                    message.delivery_status,
+                    ticket_id,
+                    message.related_step_seq,
+                )
+                for message in messages
+            ],
         )
+        if not any(message.direction == "OUTBOUND" for message in messages):
+            return None
+        # Single writer: the newest outbound row of this ticket is the one just inserted.
+        row = conn.execute(
+            "SELECT MAX(message_id) FROM email_messages WHERE ticket_id = ? AND direction = 'OUTBOUND';",
+            (ticket_id,),
+        ).fetchone()
+        return int(row[0]) if row and row[0] is not None else None
 
     def _create_ticket_and_route(
         self,
@@ -530,6 +683,7 @@ class RoutingService:
         payload: InboundMessage,
         client: sqlite3.Row,
         classification: IntentClassification,
+        timer: StageTimer = NULL_TIMER,
     ) -> RoutingOutput:
         created = self._now_ts()
         intent_code = classification.intent_code
@@ -540,6 +694,7 @@ class RoutingService:
             classification.requires_multi_desk_hint = True
 
         rule = self._load_intent_rule(conn, intent_code)
+        timer.lap("rule_load")
 
         automatable_candidate = bool(rule["data_direct_available"]) and classification.objective_request
         requires_multi_candidate = (
@@ -563,6 +718,7 @@ class RoutingService:
                 payload.subject,
                 payload.body,
             )
+            timer.lap("direct_data")
 
         automatable_final = 1 if (automatable_candidate and data_ok) else 0
         requires_multi_final = 0 if automatable_final == 1 else int(requires_multi_candidate)
@@ -579,6 +735,7 @@ class RoutingService:
             owner_agent_code = str(owner_agent["agent_code"])
             owner_agent_name = str(owner_agent["full_name"])
             owner_email = str(owner_agent["email"])
+            timer.lap("agent_selection")
 
         desk_details = self._desk_details_map(conn)
         primary_desk_label = self._desk_label(desk_details, int(rule["primary_desk_id"]))
@@ -594,10 +751,12 @@ class RoutingService:
             client_satisfied = None
             first_response_at = created
 
-        tmp_ref = f"TMP-{uuid4().hex[:12].upper()}"
-        cur = conn.execute(
+        # ticket_id is assigned as MAX+1 inside the INSERT itself (the statement holds
+        # the write lock), so ticket_ref is final without a follow-up UPDATE.
+        ticket_row = conn.execute(
             """
             INSERT INTO tickets (
+                ticket_id,
                 ticket_ref,
                 client_id,
                 trade_id,
@@ -617,10 +776,12 @@ class RoutingService:
                 resolved_at,
                 closed_at,
                 client_satisfied
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, NULL, ?);
+            )
+            SELECT next_id, printf('TCK%06d', next_id), ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, NULL, ?
+            FROM (SELECT COALESCE(MAX(ticket_id), 0) + 1 AS next_id FROM tickets)
+            RETURNING ticket_id, ticket_ref;
             """,
             (
-                tmp_ref,
                 int(client["client_id"]),
                 trade_id,
                 int(rule["intent_id"]),
@@ -639,72 +800,59 @@ class RoutingService:
                 self._to_ts(resolved_at),
                 client_satisfied,
             ),
-        )
-
-        ticket_id = int(cur.lastrowid)
-        ticket_ref = f"TCK{ticket_id:06d}"
-        conn.execute("UPDATE tickets SET ticket_ref = ? WHERE ticket_id = ?;", (ticket_ref, ticket_id))
-
-        if owner_agent_id is not None:
-            conn.execute(
-                """
-                INSERT INTO ticket_assignments (
-                    ticket_id,
-                    assigned_agent_id,
-                    assigned_desk_id,
-                    assignment_role,
-                    assignment_reason,
-                    assigned_at,
-                    released_at
-                ) VALUES (?, ?, ?, 'PRIMARY_OWNER', ?, ?, ?);
-                """,
-                (
-                    ticket_id,
-                    owner_agent_id,
-                    int(rule["primary_desk_id"]),
-                    "Assigned by AI routing based on specialty and workload.",
-                    self._to_ts(created),
-                    self._to_ts(resolved_at) if resolved_at else None,
-                ),
+        ).fetchall()[0]
+
+        ticket_id = int(ticket_row["ticket_id"])
+        ticket_ref = str(ticket_row["ticket_ref"])
+
+        # All child rows are built in memory and flushed with executemany below.
+        traces: list[TraceStep] = []
+        plan_rows: list[tuple[int, str]] = []
+        hop_rows: list[tuple[int | None, int, str, datetime]] = []
+
+        def add_trace(
+            node_name: str,
+            decision: str,
+            rationale: str,
+            actor_type: str,
+            decided_by_agent_id: int | None = None,
+        ) -> int:
+            traces.append(
+                TraceStep(
+                    node_name=node_name,
+                    decision=decision,
+                    rationale=rationale,
+                    actor_type=actor_type,
+                    created_at=created + timedelta(seconds=len(traces)),
+                    decided_by_agent_id=decided_by_agent_id,
+                )
             )
+            return len(traces)
 
-        trace_time = created
-        self._insert_trace(
-            conn,
-            ticket_id,
+        add_trace(
             "Data directly available without interpretation?",
             "YES" if automatable_final == 1 else "NO",
             "Routing rule + objective check + data availability verification.",
             "AI",
-            trace_time,
         )
-        trace_time += timedelta(seconds=1)
 
         decision_path: list[str] = []
-        related_trace_id: int | None = None
+        related_step_seq: int | None = None
 
         if automatable_final == 1:
-            trace_auto = self._insert_trace(
-                conn,
-                ticket_id,
+            related_step_seq = add_trace(
                 "AI response using internal database",
                 "AUTO_RESPONSE_SENT",
                 str(rule["auto_response_template"]),
                 "AI",
-                trace_time,
             )
-            trace_time += timedelta(seconds=1)
-            self._insert_trace(
-                conn,
-                ticket_id,
+            add_trace(
                 "Client satisfied?",
                 "YES",
                 "Initial response delivered with direct objective data.",
                 "SYSTEM",
-                trace_time,
             )
 
-            related_trace_id = trace_auto
             decision_path = [
                 "1) Data directly available: YES",
                 "2) AI response using internal database: SENT",
@@ -719,40 +867,29 @@ class RoutingService:
                 "If this does not resolve your request, reply with NOT RESOLVED."
             )
         else:
-            self._insert_trace(
-                conn,
-                ticket_id,
+            add_trace(
                 "Does this require multiple desks?",
                 "YES" if requires_multi_final == 1 else "NO",
                 "Intent complexity and routing hints applied.",
                 "AI",
-                trace_time,
             )
-            trace_time += timedelta(seconds=1)
 
             if requires_multi_final == 1:
-                trace_coord = self._insert_trace(
-                    conn,
-                    ticket_id,
+                related_step_seq = add_trace(
                     "AI multi-desk workflow coordinator",
                     "PLAN_CREATED",
                     "Created desk sequence and handoff plan.",
                     "AI",
-                    trace_time,
                 )
-                trace_time += timedelta(seconds=1)
-                self._insert_trace(
-                    conn,
-                    ticket_id,
+                add_trace(
                     "Human ticket owner accountable",
                     f"OWNER_ASSIGNED_{owner_agent_code}",
                     "One human owner remains accountable across desks.",
                     "HUMAN",
-                    trace_time,
                     owner_agent_id,
                 )
 
-                code_map = self._desk_code_map(conn)
+                code_map = {info["code"]: desk_id for desk_id, info in desk_details.items()}
                 sequence_codes = MULTI_DESK_SEQUENCE.get(str(rule["intent_code"]), [])
                 sequence_ids = [code_map[code] for code in sequence_codes if code in code_map]
                 if not sequence_ids:
@@ -762,56 +899,18 @@ class RoutingService:
                         desk_id for desk_id in sequence_ids if desk_id != int(rule["primary_desk_id"])
                     ]
 
-                for idx, desk_id in enumerate(sequence_ids, start=1):
-                    conn.execute(
-                        """
-                        INSERT INTO ticket_desk_plan (ticket_id, step_seq, desk_id, step_reason, required_flag)
-                        VALUES (?, ?, ?, ?, 1);
-                        """,
-                        (ticket_id, idx, desk_id, "AI-generated multi-desk plan step"),
-                    )
-
-                hop_time = created
-                conn.execute(
-                    """
-                    INSERT INTO ticket_desk_hops (
-                        ticket_id,
-                        hop_seq,
-                        from_desk_id,
-                        to_desk_id,
-                        hopped_by_agent_id,
-                        hop_reason,
-                        hopped_at
-                    ) VALUES (?, 1, NULL, ?, ?, 'Initial routing assignment', ?);
-                    """,
-                    (ticket_id, sequence_ids[0], owner_agent_id, self._to_ts(hop_time)),
-                )
-
+                plan_rows = [(desk_id, "AI-generated multi-desk plan step") for desk_id in sequence_ids]
+                hop_rows = [(None, sequence_ids[0], "Initial routing assignment", created)]
                 for idx in range(1, len(sequence_ids)):
-                    hop_time += timedelta(seconds=1)
-                    conn.execute(
-                        """
-                        INSERT INTO ticket_desk_hops (
-                            ticket_id,
-                            hop_seq,
-                            from_desk_id,
-                            to_desk_id,
-                            hopped_by_agent_id,
-                            hop_reason,
-                            hopped_at
-                        ) VALUES (?, ?, ?, ?, ?, 'AI-coordinated desk transfer', ?);
-                        """,
+                    hop_rows.append(
                         (
-                            ticket_id,
-                            idx + 1,
                             sequence_ids[idx - 1],
                             sequence_ids[idx],
-                            owner_agent_id,
-                            self._to_ts(hop_time),
-                        ),
+                            "AI-coordinated desk transfer",
+                            created + timedelta(seconds=idx),
+                        )
                     )
 
-                related_trace_id = trace_coord
                 decision_path = [
                     "1) Data directly available: NO",
                     "2) Requires multiple desks: YES",
@@ -830,40 +929,17 @@ class RoutingService:
                     "You will receive progress updates as each desk step completes."
                 )
             else:
-                trace_route = self._insert_trace(
-                    conn,
-                    ticket_id,
+                related_step_seq = add_trace(
                     "Suggest best-fit human agent based on specialty, load, and queue risk",
                     f"ROUTE_TO_{owner_agent_code}",
                     "Single-desk expert route based on active workload.",
                     "AI",
-                    trace_time,
                     owner_agent_id,
                 )
 
-                conn.execute(
-                    """
-                    INSERT INTO ticket_desk_plan (ticket_id, step_seq, desk_id, step_reason, required_flag)
-                    VALUES (?, 1, ?, 'Primary desk handling', 1);
-                    """,
-                    (ticket_id, int(rule["primary_desk_id"])),
-                )
-                conn.execute(
-                    """
-                    INSERT INTO ticket_desk_hops (
-                        ticket_id,
-                        hop_seq,
-                        from_desk_id,
-                        to_desk_id,
-                        hopped_by_agent_id,
-                        hop_reason,
-                        hopped_at
-                    ) VALUES (?, 1, NULL, ?, ?, 'Initial routing assignment', ?);
-                    """,
-                    (ticket_id, int(rule["primary_desk_id"]), owner_agent_id, self._to_ts(created)),
-                )
+                plan_rows = [(int(rule["primary_desk_id"]), "Primary desk handling")]
+                hop_rows = [(None, int(rule["primary_desk_id"]), "Initial routing assignment", created)]
 
-                related_trace_id = trace_route
                 decision_path = [
                     "1) Data directly available: NO",
                     "2) Requires multiple desks: NO",
@@ -879,31 +955,87 @@ class RoutingService:
                     + f"\n\nTicket Reference: {ticket_ref}"
                 )
 
-        self._insert_email_message(
-            conn,
-            ticket_id=ticket_id,
-            direction="INBOUND",
-            sender_email=payload.from_email,
-            recipient_email="client-service@mvp.demo",
-            subject=payload.subject,
-            body=payload.body,
-            sent_at=created,
-            is_automated=0,
-            related_trace_id=None,
-        )
+        if owner_agent_id is not None:
+            conn.execute(
+                """
+                INSERT INTO ticket_assignments (
+                    ticket_id,
+                    assigned_agent_id,
+                    assigned_desk_id,
+                    assignment_role,
+                    assignment_reason,
+                    assigned_at,
+                    released_at
+                ) VALUES (?, ?, ?, 'PRIMARY_OWNER', ?, ?, ?);
+                """,
+                (
+                    ticket_id,
+                    owner_agent_id,
+                    int(rule["primary_desk_id"]),
+                    "Assigned by AI routing based on specialty and workload.",
+                    self._to_ts(created),
+                    self._to_ts(resolved_at) if resolved_at else None,
+                ),
+            )
+
+        self._insert_traces(conn, ticket_id, traces)
+
+        if plan_rows:
+            conn.executemany(
+                """
+                INSERT INTO ticket_desk_plan (ticket_id, step_seq, desk_id, step_reason, required_flag)
+                VALUES (?, ?, ?, ?, 1);
+                """,
+                [(ticket_id, idx, desk_id, reason) for idx, (desk_id, reason) in enumerate(plan_rows, start=1)],
+            )
+
+        if hop_rows:
+            conn.executemany(
+                """
+                INSERT INTO ticket_desk_hops (
+                    ticket_id,
+                    hop_seq,
+                    from_desk_id,
+                    to_desk_id,
+                    hopped_by_agent_id,
+                    hop_reason,
+                    hopped_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?);
+                """,
+                [
+                    (ticket_id, idx, from_desk_id, to_desk_id, owner_agent_id, reason, self._to_ts(hopped_at))
+                    for idx, (from_desk_id, to_desk_id, reason, hopped_at) in enumerate(hop_rows, start=1)
+                ],
+            )
 
-        self._insert_email_message(
+        reply_message_id = self._insert_email_messages(
             conn,
-            ticket_id=ticket_id,
-            direction="OUTBOUND",
-            sender_email=self._settings.sender_email,
-            recipient_email=payload.from_email,
-            subject=f"Re: {payload.subject}",
-            body=response_body,
-            sent_at=first_response_at,
-            is_automated=1,
-            related_trace_id=related_trace_id,
+            ticket_id,
+            [
+                EmailRow(
+                    direction="INBOUND",
+                    sender_email=payload.from_email,
+                    recipient_email="client-service@mvp.demo",
+                    subject=payload.subject,
+                    body=payload.body,
+                    sent_at=created,
+                    is_automated=0,
+                    related_step_seq=None,
+                ),
+                EmailRow(
+                    direction="OUTBOUND",
+                    sender_email=self._settings.sender_email,
+                    recipient_email=payload.from_email,
+                    subject=f"Re: {payload.subject}",
+                    body=response_body,
+                    sent_at=first_response_at,
+                    is_automated=1,
+                    related_step_seq=related_step_seq,
+                    delivery_status=self._reply_delivery_status(payload),
+                ),
+            ],
         )
+        timer.lap("db_writes")
 
         return RoutingOutput(
             ok=True,
@@ -918,6 +1050,7 @@ class RoutingService:
             to_email=payload.from_email,
             reply_subject=f"Re: {payload.subject}",
             reply_body=response_body,
+            reply_message_id=reply_message_id,
             decision_path=decision_path,
             classification=classification,
         )
@@ -927,12 +1060,12 @@ class RoutingService:
         conn: sqlite3.Connection,
         payload: InboundMessage,
         client: sqlite3.Row,
+        timer: StageTimer = NULL_TIMER,
     ) -> RoutingOutput | None:
-        text = f"{payload.subject} {payload.body}".upper()
-        if "NOT RESOLVED" not in text:
+        if not self._is_not_resolved_reply(payload):
             return None
 
-        match = TICKET_REF_RE.search(text)
+        match = TICKET_REF_RE.search(f"{payload.subject} {payload.body}")
         if match is None:
             return RoutingOutput(
                 ok=False,
@@ -956,6 +1089,7 @@ class RoutingService:
             """,
             (ticket_ref, int(client["client_id"])),
         ).fetchone()
+        timer.lap("ticket_lookup")
 
         if ticket is None:
             return RoutingOutput(
@@ -974,6 +1108,7 @@ class RoutingService:
         owner_code = str(owner["agent_code"])
         owner_name = str(owner["full_name"])
         owner_email = str(owner["email"])
+        timer.lap("agent_selection")
         desk_details = self._desk_details_map(conn)
         primary_desk_label = self._desk_label(desk_details, int(ticket["primary_desk_id"]))
         now = self._now_ts()
@@ -1007,37 +1142,28 @@ class RoutingService:
             (int(ticket["ticket_id"]), owner_id, int(ticket["primary_desk_id"]), self._to_ts(now)),
         )
 
-        trace_escalation = self._insert_trace(
-            conn,
-            int(ticket["ticket_id"]),
-            "Client satisfied?",
-            "NO",
-            "Client explicitly replied NOT RESOLVED.",
-            "SYSTEM",
-            now,
-        )
-        self._insert_trace(
+        escalation_step_seq = self._next_trace_step_seq(conn, int(ticket["ticket_id"]))
+        self._insert_traces(
             conn,
             int(ticket["ticket_id"]),
-            "Suggest best-fit human agent based on specialty, load, and queue risk",
-            f"ROUTE_TO_{owner_code}",
-            "Escalation from AI response to human owner.",
-            "AI",
-            now,
-            owner_id,
-        )
-
-        self._insert_email_message(
-            conn,
-            ticket_id=int(ticket["ticket_id"]),
-            direction="INBOUND",
-            sender_email=str(client["email"]),
-            recipient_email="client-service@mvp.demo",
-            subject=payload.subject,
-            body=payload.body,
-            sent_at=now,
-            is_automated=0,
-            related_trace_id=trace_escalation,
+            [
+                TraceStep(
+                    node_name="Client satisfied?",
+                    decision="NO",
+                    rationale="Client explicitly replied NOT RESOLVED.",
+                    actor_type="SYSTEM",
+                    created_at=now,
+                ),
+                TraceStep(
+                    node_name="Suggest best-fit human agent based on specialty, load, and queue risk",
+                    decision=f"ROUTE_TO_{owner_code}",
+                    rationale="Escalation from AI response to human owner.",
+                    actor_type="AI",
+                    created_at=now,
+                    decided_by_agent_id=owner_id,
+                ),
+            ],
+            first_step_seq=escalation_step_seq,
         )
 
         owner_label = self._owner_label(owner_code, owner_name, owner_email)
@@ -1050,18 +1176,34 @@ class RoutingService:
             + f"\n\nTicket Reference: {ticket_ref}"
         )
 
-        self._insert_email_message(
+        reply_message_id = self._insert_email_messages(
             conn,
-            ticket_id=int(ticket["ticket_id"]),
-            direction="OUTBOUND",
-            sender_email=self._settings.sender_email,
-            recipient_email=str(client["email"]),
-            subject=f"Re: {payload.subject}",
-            body=reply_body,
-            sent_at=now,
-            is_automated=1,
-            related_trace_id=trace_escalation,
+            int(ticket["ticket_id"]),
+            [
+                EmailRow(
+                    direction="INBOUND",
+                    sender_email=str(client["email"]),
+                    recipient_email="client-service@mvp.demo",
+                    subject=payload.subject,
+                    body=payload.body,
+                    sent_at=now,
+                    is_automated=0,
+                    related_step_seq=escalation_step_seq,
+                ),
+                EmailRow(
+                    direction="OUTBOUND",
+                    sender_email=self._settings.sender_email,
+                    recipient_email=str(client["email"]),
+                    subject=f"Re: {payload.subject}",
+                    body=reply_body,
+                    sent_at=now,
+                    is_automated=1,
+                    related_step_seq=escalation_step_seq,
+                    delivery_status=self._reply_delivery_status(payload),
+                ),
+            ],
         )
+        timer.lap("db_writes")
 
         return RoutingOutput(
             ok=True,
@@ -1076,6 +1218,7 @@ class RoutingService:
             to_email=str(client["email"]),
             reply_subject=f"Re: {payload.subject}",
             reply_body=reply_body,
+            reply_message_id=reply_message_id,
             decision_path=[
                 "1) Client satisfied: NO",
                 "2) Human handoff: COMPLETED",
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import sqlite3
+from typing import Any
+
+
+def fetch_ticket_status(conn: sqlite3.Connection, ticket_ref: str) -> dict[str, Any] | None:
+    """Ticket header plus ordered decision path, or None when the ref is unknown.
+
+    Kept free of pydantic/agents imports so `cli.py status` starts fast.
+    """
+    ticket = conn.execute(
+        """
+        SELECT
+            t.ticket_id,
+            t.ticket_ref,
+            t.status,
+            t.automatable,
+            t.requires_multi_desk,
+            t.priority,
+            t.requester_email,
+            a.agent_code AS owner_agent_code,
+            a.email AS owner_agent_email,
+            t.created_at,
+            t.first_response_at,
+            t.resolved_at,
+            t.closed_at,
+            cd.desk_code AS current_desk_code,
+            t.last_event_at,
+            t.hop_count,
+            t.trace_count
+        FROM tickets t
+        LEFT JOIN agents a ON a.agent_id = t.owner_agent_id
+        LEFT JOIN desks cd ON cd.desk_id = t.current_desk_id
+        WHERE t.ticket_ref = ?
+        LIMIT 1;
+        """,
+        (ticket_ref,),
+    ).fetchone()
+    if ticket is None:
+        return None
+
+    path_rows = conn.execute(
+        """
+        SELECT step_seq, node_name, decision, actor_type, created_at
+        FROM v_ticket_decision_path
+        WHERE ticket_ref = ?
+        ORDER BY step_seq;
+        """,
+        (ticket_ref,),
+    ).fetchall()
+
+    return {
+        "ticket": dict(ticket),
+        "decision_path": [dict(row) for row in path_rows],
+    }
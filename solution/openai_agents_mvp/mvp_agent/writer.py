@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import queue
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, TypeVar
+
+
+T = TypeVar("T")
+
+
+class WriteQueueFullError(RuntimeError):
+    """Raised when the write queue stays full for longer than the submit timeout."""
+
+
+@dataclass
+class _WriteJob:
+    fn: Callable[[sqlite3.Connection], Any]
+    future: Future = field(default_factory=Future)
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class SerializedWriter:
+    """Single writer thread that owns the only write connection of this process.
+
+    Jobs are callables taking the write connection; each one runs in its own
+    transaction (committed on return, rolled back on exception) in submission order.
+    A bounded queue applies backpressure: callers wait up to `submit_timeout_s` for
+    a slot, then get `WriteQueueFullError` instead of piling up on SQLite locks.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], sqlite3.Connection],
+        max_queue: int,
+        submit_timeout_s: float,
+    ) -> None:
+        self._connect = connect
+        self._queue: queue.Queue[_WriteJob | None] = queue.Queue(maxsize=max_queue)
+        self._max_queue = max_queue
+        self._submit_timeout_s = submit_timeout_s
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._peak_depth = 0
+        self._wait_s_total = 0.0
+        self._exec_s_total = 0.0
+
+    def run(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        """Submit a write job and block until it has been committed."""
+        return self.submit(fn).result()
+
+    def submit(self, fn: Callable[[sqlite3.Connection], T]) -> Future:
+        self._ensure_started()
+        job = _WriteJob(fn=fn)
+        try:
+            self._queue.put(job, timeout=self._submit_timeout_s)
+        except queue.Full:
+            with self._lock:
+                self._rejected += 1
+            raise WriteQueueFullError(
+                f"write queue full ({self._max_queue} pending) after {self._submit_timeout_s:.1f}s"
+            ) from None
+
+        with self._lock:
+            self._submitted += 1
+            self._peak_depth = max(self._peak_depth, self._queue.qsize())
+        return job.future
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            finished = self._completed + self._failed
+            return {
+                "queue_depth": self._queue.qsize(),
+                "queue_capacity": self._max_queue,
+                "peak_queue_depth": self._peak_depth,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "avg_queue_wait_ms": round(self._wait_s_total / finished * 1000, 2) if finished else 0.0,
+                "avg_exec_ms": round(self._exec_s_total / finished * 1000, 2) if finished else 0.0,
+            }
+
+    def close(self, timeout_s: float | None = None) -> None:
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout=timeout_s)
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="sqlite-writer", daemon=True)
+                self._thread.start()
+
+    def _loop(self) -> None:
+        conn: sqlite3.Connection | None = None
+        try:
+            while True:
+                job = self._queue.get()
+                if job is None:
+                    return
+                if not job.future.set_running_or_notify_cancel():
+                    continue
+
+                started = time.perf_counter()
+                try:
+                    # Connect lazily so a missing DB fails the job instead of the thread.
+                    if conn is None:
+                        conn = self._connect()
+                    result = job.fn(conn)
+                    conn.commit()
+                except BaseException as exc:  # noqa: BLE001
+                    if conn is not None:
+                        conn.rollback()
+                    self._record(job, started, ok=False)
+                    job.future.set_exception(exc)
+                else:
+                    self._record(job, started, ok=True)
+                    job.future.set_result(result)
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def _record(self, job: _WriteJob, started: float, ok: bool) -> None:
+        finished = time.perf_counter()
+        with self._lock:
+            if ok:
+                self._completed += 1
+            else:
+                self._failed += 1
+            self._wait_s_total += started - job.enqueued_at
+            self._exec_s_total += finished - started
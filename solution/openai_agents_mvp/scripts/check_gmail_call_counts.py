@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""Gmail API call-count check for `email_adapter/gmail_worker.py`, against a local fake service.
+
+Runs `process_batch` over a synthetic unread page (router call stubbed out) and
+checks the HTTP round trips the worker makes: one list, one batch fetch per 50
+messages and a single `batchModify` for mark-read, with every reply queued in the
+outbox. Draining the outbox must then send one reply per message and report each
+as SENT. A replay of the same page must only list and mark read. Exits 1 when a
+count is off.
+"""
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import math
+import sys
+import tempfile
+import threading
+from collections import Counter
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "email_adapter"))
+sys.path.insert(0, str(ROOT))
+
+import gmail_oauth  # noqa: E402
+import gmail_worker  # noqa: E402
+
+
+class _FakeRequest:
+    def __init__(self, service: FakeGmailService, kind: str, run) -> None:
+        self._service = service
+        self.kind = kind
+        self._run = run
+
+    def execute(self) -> Any:
+        self._service.count("http_round_trip")
+        self._service.count(self.kind)
+        return self._run()
+
+
+class _FakeBatch:
+    def __init__(self, service: FakeGmailService, callback) -> None:
+        self._service = service
+        self._callback = callback
+        self._requests: list[tuple[str, _FakeRequest]] = []
+
+    def add(self, request: _FakeRequest, request_id: str) -> None:
+        self._requests.append((request_id, request))
+
+    def execute(self) -> None:
+        self._service.count("http_round_trip")
+        self._service.count("batch")
+        for request_id, request in self._requests:
+            self._service.count(f"batched_{request.kind}")
+            self._callback(request_id, request._run(), None)
+
+
+class FakeGmailService:
+    """Just enough of `users().messages()` for the worker, with per-call counters."""
+
+    def __init__(self, messages: list[dict[str, Any]]) -> None:
+        self._messages = {message["id"]: message for message in messages}
+        self._order = [message["id"] for message in messages]
+        self._lock = threading.Lock()
+        self.calls: Counter[str] = Counter()
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self.calls[name] += 1
+
+    def users(self) -> FakeGmailService:
+        return self
+
+    def messages(self) -> FakeGmailService:
+        return self
+
+    def new_batch_http_request(self, callback) -> _FakeBatch:
+        return _FakeBatch(self, callback)
+
+    def list(self, userId: str, q: str, maxResults: int) -> _FakeRequest:
+        def run() -> dict[str, Any]:
+            unread = [
+                {"id": message_id, "threadId": self._messages[message_id]["threadId"]}
+                for message_id in reversed(self._order)
+                if self._messages[message_id]["unread"]
+            ]
+            return {"messages": unread[:maxResults]}
+
+        return _FakeRequest(self, "list", run)
+
+    def get(self, userId: str, id: str, format: str) -> _FakeRequest:
+        message = self._messages[id]
+
+        def run() -> dict[str, Any]:
+            return {
+                "id": id,
+                "threadId": message["threadId"],
+                "labelIds": ["INBOX", "UNREAD"] if message["unread"] else ["INBOX"],
+                "snippet": message["body"][:200],
+                "payload": {
+                    "mimeType": "text/plain",
+                    "headers": [
+                        {"name": "From", "value": message["from"]},
+                        {"name": "Subject", "value": message["subject"]},
+                        {"name": "Message-ID", "value": f"<{id}@fake.local>"},
+                    ],
+                    "body": {"data": base64.urlsafe_b64encode(message["body"].encode("utf-8")).decode("ascii")},
+                },
+            }
+
+        return _FakeRequest(self, "get", run)
+
+    def send(self, userId: str, body: dict[str, Any]) -> _FakeRequest:
+        return _FakeRequest(self, "send", lambda: {"id": "sent"})
+
+    def modify(self, userId: str, id: str, body: dict[str, Any]) -> _FakeRequest:
+        def run() -> dict[str, Any]:
+            self._messages[id]["unread"] = False
+            return {}
+
+        return _FakeRequest(self, "modify", run)
+
+    def batchModify(self, userId: str, body: dict[str, Any]) -> _FakeRequest:
+        def run() -> dict[str, Any]:
+            for message_id in body["ids"]:
+                self._messages[message_id]["unread"] = False
+            return {}
+
+        return _FakeRequest(self, "batchModify", run)
+
+    def mark_all_unread(self) -> None:
+        for message in self._messages.values():
+            message["unread"] = True
+
+
+class _FakeRouter:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._next_message_id = 0
+        self.delivery: dict[int, str] = {}
+
+    def route(self, payload: dict[str, Any]) -> dict[str, Any]:
+        with self._lock:
+            self._next_message_id += 1
+            reply_message_id = self._next_message_id
+        return {
+            "ok": True,
+            "ticket_ref": "TCK000001",
+            "reply_subject": f"Re: {payload['subject']}",
+            "reply_body": "Routed.",
+            "reply_message_id": reply_message_id,
+        }
+
+    def report_delivery(self, updates: list[dict[str, Any]]) -> bool:
+        for update in updates:
+            self.delivery[update["message_id"]] = update["delivery_status"]
+        return True
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Check Gmail API round trips per batch against a fake service")
+    parser.add_argument("--messages", type=int, default=60)
+    parser.add_argument("--threads", type=int, default=8, help="Distinct Gmail threads in the page")
+    parser.add_argument("--workers", type=int, default=4)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    messages = [
+        {
+            "id": f"msg{idx:04d}",
+            "threadId": f"thr{idx % args.threads:03d}",
+            "from": f"client{idx % args.threads}@example.com",
+            "subject": f"Cash balance {idx}",
+            "body": "Please send my cash balance.",
+            "unread": True,
+        }
+        for idx in range(args.messages)
+    ]
+    service = FakeGmailService(messages)
+    router = _FakeRouter()
+    gmail_worker.get_router_client = lambda base_url: router
+
+    checks: list[dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        settings = SimpleNamespace(
+            state_db_path=Path(tmp) / "adapter_state.db",
+            gmail_query="label:inbox is:unread",
+            gmail_max_batch=args.messages,
+            gmail_address="desk@example.com",
+            skip_self=True,
+            router_api_base_url="http://router.invalid",
+            gmail_workers=args.workers,
+            state_retention_days=30,
+            body_max_chars=20000,
+            worker_processes=1,
+            claim_lease_seconds=600,
+            gmail_automatable_workers=max(args.workers - 1, 1),
+            gmail_human_workers=max(args.workers - 1, 1),
+        )
+        gmail_oauth.init_state_db(settings.state_db_path)
+
+        results = gmail_worker.process_batch(service, settings, lambda: service)
+        first = dict(service.calls)
+        expected_first = {
+            "list": 1,
+            "batch": math.ceil(args.messages / gmail_worker.FETCH_BATCH_SIZE),
+            "batched_get": args.messages,
+            "get": 0,
+            "send": 0,
+            "modify": 0,
+            "batchModify": 1,
+        }
+        checks.append(
+            {
+                "run": "fresh_page",
+                "processed": sum(1 for result in results if result["status"] == "processed"),
+                "calls": first,
+                "ok": all(first.get(name, 0) == count for name, count in expected_first.items())
+                and len(results) == args.messages,
+            }
+        )
+
+        service.calls.clear()
+        while gmail_worker.send_pending_replies(service, settings)["leased"]:
+            pass
+        drained = dict(service.calls)
+        sent_reported = sum(1 for status in router.delivery.values() if status == "SENT")
+        checks.append(
+            {
+                "run": "drain_outbox",
+                "calls": drained,
+                "reported_sent": sent_reported,
+                "ok": drained.get("send", 0) == args.messages
+                and drained.get("http_round_trip", 0) == args.messages
+                and sent_reported == args.messages,
+            }
+        )
+
+        service.calls.clear()
+        service.mark_all_unread()
+        replay = gmail_worker.process_batch(service, settings, lambda: service)
+        second = dict(service.calls)
+        expected_second = {"list": 1, "batch": 0, "get": 0, "send": 0, "modify": 0, "batchModify": 1}
+        checks.append(
+            {
+                "run": "replay_processed_page",
+                "skipped": sum(1 for result in replay if result["status"] == "skipped_already_processed"),
+                "calls": second,
+                "ok": all(second.get(name, 0) == count for name, count in expected_second.items()),
+            }
+        )
+
+    ok = all(check["ok"] for check in checks)
+    per_email = (first["http_round_trip"] + drained["http_round_trip"]) / args.messages
+    print(json.dumps({"ok": ok, "round_trips_per_email": round(per_email, 3), "checks": checks}, indent=2))
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
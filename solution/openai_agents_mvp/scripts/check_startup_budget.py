@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Startup budget check for the CLI and API entry points, based on `-X importtime`.
+
+Each entry point is imported in a fresh interpreter; the check fails (exit 1)
+when its total import time exceeds the budget or when it pulls in a module it
+must not load at startup (the agents SDK, or anything heavy for `cli.py status`).
+Timings are machine-dependent: set budgets from a baseline run on the target host.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parents[1]
+# Imported by the interpreter before `-c` runs; not attributable to our code.
+INTERPRETER_STARTUP = {"_frozen_importlib_external", "zipimport", "encodings", "encodings.utf_8", "_signal", "io", "site"}
+
+
+@dataclass(frozen=True)
+class EntryPoint:
+    name: str
+    code: str
+    forbidden: tuple[str, ...]
+
+
+ENTRY_POINTS = {
+    # Everything `cli.py status` imports before it touches the DB.
+    "cli_status": EntryPoint(
+        name="cli_status",
+        code="import cli, mvp_agent.db, mvp_agent.ticket_status",
+        forbidden=("agents", "openai", "pydantic", "fastapi", "mvp_agent.service", "mvp_agent.models"),
+    ),
+    "cli_inbound": EntryPoint(
+        name="cli_inbound",
+        code="import cli, mvp_agent.service",
+        forbidden=("agents", "openai", "fastapi"),
+    ),
+    "api": EntryPoint(
+        name="api",
+        code="import api",
+        forbidden=("agents", "openai"),
+    ),
+}
+
+
+def measure(entry: EntryPoint) -> tuple[float, set[str]]:
+    """Return (total import time in ms, imported module names) for one fresh interpreter."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", entry.code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"{entry.name}: import failed\n{proc.stderr[-2000:]}")
+
+    total_us = 0
+    modules: set[str] = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, raw_name = line[len("import time:"):].split("|")
+        modules.add(raw_name.strip())
+        # Top-level imports have no indentation; their cumulative times add up to the total.
+        if raw_name.startswith(" ") and not raw_name.startswith("  ") and raw_name.strip() not in INTERPRETER_STARTUP:
+            total_us += int(cumulative)
+    return total_us / 1000, modules
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Check CLI/API import-time budgets")
+    parser.add_argument("--cli-status-budget-ms", type=float, default=100.0)
+    parser.add_argument("--cli-inbound-budget-ms", type=float, default=500.0)
+    parser.add_argument("--api-budget-ms", type=float, default=1000.0)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per entry point (median is used)")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    budgets = {
+        "cli_status": args.cli_status_budget_ms,
+        "cli_inbound": args.cli_inbound_budget_ms,
+        "api": args.api_budget_ms,
+    }
+
+    results: list[dict[str, object]] = []
+    failed = False
+    for name, entry in ENTRY_POINTS.items():
+        timings: list[float] = []
+        modules: set[str] = set()
+        for _ in range(max(args.runs, 1)):
+            elapsed_ms, modules = measure(entry)
+            timings.append(elapsed_ms)
+        median_ms = statistics.median(timings)
+        leaked = sorted(
+            module
+            for module in modules
+            if any(module == banned or module.startswith(f"{banned}.") for banned in entry.forbidden)
+        )
+        ok = median_ms <= budgets[name] and not leaked
+        failed |= not ok
+        results.append(
+            {
+                "entry_point": name,
+                "median_import_ms": round(median_ms, 1),
+                "budget_ms": budgets[name],
+                "forbidden_imports": leaked[:10],
+                "ok": ok,
+            }
+        )
+
+    print(json.dumps({"ok": not failed, "results": results}, indent=2))
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
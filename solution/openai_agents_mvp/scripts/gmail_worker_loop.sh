@@ -2,4 +2,6 @@
 set -euo pipefail
 cd /Users/milo/Desktop/BNP_BDD/solution/openai_agents_mvp
 source .venv/bin/activate
+# Workers import `mvp_agent` from the project root.
+export PYTHONPATH="$PWD${PYTHONPATH:+:$PYTHONPATH}"
 python email_adapter/gmail_worker.py "$@"
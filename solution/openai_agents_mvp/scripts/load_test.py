@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""Replay synthetic inbound email traffic against the router API at a target rate.
+
+Messages come from the seeded `clients` and `trades` tables with the intent mix
+of `INTENT_WEIGHTS` in `build_database.py`; a share of automated answers gets a
+NOT RESOLVED follow-up. By default the script copies the DB to a temp dir and
+serves `api.py` in-process on a free local port, classifying with the local
+heuristic (plus optional simulated model latency) so no API key is spent.
+Prints throughput, latency percentiles and error/lock rates as JSON.
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import socket
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import urlparse
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT.parent / "mvp_routing_database"))
+
+from build_database import DB_PATH as SEEDED_DB_PATH  # noqa: E402
+from build_database import INTENT_WEIGHTS  # noqa: E402
+
+
+TRADE_INTENTS = {"trade_status", "settlement_eta", "failed_trade_investigation", "trade_amendment_request"}
+
+# (subject, body) per intent; "{trade_ref}" is filled from the client's own trades.
+MESSAGE_TEMPLATES: dict[str, list[tuple[str, str]]] = {
+    "cash_balance": [
+        ("Need cash balance", "Please share our available cash by account."),
+        ("Cash position check", "Can you confirm the cash balance on our accounts today?"),
+    ],
+    "position_summary": [
+        ("Positions", "Send my portfolio holdings please."),
+        ("Holdings summary", "Could you share our current exposure by position?"),
+    ],
+    "trade_status": [
+        ("Need trade status for {trade_ref}", "Can you confirm if this trade is executed?"),
+        ("Trade status", "What is the execution status of our last trade?"),
+    ],
+    "settlement_eta": [
+        ("Settlement of {trade_ref}", "When will this settle? Please share the value date."),
+    ],
+    "failed_trade_investigation": [
+        ("Failed trade {trade_ref}", "Please investigate this failed trade and reconcile the break. Urgent."),
+    ],
+    "trade_amendment_request": [
+        ("Amend {trade_ref}", "We need an amendment to change quantity on this trade."),
+    ],
+    "account_closure_request": [
+        ("Account closure", "Please close account and transfer the remaining balance."),
+    ],
+    "sanctions_review_query": [
+        ("Sanctions check", "Is our counterparty on a sanctions watchlist? AML team asks."),
+    ],
+    "corporate_action_instruction": [
+        ("Corporate action election", "Please register our dividend election for the upcoming corporate action."),
+    ],
+    "fee_dispute": [
+        ("Fee dispute on custody charge", "We see an incorrect fee and request review."),
+    ],
+}
+
+
+@dataclass
+class Sample:
+    kind: str
+    scheduled_at: float
+    started_at: float
+    finished_at: float
+    http_status: int
+    ok: bool
+    error: str | None
+
+
+class TrafficGenerator:
+    def __init__(self, db_path: Path, rng: random.Random, not_resolved_share: float) -> None:
+        conn = sqlite3.connect(db_path)
+        try:
+            self._clients = [row[0] for row in conn.execute("SELECT email FROM clients ORDER BY client_id;")]
+            trades: dict[str, list[str]] = {}
+            for email, trade_ref in conn.execute(
+                "SELECT c.email, t.trade_ref FROM trades t JOIN clients c ON c.client_id = t.client_id;"
+            ):
+                trades.setdefault(email, []).append(trade_ref)
+        finally:
+            conn.close()
+        self._trades = trades
+        self._rng = rng
+        self._lock = threading.Lock()
+        self._not_resolved_share = not_resolved_share
+        self._resolved: deque[tuple[str, str]] = deque(maxlen=5000)
+        self._intents = list(INTENT_WEIGHTS)
+        self._weights = [INTENT_WEIGHTS[intent] for intent in self._intents]
+
+    def next_message(self) -> tuple[str, dict[str, str]]:
+        with self._lock:
+            if self._resolved and self._rng.random() < self._not_resolved_share:
+                email, ticket_ref = self._resolved.popleft()
+                return "not_resolved", {
+                    "from_email": email,
+                    "subject": f"NOT RESOLVED {ticket_ref}",
+                    "body": "NOT RESOLVED please escalate this issue to a human owner",
+                }
+
+            intent = self._rng.choices(self._intents, weights=self._weights)[0]
+            email = self._rng.choice(self._clients)
+            if intent in TRADE_INTENTS and not self._trades.get(email):
+                intent = "cash_balance"
+            subject, body = self._rng.choice(MESSAGE_TEMPLATES[intent])
+            if "{trade_ref}" in subject:
+                subject = subject.format(trade_ref=self._rng.choice(self._trades[email]))
+            return intent, {"from_email": email, "subject": subject, "body": body}
+
+    def record_reply(self, message: dict[str, str], response: dict) -> None:
+        if response.get("ok") and response.get("automatable") and response.get("ticket_ref"):
+            with self._lock:
+                self._resolved.append((message["from_email"], str(response["ticket_ref"])))
+
+
+class RouterClient:
+    """One keep-alive HTTP connection per worker thread."""
+
+    def __init__(self, base_url: str, timeout_s: float) -> None:
+        parsed = urlparse(base_url)
+        self._host = parsed.hostname or "127.0.0.1"
+        self._port = parsed.port or 80
+        self._timeout_s = timeout_s
+        self._local = threading.local()
+
+    def _conn(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = http.client.HTTPConnection(self._host, self._port, timeout=self._timeout_s)
+            self._local.conn = conn
+        return conn
+
+    def request(self, method: str, path: str, payload: dict | None = None) -> tuple[int, bytes]:
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        try:
+            conn = self._conn()
+            conn.request(method, path, body=body, headers=headers)
+            resp = conn.getresponse()
+            return resp.status, resp.read()
+        except (OSError, http.client.HTTPException):
+            self._local.conn = None
+            raise
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def _start_local_server(db_path: Path, classifier_latency_ms: float) -> tuple[str, object]:
+    """Serve api.py in this process, with the heuristic classifier standing in for the model."""
+    os.environ["DB_PATH"] = str(db_path)
+    # Empty rather than unset, so a key in .env is not picked up by load_settings().
+    os.environ["OPENAI_API_KEY"] = ""
+
+    import uvicorn
+
+    import api
+    from mvp_agent.classifier import IntentClassifier
+    from mvp_agent.models import IntentClassification
+
+    class StandInClassifier:
+        def __init__(self, inner: IntentClassifier, latency_s: float) -> None:
+            self._inner = inner
+            self._latency_s = latency_s
+
+        def classify(self, subject: str, body: str) -> IntentClassification:
+            if self._latency_s:
+                time.sleep(self._latency_s)
+            return self._inner.classify(subject, body)
+
+        def classify_many(self, items: list[tuple[str, str]], concurrency: int) -> list[IntentClassification]:
+            return [self.classify(subject, body) for subject, body in items]
+
+    service = api.get_service()
+    service._classifier = StandInClassifier(service._classifier, classifier_latency_ms / 1000)
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(api.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="load-test-api", daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if time.monotonic() > deadline:
+            raise SystemExit("Local API server did not start")
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}", server
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(int(round(pct / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[idx]
+
+
+def _latency_summary(values_s: list[float]) -> dict[str, float]:
+    ordered = sorted(value * 1000 for value in values_s)
+    return {
+        "p50_ms": round(_percentile(ordered, 50), 2),
+        "p90_ms": round(_percentile(ordered, 90), 2),
+        "p99_ms": round(_percentile(ordered, 99), 2),
+        "max_ms": round(ordered[-1], 2) if ordered else 0.0,
+        "mean_ms": round(statistics.fmean(ordered), 2) if ordered else 0.0,
+    }
+
+
+def _classify_error(status: int, payload: dict | None, raw: str) -> str | None:
+    if status == 503:
+        return "write_queue_full"
+    if status >= 400:
+        return "locked" if "database is locked" in raw else f"http_{status}"
+    error = (payload or {}).get("error")
+    if error and "database is locked" in str(error):
+        return "locked"
+    return error
+
+
+def run_load(
+    client: RouterClient,
+    generator: TrafficGenerator,
+    rps: float,
+    duration_s: float,
+    concurrency: int,
+) -> tuple[list[Sample], float]:
+    samples: list[Sample] = []
+    samples_lock = threading.Lock()
+
+    def send(kind: str, message: dict[str, str], scheduled_at: float) -> None:
+        started = time.perf_counter()
+        payload: dict | None = None
+        try:
+            status, raw_bytes = client.request("POST", "/inbound", message)
+            raw = raw_bytes.decode("utf-8", errors="replace")
+            try:
+                payload = json.loads(raw)
+            except ValueError:
+                payload = None
+            error = _classify_error(status, payload, raw)
+        except Exception as exc:  # noqa: BLE001
+            status, error = 0, f"transport: {type(exc).__name__}"
+        finished = time.perf_counter()
+
+        ok = status == 200 and bool(payload and payload.get("ok"))
+        if ok and payload is not None:
+            generator.record_reply(message, payload)
+        with samples_lock:
+            samples.append(Sample(kind, scheduled_at, started, finished, status, ok, error))
+
+    # Open loop: requests are scheduled on a fixed clock whether or not earlier ones
+    # finished, and latency is measured from the scheduled time, so a stalled server
+    # shows up as latency instead of silently lowering the offered rate.
+    interval = 1.0 / rps
+    total = int(rps * duration_s)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="load") as pool:
+        for idx in range(total):
+            scheduled_at = started + idx * interval
+            delay = scheduled_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            kind, message = generator.next_message()
+            pool.submit(send, kind, message, scheduled_at)
+    elapsed = time.perf_counter() - started
+    return samples, elapsed
+
+
+def build_report(samples: list[Sample], elapsed_s: float, target_rps: float) -> dict:
+    errors = Counter(sample.error or "none" for sample in samples if not sample.ok)
+    by_kind: dict[str, dict] = {}
+    for kind in sorted({sample.kind for sample in samples}):
+        subset = [sample for sample in samples if sample.kind == kind]
+        by_kind[kind] = {
+            "count": len(subset),
+            "ok": sum(1 for sample in subset if sample.ok),
+            **_latency_summary([sample.finished_at - sample.scheduled_at for sample in subset]),
+        }
+
+    count = len(samples)
+    ok_count = sum(1 for sample in samples if sample.ok)
+    locked = sum(1 for sample in samples if sample.error == "locked")
+    queue_full = sum(1 for sample in samples if sample.error == "write_queue_full")
+    return {
+        "target_rps": target_rps,
+        "sent": count,
+        "ok": ok_count,
+        "elapsed_s": round(elapsed_s, 2),
+        "achieved_rps": round(count / elapsed_s, 2) if elapsed_s else 0.0,
+        "ok_rps": round(ok_count / elapsed_s, 2) if elapsed_s else 0.0,
+        "latency": _latency_summary([sample.finished_at - sample.scheduled_at for sample in samples]),
+        "service_time": _latency_summary([sample.finished_at - sample.started_at for sample in samples]),
+        "lock_error_rate": round(locked / count, 4) if count else 0.0,
+        "write_queue_full_rate": round(queue_full / count, 4) if count else 0.0,
+        "errors": dict(errors),
+        "by_kind": by_kind,
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load-test the routing API with synthetic inbound traffic")
+    parser.add_argument("--db-path", default=str(SEEDED_DB_PATH), help="Seeded DB to read clients/trades from")
+    parser.add_argument(
+        "--base-url",
+        default="",
+        help="Target an already running API (its own DB/classifier) instead of serving api.py in-process",
+    )
+    parser.add_argument(
+        "--in-place",
+        action="store_true",
+        help="Local mode: write to --db-path itself instead of a temp copy",
+    )
+    parser.add_argument("--rps", type=float, default=50.0)
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of traffic")
+    parser.add_argument("--concurrency", type=int, default=32, help="Max in-flight requests")
+    parser.add_argument("--not-resolved-share", type=float, default=0.1)
+    parser.add_argument(
+        "--classifier-latency-ms",
+        type=float,
+        default=0.0,
+        help="Local mode: sleep this long per classification to emulate a model call",
+    )
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=20260219)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    source_db = Path(args.db_path).expanduser()
+    if not source_db.exists():
+        raise SystemExit(f"DB not found: {source_db}")
+
+    work_dir: tempfile.TemporaryDirectory | None = None
+    server = None
+    if args.base_url:
+        base_url = args.base_url
+        mode = "remote"
+    else:
+        db_path = source_db
+        if not args.in_place:
+            work_dir = tempfile.TemporaryDirectory(prefix="router-load-")
+            db_path = Path(work_dir.name) / source_db.name
+            shutil.copy(source_db, db_path)
+        base_url, server = _start_local_server(db_path, args.classifier_latency_ms)
+        mode = "local"
+
+    try:
+        client = RouterClient(base_url, args.timeout)
+        generator = TrafficGenerator(source_db, random.Random(args.seed), args.not_resolved_share)
+        samples, elapsed = run_load(client, generator, args.rps, args.duration, args.concurrency)
+        report = build_report(samples, elapsed, args.rps)
+        report["mode"] = mode
+        try:
+            status, raw = client.request("GET", "/writer/stats")
+            if status == 200:
+                report["writer"] = json.loads(raw)
+        except (OSError, http.client.HTTPException, ValueError):
+            pass
+        print(json.dumps(report, indent=2))
+    finally:
+        if server is not None:
+            server.should_exit = True
+        if work_dir is not None:
+            work_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()